@@ -1,5 +1,12 @@
 #!/bin/sh
 
+# Outbox worker (same image, started with the "outbox" command): sends the
+# account emails queued by the web server. Migrations are left to the web
+# container.
+if [ "$1" = "outbox" ]; then
+    exec uv run manage.py send_outbox --watch
+fi
+
 # Run migrations
 uv run manage.py migrate
 
@@ -11,6 +18,8 @@ uv run manage.py compilemessages -l uk
 
 # Check environment variable
 if [ "$ENVIRONMENT" = "development" ]; then
+    # Send queued emails in the background
+    uv run manage.py send_outbox --watch &
     # Start Django development server
     exec uv run manage.py runserver 0.0.0.0:8000
 else
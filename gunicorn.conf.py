@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration, loaded automatically from the working directory.
+
+Workers are forked from the master, so the Prometheus multiprocess
+directory has to be set before prometheus_client is imported anywhere.
+"""
+
+import os
+import shutil
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # Drop samples left over from a previous run
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Stops reporting the live gauges of dead workers
+    multiprocess.mark_process_dead(worker.pid)
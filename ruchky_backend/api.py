@@ -5,6 +5,8 @@ from django.contrib.admin.views.decorators import staff_member_required
 from ruchky_backend.auth.api import router as auth_router
 from ruchky_backend.users.api import router as users_router
 from ruchky_backend.pets.api import pets_router, pet_listings_router, breeds_router
+from ruchky_backend.helpers.db.middleware import read_from_replica
+from ruchky_backend.monitoring.renderers import TimedJSONRenderer
 
 
 api = NinjaAPI(
@@ -14,8 +16,13 @@ api = NinjaAPI(
     docs_decorator=staff_member_required,
     docs_url="/docs/" if settings.DEBUG else None,
     openapi_url="/openapi.json/" if settings.DEBUG else None,
+    renderer=TimedJSONRenderer(),
 )
 
+# Safe requests to the catalog are served from the read replica
+for router in (breeds_router, pets_router, pet_listings_router):
+    router.add_decorator(read_from_replica, mode="view")
+
 api.add_router("/auth/", auth_router)
 api.add_router("/users/", users_router)
 api.add_router("/breeds/", breeds_router)
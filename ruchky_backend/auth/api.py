@@ -1,10 +1,10 @@
 from allauth.account.adapter import get_adapter
 from allauth.account.utils import send_email_confirmation, has_verified_email
 from allauth.socialaccount.models import SocialApp
-from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.models import SocialLogin
 
-from django.contrib.auth import authenticate, login, logout, get_user_model
+from asgiref.sync import sync_to_async
+from django.contrib.auth import alogin, login, logout, get_user_model
 from django.db import IntegrityError
 from django.middleware.csrf import get_token
 from django.utils.translation import gettext as _
@@ -12,8 +12,29 @@ from ninja import Router
 from ninja.responses import Response
 
 
-from ruchky_backend.auth.schemas import UserLogin, UserRegister, TokenSchema
+from ruchky_backend.auth.google import (
+    InvalidGoogleToken,
+    get_social_app,
+    verify_google_id_token,
+)
+from ruchky_backend.auth.hashing import PasswordHashingBusy
+from ruchky_backend.auth.passwords import aauthenticate
+from ruchky_backend.auth.ratelimit import auth_throttles
+from ruchky_backend.auth.schemas import (
+    RefreshTokenSchema,
+    TokenPairResponse,
+    TokenSchema,
+    UserLogin,
+    UserRegister,
+)
+from ruchky_backend.auth.tokens import (
+    InvalidToken,
+    issue_tokens,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
 from ruchky_backend.helpers.api.schemas import BaseResponse
+from ruchky_backend.helpers.logger import logger
 
 User = get_user_model()
 
@@ -34,24 +55,41 @@ def get_csrf_token(request):
 
 
 @router.post(
-    "/login", response={200: BaseResponse, 401: BaseResponse, 403: BaseResponse}
+    "/login",
+    response={
+        200: TokenPairResponse | BaseResponse,
+        401: BaseResponse,
+        403: BaseResponse,
+        503: BaseResponse,
+    },
+    # Checked before the body is parsed, so limited requests never hash
+    throttle=auth_throttles("login"),
 )
-def login_user(request, data: UserLogin):
+async def login_user(request, data: UserLogin):
     """
     Authenticates user using email + password.
-    On success, sets Django session cookie (sessionid).
+    On success, sets Django session cookie (sessionid), or returns an access
+    and refresh token pair if issue_tokens is set (mobile clients).
     Returns a JSON dict with status detail and HTTP 200.
-    On failure, returns a 401 status with an error detail.
+    On failure, returns a 401 status with an error detail, or 503 if too
+    many passwords are being hashed.
     """
-    user = authenticate(request, email=data.email, password=data.password)
+    try:
+        user = await aauthenticate(request, email=data.email, password=data.password)
+    except PasswordHashingBusy:
+        return 503, {"message": _("Too many login attempts. Please try again.")}
+
     if user is not None:
-        if not has_verified_email(user):
-            send_email_confirmation(request, user)
+        if not await sync_to_async(has_verified_email)(user):
+            await sync_to_async(send_email_confirmation)(request, user)
             return 403, {
                 "message": _("We have sent you an email to verify your email address.")
             }
 
-        login(request, user)
+        if data.issue_tokens:
+            return {"message": "Logged in", **await sync_to_async(issue_tokens)(user)}
+
+        await alogin(request, user, backend="django.contrib.auth.backends.ModelBackend")
         return {"message": "Logged in"}
     return 401, {"message": _("Invalid сredentials. Please try again.")}
 
@@ -62,26 +100,54 @@ def logout_user(request):
     return {"message": "Logged out"}
 
 
-@router.post("/register", response={200: BaseResponse, 400: BaseResponse})
-def register_user(request, data: UserRegister):
+@router.post("/token/refresh", response={200: TokenPairResponse, 401: BaseResponse})
+def refresh_token(request, data: RefreshTokenSchema):
+    """
+    Exchanges a refresh token for a new access and refresh token pair.
+    Each refresh token can only be used once.
+    """
+    try:
+        return {"message": "success", **rotate_refresh_token(data.refresh_token)}
+    except InvalidToken as e:
+        return 401, {"message": str(e)}
+
+
+@router.post("/token/revoke", response={200: BaseResponse})
+def revoke_token(request, data: RefreshTokenSchema):
+    """
+    Revokes a refresh token and every token issued with it, including
+    access tokens (logout for token clients).
+    """
+    revoke_refresh_token(data.refresh_token)
+    return {"message": "success"}
+
+
+@router.post(
+    "/register",
+    response={200: BaseResponse, 400: BaseResponse, 503: BaseResponse},
+    throttle=auth_throttles("register"),
+)
+async def register_user(request, data: UserRegister):
     """
     Registers a new user. Sends an email confirmation link upon successfull registration.
     """
     try:
-        user = User.objects.create_user(
+        user = await User.objects.acreate_user(
             email=data.email,
             password=data.password,
             first_name=data.first_name,
             last_name=data.last_name,
             phone=data.phone,
         )
-        send_email_confirmation(request, user)
+        await sync_to_async(send_email_confirmation)(request, user)
 
+    except PasswordHashingBusy:
+        return 503, {"message": _("Too many sign ups. Please try again.")}
     except IntegrityError:
         # Not to leak information about existing users we send the same message
         # But user will receive an email with information that account already exists
         adapter = get_adapter(request)
-        adapter.send_account_already_exists_mail(data.email)
+        await sync_to_async(adapter.send_account_already_exists_mail)(data.email)
         return {"message": "success"}
     except Exception as e:
         return 500, {"message": str(e)}
@@ -97,10 +163,11 @@ def google_login(request, data: TokenSchema):
     provider = "google"
     token = data.token
     try:
-        adapter = GoogleOAuth2Adapter(request)
-        app = SocialApp.objects.get(provider=provider)
-        social_login: SocialLogin = adapter.complete_login(
-            request, app, token=token, response={"id_token": token}
+        app = get_social_app(provider)
+        # Verified against Google's cached keys, no request per login
+        claims = verify_google_id_token(token, audience=app.client_id)
+        social_login: SocialLogin = app.get_provider(request).sociallogin_from_response(
+            request, claims
         )
 
         email = (
@@ -129,6 +196,9 @@ def google_login(request, data: TokenSchema):
         if not user.is_active:
             return Response({"message": "Account is disabled"}, status=403)
 
+        if data.issue_tokens:
+            return Response({"message": "Logged in", **issue_tokens(user)})
+
         login(request, user, backend="django.contrib.auth.backends.ModelBackend")
 
         return Response("")
@@ -136,6 +206,9 @@ def google_login(request, data: TokenSchema):
         return Response(
             {"message": "Google authentication is not configured"}, status=500
         )
+    except InvalidGoogleToken as e:
+        logger.info(f"Invalid Google ID token: {e}")
+        return Response({"message": "Authentication failed"}, status=401)
     except Exception as e:
         print(f"Google login error: {str(e)}")
         return Response({"message": "Authentication failed"}, status=401)
@@ -5,3 +5,6 @@ class CustomAuthConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ruchky_backend.auth"
     label = "ruchky_auth"
+
+    def ready(self):
+        from ruchky_backend.auth import signals  # noqa
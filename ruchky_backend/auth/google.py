@@ -0,0 +1,145 @@
+import re
+import threading
+import time
+
+from typing import Any, Dict, Tuple
+
+import jwt
+import requests
+
+from allauth.socialaccount.models import SocialApp
+
+from ruchky_backend.helpers.logger import logger
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidGoogleToken(Exception):
+    pass
+
+
+class GoogleKeySet:
+    """
+    Google's public keys for ID tokens, cached per process for the max-age
+    of the certs response. Callers that miss wait for a single fetch.
+    """
+
+    def __init__(
+        self,
+        url: str = GOOGLE_CERTS_URL,
+        default_max_age: int = 300,
+        min_refresh_interval: int = 30,
+    ):
+        self.url = url
+        self.default_max_age = default_max_age
+        # Limits refetches for unknown key ids while the keys are fresh
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = threading.Lock()
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = float("-inf")
+        self._expires_at = float("-inf")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = float("-inf")
+            self._expires_at = float("-inf")
+
+    def fetch(self) -> Tuple[Dict, int]:
+        """Returns the JWK set and how many seconds it can be cached"""
+        response = requests.get(self.url, timeout=5)
+        response.raise_for_status()
+        match = MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+        return response.json(), int(match[1]) if match else self.default_max_age
+
+    def get_key(self, kid: str):
+        """
+        Returns the public key with the given id
+
+        :raises InvalidGoogleToken: if Google has no such key
+        """
+        key = self._keys.get(kid)
+        if key is not None and time.monotonic() < self._expires_at:
+            return key
+
+        with self._lock:
+            # Another caller may have refreshed the keys while we waited
+            now = time.monotonic()
+            key = self._keys.get(kid)
+            if key is not None and now < self._expires_at:
+                return key
+
+            if (
+                now >= self._expires_at
+                or now - self._fetched_at >= self.min_refresh_interval
+            ):
+                try:
+                    self._refresh()
+                except (requests.RequestException, ValueError, jwt.PyJWTError) as e:
+                    # Keys overlap when Google rotates them, so an expired
+                    # key is still better than failing every login
+                    if key is None:
+                        raise InvalidGoogleToken(f"Could not fetch Google keys: {e}")
+                    logger.warning(f"Could not refresh Google keys: {e}")
+                    return key
+
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise InvalidGoogleToken(f"Unknown key id: {kid}")
+        return key
+
+    def _refresh(self) -> None:
+        data, max_age = self.fetch()
+        key_set = jwt.PyJWKSet.from_dict(data)
+        self._keys = {jwk.key_id: jwk.key for jwk in key_set.keys}
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + max_age
+
+
+google_key_set = GoogleKeySet()
+
+
+def verify_google_id_token(token: str, audience: str) -> Dict[str, Any]:
+    """
+    Verifies the signature and claims of a Google ID token locally and
+    returns its claims
+
+    :raises InvalidGoogleToken: if the token is not valid for the audience
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+        key = google_key_set.get_key(header.get("kid"))
+        return jwt.decode(
+            token,
+            key=key,
+            algorithms=["RS256"],
+            audience=audience,
+            issuer=GOOGLE_ISSUERS,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise InvalidGoogleToken(str(e))
+
+
+_social_apps: Dict[str, SocialApp] = {}
+
+
+def get_social_app(provider: str) -> SocialApp:
+    """
+    Returns the SocialApp of the provider, cached per process until any
+    SocialApp is saved or deleted
+
+    :raises SocialApp.DoesNotExist: if the provider is not configured
+    """
+    app = _social_apps.get(provider)
+    if app is None:
+        app = _social_apps[provider] = SocialApp.objects.get(provider=provider)
+    return app
+
+
+def clear_social_apps(**kwargs) -> None:
+    _social_apps.clear()
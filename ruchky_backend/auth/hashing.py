@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from django.conf import settings
+
+from ruchky_backend.monitoring.metrics import (
+    PASSWORD_HASHING_QUEUE_SECONDS,
+    PASSWORD_HASHING_REJECTED,
+    PASSWORD_HASHING_SECONDS,
+)
+
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+class PasswordHashingPool:
+    """
+    Runs password hashing in a dedicated thread pool, so PBKDF2 never blocks
+    the event loop or the threads serving other requests. hashlib releases
+    the GIL while hashing, so the workers hash in parallel.
+
+    At most PASSWORD_HASHING_MAX_PENDING calls are queued or running, more
+    fail fast with PasswordHashingBusy instead of waiting behind a burst.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use, after gunicorn forked the worker
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    thread_name_prefix="password-hashing",
+                )
+            return self._executor
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Runs fn in the pool and waits for the result
+
+        :raises PasswordHashingBusy: if the pool is saturated
+        """
+        executor = self.get_executor()
+        with self._lock:
+            if self._pending >= settings.PASSWORD_HASHING_MAX_PENDING:
+                PASSWORD_HASHING_REJECTED.inc()
+                raise PasswordHashingBusy("Too many password hashing requests")
+            self._pending += 1
+
+        submitted_at = time.perf_counter()
+
+        def call() -> T:
+            started_at = time.perf_counter()
+            PASSWORD_HASHING_QUEUE_SECONDS.observe(started_at - submitted_at)
+            try:
+                return fn(*args)
+            finally:
+                PASSWORD_HASHING_SECONDS.observe(time.perf_counter() - started_at)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, call)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+password_hashing = PasswordHashingPool()
@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from ruchky_backend.helpers.db.models import UUIDMixin, DateTimeMixin
+from ruchky_backend.users.models import User
+
+
+class RefreshToken(UUIDMixin, DateTimeMixin):
+    """
+    Long-lived token exchanged for new access tokens. Only a hash of the
+    token is stored. Tokens are rotated on every use and all tokens issued
+    from one login share a family, which is revoked as a whole.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="refresh_tokens",
+        verbose_name=_("User"),
+    )
+    family = models.UUIDField(_("Family"), db_index=True)
+    token_hash = models.CharField(_("Token hash"), max_length=64, unique=True)
+    expires_at = models.DateTimeField(_("Expires At"))
+    rotated_at = models.DateTimeField(_("Rotated At"), blank=True, null=True)
+    revoked_at = models.DateTimeField(
+        _("Revoked At"), blank=True, null=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Refresh Token")
+        verbose_name_plural = _("Refresh Tokens")
+
+    def __str__(self):
+        return f"{self.user} ({self.family})"
@@ -0,0 +1,45 @@
+from allauth.account.utils import filter_users_by_email
+from asgiref.sync import sync_to_async
+from django.contrib.auth import _clean_credentials, get_user_model, user_login_failed
+from django.contrib.auth.hashers import make_password, verify_password
+from django.http import HttpRequest
+
+from ruchky_backend.auth.hashing import password_hashing
+
+User = get_user_model()
+
+
+async def aauthenticate(request: HttpRequest, email: str, password: str):
+    """
+    Async authenticate() by email and password, with the hashing done in the
+    password hashing pool. Users are looked up like allauth's backend does
+    (any of their email addresses, verified ones first).
+
+    :raises PasswordHashingBusy: if the pool is saturated
+    """
+    users = await sync_to_async(filter_users_by_email)(email, prefer_verified=True)
+    if not users:
+        # Hash anyway, so the response time doesn't reveal unknown emails
+        await password_hashing.run(make_password, password)
+
+    for user in users:
+        if await acheck_password(user, password) and user.is_active:
+            return user
+
+    # Sent like authenticate() does, for receivers filtering on its sender
+    await user_login_failed.asend(
+        sender="django.contrib.auth",
+        credentials=_clean_credentials({"email": email, "password": password}),
+        request=request,
+    )
+    return None
+
+
+async def acheck_password(user, password: str) -> bool:
+    is_correct, must_update = await password_hashing.run(
+        verify_password, password, user.password
+    )
+    if is_correct and must_update:
+        user.password = await password_hashing.run(make_password, password)
+        await User.objects.filter(pk=user.pk).aupdate(password=user.password)
+    return is_correct
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import math
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest
+from ninja.throttling import BaseThrottle
+
+from ruchky_backend.helpers.logger import logger
+from ruchky_backend.monitoring.metrics import record_rate_limit
+
+# (tokens left, time of the last update)
+BucketState = Tuple[float, float]
+
+
+class LocalBuckets:
+    """
+    Per-process bucket states, used while the shared cache is unavailable.
+    The least recently used keys are dropped above max_entries.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._states: OrderedDict[str, BucketState] = OrderedDict()
+
+    def get(self, key: str) -> Optional[BucketState]:
+        with self._lock:
+            return self._states.get(key)
+
+    def set(self, key: str, state: BucketState) -> None:
+        with self._lock:
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._states.clear()
+
+
+local_buckets = LocalBuckets()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per client key. Each request takes a token and buckets
+    refill evenly, so the full rate is allowed per AUTH_RATE_LIMIT_PERIOD.
+
+    The buckets live in the shared rate limit cache and fall back to
+    per-process buckets when it is unavailable. Reads and writes are not
+    atomic, so concurrent requests can overshoot the rate slightly.
+    """
+
+    key_name: str = ""
+    rate_setting: str = ""
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        # wait() is called right after allow_request() on the same thread
+        self._local = threading.local()
+
+    def get_key(self, request: HttpRequest) -> Optional[str]:
+        raise NotImplementedError(".get_key() must be overridden")
+
+    def allow_request(self, request: HttpRequest) -> bool:
+        self._local.wait = None
+        key = self.get_key(request)
+        if not key:
+            return True
+
+        capacity = getattr(settings, self.rate_setting)
+        period = settings.AUTH_RATE_LIMIT_PERIOD
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        cache_key = f"ratelimit:{self.scope}:{self.key_name}:{digest}"
+
+        allowed, wait = self.take(cache_key, capacity, period)
+        record_rate_limit(self.scope, self.key_name, allowed)
+        if not allowed:
+            self._local.wait = wait
+        return allowed
+
+    def take(self, cache_key: str, capacity: int, period: int) -> Tuple[bool, float]:
+        """Takes a token, returns whether it was allowed and the wait if not"""
+        cache = caches[settings.RATE_LIMIT_CACHE_ALIAS]
+        try:
+            state = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Rate limit cache unavailable, using local buckets: {e}")
+            cache = None
+            state = local_buckets.get(cache_key)
+
+        now = time.time()
+        refill_rate = capacity / period
+        tokens, updated_at = state or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        stored = False
+        if cache is not None:
+            try:
+                # A full bucket is the same as no bucket, so it can expire then
+                cache.set(cache_key, (tokens, now), math.ceil(period))
+                stored = True
+            except Exception as e:
+                logger.warning(
+                    f"Rate limit cache unavailable, using local buckets: {e}"
+                )
+        if not stored:
+            local_buckets.set(cache_key, (tokens, now))
+
+        return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+    def wait(self) -> Optional[float]:
+        return getattr(self._local, "wait", None)
+
+
+class IPThrottle(TokenBucketThrottle):
+    key_name = "ip"
+    rate_setting = "AUTH_RATE_LIMIT_PER_IP"
+
+    def get_key(self, request: HttpRequest) -> Optional[str]:
+        return self.get_ident(request)
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """
+    Limits attempts per account, however many IPs they come from. The email
+    is read from the raw JSON body as throttles run before body parsing.
+    """
+
+    key_name = "email"
+    rate_setting = "AUTH_RATE_LIMIT_PER_EMAIL"
+
+    def get_key(self, request: HttpRequest) -> Optional[str]:
+        try:
+            email = json.loads(request.body).get("email")
+        except (ValueError, AttributeError):
+            return None
+        if not isinstance(email, str):
+            return None
+        return email.strip().lower()
+
+
+def auth_throttles(scope: str):
+    return [IPThrottle(scope), EmailThrottle(scope)]
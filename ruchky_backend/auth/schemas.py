@@ -5,12 +5,15 @@ from django.contrib.auth.password_validation import validate_password
 from ninja import Schema
 from pydantic import EmailStr, field_validator
 
+from ruchky_backend.helpers.api.schemas import BaseResponse
 from ruchky_backend.helpers.types import PhoneNumber
 
 
 class UserLogin(Schema):
     email: EmailStr
     password: str
+    # Return access and refresh tokens instead of starting a session
+    issue_tokens: bool = False
 
 
 class UserRegister(Schema):
@@ -31,3 +34,15 @@ class UserRegister(Schema):
 
 class TokenSchema(Schema):
     token: str
+    issue_tokens: bool = False
+
+
+class RefreshTokenSchema(Schema):
+    refresh_token: str
+
+
+class TokenPairResponse(BaseResponse):
+    access_token: str
+    refresh_token: str
+    token_type: str
+    expires_in: int
@@ -0,0 +1,22 @@
+from ninja.security import HttpBearer
+
+from ruchky_backend.auth.tokens import InvalidToken, verify_access_token
+
+
+class AccessTokenAuth(HttpBearer):
+    """
+    Authenticates API clients with a signed access token in the
+    Authorization header, without sessions or CSRF.
+    """
+
+    def authenticate(self, request, token):
+        try:
+            user = verify_access_token(token)
+        except InvalidToken:
+            return None
+
+        request.user = user
+        return user
+
+
+access_token_auth = AccessTokenAuth()
@@ -0,0 +1,11 @@
+from allauth.socialaccount.models import SocialApp
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ruchky_backend.auth.google import clear_social_apps
+
+
+@receiver(post_save, sender=SocialApp)
+@receiver(post_delete, sender=SocialApp)
+def evict_cached_social_apps(sender, instance: SocialApp, **kwargs):
+    clear_social_apps()
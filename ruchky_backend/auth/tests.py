@@ -1,3 +1,467 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
 
-# Create your tests here.
+from unittest import mock
+
+import jwt
+
+from allauth.account.models import EmailAddress
+from asgiref.sync import AsyncToSync, SyncToAsync
+from allauth.socialaccount.models import SocialApp
+from cryptography.hazmat.primitives.asymmetric import rsa
+from prometheus_client import REGISTRY
+from django.contrib.auth import authenticate, user_login_failed
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+
+from ruchky_backend.auth.google import (
+    GoogleKeySet,
+    InvalidGoogleToken,
+    clear_social_apps,
+    google_key_set,
+    verify_google_id_token,
+)
+from ruchky_backend.auth import passwords
+from ruchky_backend.auth.hashing import PasswordHashingBusy, password_hashing
+from ruchky_backend.auth.models import RefreshToken
+from ruchky_backend.auth.ratelimit import local_buckets
+from ruchky_backend.auth.tokens import revocation_list
+from ruchky_backend.users.models import User
+
+
+class AccessTokenTests(TestCase):
+    me_url = "/api/v1/users/me"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password"
+        )
+        EmailAddress.objects.create(
+            user=cls.user, email=cls.user.email, verified=True, primary=True
+        )
+
+    def setUp(self):
+        caches["users"].clear()
+        caches["ratelimit"].clear()
+        revocation_list.reset()
+        self.addCleanup(revocation_list.reset)
+
+    def login(self):
+        response = self.client.post(
+            "/api/v1/auth/login",
+            {"email": "user@example.com", "password": "password", "issue_tokens": True},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def get_me(self, access_token):
+        return self.client.get(
+            self.me_url, headers={"Authorization": f"Bearer {access_token}"}
+        )
+
+    def refresh(self, refresh_token):
+        return self.client.post(
+            "/api/v1/auth/token/refresh",
+            {"refresh_token": refresh_token},
+            content_type="application/json",
+        )
+
+    def test_login_issues_tokens_without_session(self):
+        tokens = self.login()
+
+        self.assertNotIn("sessionid", self.client.cookies)
+        self.assertEqual(tokens["token_type"], "Bearer")
+        self.assertEqual(
+            self.get_me(tokens["access_token"]).json()["id"], str(self.user.id)
+        )
+
+    def test_verification_makes_no_queries(self):
+        tokens = self.login()
+        self.get_me(tokens["access_token"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_me(tokens["access_token"]).status_code, 200)
+
+    def test_invalid_token(self):
+        self.assertEqual(self.get_me("not-a-token").status_code, 401)
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=-1)
+    def test_expired_token(self):
+        tokens = self.login()
+        self.assertEqual(self.get_me(tokens["access_token"]).status_code, 401)
+
+    def test_password_change_invalidates_token(self):
+        tokens = self.login()
+        self.user.set_password("new-password")
+        self.user.save()
+
+        self.assertEqual(self.get_me(tokens["access_token"]).status_code, 401)
+
+    def test_refresh_rotates_tokens(self):
+        tokens = self.login()
+
+        response = self.refresh(tokens["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_me(response.json()["access_token"]).status_code, 200)
+
+    def test_reused_refresh_token_revokes_family(self):
+        tokens = self.login()
+        new_tokens = self.refresh(tokens["refresh_token"]).json()
+
+        self.assertEqual(self.refresh(tokens["refresh_token"]).status_code, 401)
+        self.assertEqual(self.refresh(new_tokens["refresh_token"]).status_code, 401)
+        self.assertEqual(self.get_me(new_tokens["access_token"]).status_code, 401)
+
+    def test_revoke(self):
+        tokens = self.login()
+        self.get_me(tokens["access_token"])
+
+        self.client.post(
+            "/api/v1/auth/token/revoke",
+            {"refresh_token": tokens["refresh_token"]},
+            content_type="application/json",
+        )
+
+        self.assertEqual(self.get_me(tokens["access_token"]).status_code, 401)
+        self.assertTrue(RefreshToken.objects.get().revoked_at)
+
+    def test_revocations_by_other_workers_are_loaded(self):
+        tokens = self.login()
+        self.get_me(tokens["access_token"])
+
+        RefreshToken.objects.update(revoked_at=timezone.now())
+        revocation_list.reset()
+
+        self.assertEqual(self.get_me(tokens["access_token"]).status_code, 401)
+
+
+class GoogleIdTokenTests(TestCase):
+    client_id = "client-id.apps.googleusercontent.com"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = jwt.algorithms.RSAAlgorithm.to_jwk(
+            cls.private_key.public_key(), as_dict=True
+        )
+        cls.key_set = {"keys": [{**jwk, "kid": "key-1", "alg": "RS256", "use": "sig"}]}
+
+    def setUp(self):
+        google_key_set.reset()
+        self.addCleanup(google_key_set.reset)
+        self.fetch = mock.patch.object(
+            google_key_set, "fetch", return_value=(self.key_set, 3600)
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def id_token(self, kid="key-1", private_key=None, **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": self.client_id,
+            "sub": "1234567890",
+            "email": "google@example.com",
+            "email_verified": True,
+            "iat": now,
+            "exp": now + 3600,
+            **claims,
+        }
+        return jwt.encode(
+            payload,
+            private_key or self.private_key,
+            algorithm="RS256",
+            headers={"kid": kid},
+        )
+
+    def test_keys_are_fetched_once(self):
+        for _ in range(3):
+            claims = verify_google_id_token(self.id_token(), self.client_id)
+
+        self.assertEqual(claims["sub"], "1234567890")
+        self.fetch.assert_called_once()
+
+    def test_concurrent_callers_share_one_fetch(self):
+        def slow_fetch():
+            time.sleep(0.1)
+            return self.key_set, 3600
+
+        self.fetch.side_effect = slow_fetch
+        token = self.id_token()
+        threads = [
+            threading.Thread(
+                target=verify_google_id_token, args=(token, self.client_id)
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.fetch.assert_called_once()
+
+    def test_keys_expire_after_max_age(self):
+        self.fetch.return_value = (self.key_set, 0)
+        verify_google_id_token(self.id_token(), self.client_id)
+        verify_google_id_token(self.id_token(), self.client_id)
+
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_max_age_is_read_from_cache_control(self):
+        response = mock.Mock(headers={"Cache-Control": "public, max-age=19734"})
+        response.json.return_value = self.key_set
+        with mock.patch(
+            "ruchky_backend.auth.google.requests.get", return_value=response
+        ):
+            self.assertEqual(GoogleKeySet().fetch(), (self.key_set, 19734))
+
+    def test_unknown_key_refetches_at_most_once(self):
+        for _ in range(3):
+            with self.assertRaises(InvalidGoogleToken):
+                verify_google_id_token(self.id_token(kid="key-2"), self.client_id)
+
+        self.fetch.assert_called_once()
+
+    def test_invalid_tokens_are_rejected(self):
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        tokens = [
+            self.id_token(private_key=other_key),
+            self.id_token(aud="other-client"),
+            self.id_token(iss="https://example.com"),
+            self.id_token(exp=int(time.time()) - 60),
+            "not-a-token",
+        ]
+        for token in tokens:
+            with self.subTest(token=token), self.assertRaises(InvalidGoogleToken):
+                verify_google_id_token(token, self.client_id)
+
+    def test_google_login(self):
+        # The cached app outlives the test transaction
+        self.addCleanup(clear_social_apps)
+        SocialApp.objects.create(
+            provider="google", name="Google", client_id=self.client_id
+        )
+
+        response = self.client.post(
+            "/api/v1/auth/google-login",
+            {"token": self.id_token(), "issue_tokens": True},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn("access_token", response.json())
+        self.assertTrue(User.objects.filter(email="google@example.com").exists())
+
+        response = self.client.post(
+            "/api/v1/auth/google-login",
+            {"token": self.id_token(aud="other-client")},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(
+    AUTH_RATE_LIMIT_PER_IP=4, AUTH_RATE_LIMIT_PER_EMAIL=2, AUTH_RATE_LIMIT_PERIOD=60
+)
+class AuthRateLimitTests(TestCase):
+    def setUp(self):
+        caches["ratelimit"].clear()
+        local_buckets.clear()
+        self.addCleanup(local_buckets.clear)
+
+    def login(self, email="user@example.com", ip="10.0.0.1"):
+        return self.client.post(
+            "/api/v1/auth/login",
+            {"email": email, "password": "wrong"},
+            content_type="application/json",
+            REMOTE_ADDR=ip,
+        )
+
+    def get_checks(self, key, result):
+        return (
+            REGISTRY.get_sample_value(
+                "rate_limit_checks_total",
+                {"scope": "login", "key": key, "result": result},
+            )
+            or 0
+        )
+
+    def test_limited_per_email_before_hashing(self):
+        limited_before = self.get_checks("email", "limited")
+        with mock.patch(
+            "ruchky_backend.auth.api.aauthenticate", return_value=None
+        ) as authenticate:
+            statuses = [self.login(ip=f"10.0.0.{i}").status_code for i in range(3)]
+
+        self.assertEqual(statuses, [401, 401, 429])
+        self.assertEqual(authenticate.call_count, 2)
+        self.assertEqual(self.get_checks("email", "limited") - limited_before, 1)
+
+    def test_limited_per_ip(self):
+        statuses = [self.login(email=f"{i}@example.com").status_code for i in range(5)]
+        self.assertEqual(statuses, [401, 401, 401, 401, 429])
+
+        response = self.login(email="other@example.com")
+        self.assertEqual(response.status_code, 429)
+        # One IP token refills every 15 seconds
+        self.assertIn(int(response["Retry-After"]), range(1, 16))
+        self.assertEqual(
+            self.login(email="other@example.com", ip="10.0.0.2").status_code, 401
+        )
+
+    def test_tokens_refill(self):
+        now = time.time()
+        with mock.patch("ruchky_backend.auth.ratelimit.time.time") as clock:
+            clock.return_value = now
+            self.login()
+            self.login()
+            self.assertEqual(self.login().status_code, 429)
+
+            # One email token refills every 30 seconds
+            clock.return_value = now + 30
+            self.assertEqual(self.login().status_code, 401)
+            self.assertEqual(self.login().status_code, 429)
+
+    def test_local_fallback(self):
+        with mock.patch.object(
+            caches["ratelimit"], "get", side_effect=ConnectionError("down")
+        ):
+            statuses = [self.login().status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [401, 401, 429])
+
+
+class PasswordHashingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password"
+        )
+        EmailAddress.objects.create(
+            user=cls.user, email=cls.user.email, verified=True, primary=True
+        )
+
+    def setUp(self):
+        caches["ratelimit"].clear()
+
+    def get_sample(self, name):
+        return REGISTRY.get_sample_value(name) or 0
+
+    def test_login_hashes_in_pool(self):
+        queued_before = self.get_sample("password_hashing_queue_seconds_count")
+        response = self.client.post(
+            "/api/v1/auth/login",
+            {"email": "USER@example.com", "password": "password"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn("sessionid", self.client.cookies)
+        self.assertEqual(
+            self.get_sample("password_hashing_queue_seconds_count") - queued_before, 1
+        )
+
+    def test_unknown_email_is_hashed_too(self):
+        queued_before = self.get_sample("password_hashing_queue_seconds_count")
+        response = self.client.post(
+            "/api/v1/auth/login",
+            {"email": "nobody@example.com", "password": "password"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            self.get_sample("password_hashing_queue_seconds_count") - queued_before, 1
+        )
+
+    def test_failed_login_signal_matches_authenticate(self):
+        failures = []
+
+        def receiver(sender, credentials, **kwargs):
+            failures.append((sender, credentials))
+
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+        self.client.post(
+            "/api/v1/auth/login",
+            {"email": "user@example.com", "password": "wrong"},
+            content_type="application/json",
+        )
+        authenticate(email="user@example.com", password="wrong")
+
+        self.assertEqual(len(failures), 2)
+        self.assertEqual(failures[0], failures[1])
+        self.assertEqual(failures[0][0], "django.contrib.auth")
+
+    def test_register_hashes_in_pool(self):
+        response = self.client.post(
+            "/api/v1/auth/register",
+            {"email": "new@example.com", "password": "Secret-password-1"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        user = User.objects.get(email="new@example.com")
+        self.assertTrue(user.check_password("Secret-password-1"))
+
+    async def test_async_login_runs_on_event_loop(self):
+        # Any sync-only middleware puts the view behind an adapter
+        handler = ASGIHandler()._middleware_chain
+        while handler is not None:
+            self.assertNotIsInstance(handler, (AsyncToSync, SyncToAsync))
+            handler = getattr(
+                handler, "__wrapped__", getattr(handler, "get_response", None)
+            )
+
+        loops = []
+        original = passwords.aauthenticate
+
+        async def aauthenticate(*args, **kwargs):
+            loops.append(asyncio.get_running_loop())
+            return await original(*args, **kwargs)
+
+        with mock.patch("ruchky_backend.auth.api.aauthenticate", aauthenticate):
+            response = await AsyncClient().post(
+                "/api/v1/auth/login",
+                {"email": "user@example.com", "password": "password"},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(loops, [asyncio.get_running_loop()])
+
+    @override_settings(PASSWORD_HASHING_MAX_PENDING=0)
+    def test_saturated_pool_fails_fast(self):
+        rejected_before = self.get_sample("password_hashing_rejected_total")
+        for path in ["/api/v1/auth/login", "/api/v1/auth/register"]:
+            response = self.client.post(
+                path,
+                {"email": "user@example.com", "password": "Secret-password-1"},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 503, path)
+
+        self.assertEqual(
+            self.get_sample("password_hashing_rejected_total") - rejected_before, 2
+        )
+
+    @override_settings(PASSWORD_HASHING_MAX_PENDING=2)
+    def test_pending_calls_are_bounded(self):
+        async def run_all():
+            return await asyncio.gather(
+                *(password_hashing.run(time.sleep, 0.05) for _ in range(4)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run_all())
+
+        self.assertEqual(results.count(None), 2)
+        self.assertEqual(
+            sum(isinstance(result, PasswordHashingBusy) for result in results), 2
+        )
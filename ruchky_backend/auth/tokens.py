@@ -0,0 +1,194 @@
+import hashlib
+import secrets
+import threading
+import time
+import uuid
+
+from datetime import timedelta
+from typing import Dict, Optional, Set, Tuple, Union
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from ruchky_backend.auth.models import RefreshToken
+from ruchky_backend.users.cache import get_cached_user_by_id
+from ruchky_backend.users.models import User
+
+ACCESS_TOKEN_SALT = "ruchky_backend.auth.access_token"
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RevocationList:
+    """
+    Families of refresh tokens revoked within the access token lifetime.
+    Reloaded per process every TOKEN_REVOCATION_CHECK_INTERVAL seconds, so
+    verifying an access token makes no query. Families revoked by another
+    worker are only seen after the next reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = float("-inf")
+        self._families: Set[str] = set()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._loaded_at = float("-inf")
+            self._families = set()
+
+    def add(self, family: Union[str, uuid.UUID]) -> None:
+        self._families.add(str(family))
+
+    def is_revoked(self, family: str) -> bool:
+        self._reload()
+        return family in self._families
+
+    def _reload(self) -> None:
+        if (
+            time.monotonic() - self._loaded_at
+            < settings.TOKEN_REVOCATION_CHECK_INTERVAL
+        ):
+            return
+
+        # Only one thread reloads, the others keep using the previous list,
+        # unless it was never loaded
+        if not self._lock.acquire(blocking=self._loaded_at == float("-inf")):
+            return
+        try:
+            cutoff = timezone.now() - timedelta(seconds=settings.ACCESS_TOKEN_LIFETIME)
+            self._families = {
+                str(family)
+                for family in RefreshToken.objects.filter(revoked_at__gte=cutoff)
+                .values_list("family", flat=True)
+                .distinct()
+            }
+            self._loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+
+revocation_list = RevocationList()
+
+
+def create_access_token(user: User, family: Union[str, uuid.UUID]) -> str:
+    """
+    Returns a token signed with SECRET_KEY. It is bound to the session auth
+    hash, so changing the password invalidates it like a session.
+    """
+    return signing.dumps(
+        {
+            "uid": str(user.pk),
+            "fam": str(family),
+            "hash": user.get_session_auth_hash(),
+        },
+        salt=ACCESS_TOKEN_SALT,
+    )
+
+
+def verify_access_token(token: str) -> User:
+    """
+    Returns the user of a valid access token
+
+    Revocations and deactivations handled by other workers are seen after
+    at most TOKEN_REVOCATION_CHECK_INTERVAL and USER_CACHE_TIMEOUT seconds.
+
+    :raises InvalidToken: if the token is malformed, expired or revoked
+    """
+    try:
+        payload = signing.loads(
+            token, salt=ACCESS_TOKEN_SALT, max_age=settings.ACCESS_TOKEN_LIFETIME
+        )
+    except signing.BadSignature:
+        raise InvalidToken("Invalid or expired access token")
+
+    if revocation_list.is_revoked(payload["fam"]):
+        raise InvalidToken("Access token was revoked")
+
+    user = get_cached_user_by_id(payload["uid"], payload["hash"])
+    if user is None:
+        raise InvalidToken("User is inactive or changed password")
+    return user
+
+
+def create_refresh_token(
+    user: User, family: Optional[uuid.UUID] = None
+) -> Tuple[str, RefreshToken]:
+    token = secrets.token_urlsafe(32)
+    refresh_token = RefreshToken.objects.create(
+        user=user,
+        family=family or uuid.uuid4(),
+        token_hash=hash_token(token),
+        expires_at=timezone.now() + timedelta(seconds=settings.REFRESH_TOKEN_LIFETIME),
+    )
+    return token, refresh_token
+
+
+def issue_tokens(user: User, family: Optional[uuid.UUID] = None) -> Dict:
+    """Returns a new access and refresh token pair for the user"""
+    token, refresh_token = create_refresh_token(user, family)
+    return {
+        "access_token": create_access_token(user, refresh_token.family),
+        "refresh_token": token,
+        "token_type": "Bearer",
+        "expires_in": settings.ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def rotate_refresh_token(token: str) -> Dict:
+    """
+    Exchanges a refresh token for a new token pair. A token can be used
+    once: reusing it revokes its whole family, as it was likely stolen.
+
+    :raises InvalidToken: if the token is unknown, expired or revoked
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        refresh_token = (
+            RefreshToken.objects.select_for_update()
+            .select_related("user")
+            .filter(token_hash=hash_token(token))
+            .first()
+        )
+        if refresh_token is None or refresh_token.revoked_at:
+            raise InvalidToken("Invalid refresh token")
+
+        if not refresh_token.rotated_at:
+            if refresh_token.expires_at <= now or not refresh_token.user.is_active:
+                raise InvalidToken("Refresh token expired")
+
+            refresh_token.rotated_at = now
+            refresh_token.save(update_fields=["rotated_at", "updated_at"])
+            return issue_tokens(refresh_token.user, refresh_token.family)
+
+    # Outside of the transaction, which the error would roll back
+    revoke_family(refresh_token.family)
+    raise InvalidToken("Refresh token was already used")
+
+
+def revoke_refresh_token(token: str) -> bool:
+    """Revokes the family of the token, returns False for unknown tokens"""
+    family = (
+        RefreshToken.objects.filter(token_hash=hash_token(token))
+        .values_list("family", flat=True)
+        .first()
+    )
+    if family is None:
+        return False
+    revoke_family(family)
+    return True
+
+
+def revoke_family(family: uuid.UUID) -> None:
+    RefreshToken.objects.filter(family=family, revoked_at__isnull=True).update(
+        revoked_at=timezone.now()
+    )
+    revocation_list.add(family)
@@ -0,0 +1,21 @@
+from allauth.account.adapter import DefaultAccountAdapter
+from allauth.core import context as allauth_context
+from django.contrib.sites.shortcuts import get_current_site
+
+from ruchky_backend.emails.outbox import enqueue_email
+
+
+class AccountAdapter(DefaultAccountAdapter):
+    def send_mail(self, template_prefix: str, email: str, context: dict) -> None:
+        """
+        Queues the email in the outbox instead of sending it during the
+        request, see the send_outbox command
+        """
+        site = get_current_site(allauth_context.request)
+        ctx = {
+            "email": email,
+            # A RequestSite without the sites framework, which isn't a model
+            "current_site": {"name": site.name, "domain": site.domain},
+        }
+        ctx.update(context)
+        enqueue_email(template_prefix, email, ctx)
@@ -0,0 +1,43 @@
+from django.contrib import admin
+from unfold.admin import ModelAdmin
+
+from ruchky_backend.emails.models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(ModelAdmin):
+    """
+    Read-only admin for the email outbox. Dead emails can't be retried,
+    their context is cleared; users request a new link instead.
+    """
+
+    list_display = (
+        "template_prefix",
+        "to",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+        "created_at",
+    )
+    list_filter = ("status", "template_prefix")
+    search_fields = ("to",)
+    readonly_fields = (
+        "template_prefix",
+        "to",
+        "context",
+        "locale",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+        "last_error",
+        "created_at",
+        "updated_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,190 @@
+import smtplib
+import time
+
+from datetime import timedelta
+from typing import Any, Tuple
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import TemplateDoesNotExist
+from django.utils import timezone
+
+from ruchky_backend.emails.models import OutboxEmail, OutboxStatus
+from ruchky_backend.emails.outbox import EmailRenderer
+
+# The server dropped the session (e.g. after it was idle), not the email
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends pending outbox emails in batches, over one email backend "
+        "(SMTP) connection while there are emails to send. Failed emails are retried with exponential "
+        "backoff and marked dead after --max-attempts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of emails locked and sent per transaction (default: 100)",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Number of attempts before an email is marked dead (default: 5)",
+        )
+        parser.add_argument(
+            "--retry-delay",
+            type=int,
+            default=60,
+            help="Seconds before the first retry, doubled after every failed "
+            "attempt (default: 60)",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting once it is drained",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds between polls with --watch (default: 5)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.batch_size = options["batch_size"]
+        self.max_attempts = options["max_attempts"]
+        self.retry_delay = options["retry_delay"]
+        self.renderer = EmailRenderer()
+        start_time = time.time()
+
+        sent = failed = 0
+        # One connection while the outbox has emails, opened by send_batch
+        connection = get_connection()
+        try:
+            while True:
+                claimed, batch_sent, batch_failed = self.send_batch(connection)
+                sent += batch_sent
+                failed += batch_failed
+                if claimed:
+                    self.stdout.write(f"Sent {sent} emails, {failed} failed so far...")
+
+                if claimed < self.batch_size:
+                    # Servers drop idle sessions, it is reopened for the next email
+                    connection.close()
+                    if not options["watch"]:
+                        break
+                    time.sleep(options["interval"])
+        finally:
+            connection.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {sent} emails, {failed} failed "
+                f"in {time.time() - start_time:.2f} seconds"
+            )
+        )
+
+    @transaction.atomic
+    def send_batch(self, connection) -> Tuple[int, int, int]:
+        """
+        Locks and sends one batch, other senders skip the locked emails.
+        Emails are sent at least once: if the transaction fails after
+        sending, they are sent again.
+
+        Returns the number of emails claimed, sent and failed
+        """
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxStatus.PENDING, next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at")[: self.batch_size]
+        )
+
+        if emails:
+            self.open(connection)
+
+        sent = failed = 0
+        for email in emails:
+            email.attempts += 1
+            try:
+                message = self.renderer.render(email)
+            except (TemplateDoesNotExist, ObjectDoesNotExist) as e:
+                # Retrying won't help
+                self.fail(email, e, dead=True)
+                failed += 1
+                continue
+
+            try:
+                self.send(connection, message)
+            except Exception as e:
+                self.fail(email, e, dead=email.attempts >= self.max_attempts)
+                failed += 1
+                self.reconnect(connection)
+                continue
+
+            email.status = OutboxStatus.SENT
+            email.sent_at = timezone.now()
+            email.last_error = ""
+            # Activation and password reset links aren't kept once sent
+            email.context = {}
+            sent += 1
+
+        OutboxEmail.objects.bulk_update(
+            emails,
+            [
+                "status",
+                "context",
+                "attempts",
+                "next_attempt_at",
+                "sent_at",
+                "last_error",
+                "updated_at",
+            ],
+        )
+        return len(emails), sent, failed
+
+    def fail(self, email: OutboxEmail, error: Exception, dead: bool) -> None:
+        email.last_error = f"{type(error).__name__}: {error}"
+        email.updated_at = timezone.now()
+        if dead:
+            email.status = OutboxStatus.DEAD
+            email.context = {}
+        else:
+            delay = self.retry_delay * 2 ** (email.attempts - 1)
+            email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.stderr.write(
+            self.style.WARNING(f"Could not send {email}: {email.last_error}")
+        )
+
+    def send(self, connection, message) -> None:
+        """
+        Sends the message, retried once on a new connection if the server
+        dropped the session, which doesn't count as an attempt
+        """
+        try:
+            connection.send_messages([message])
+        except CONNECTION_ERRORS as e:
+            self.stderr.write(self.style.WARNING(f"Connection lost: {e}"))
+            self.reconnect(connection)
+            connection.send_messages([message])
+
+    def open(self, connection) -> None:
+        try:
+            connection.open()
+        except Exception as e:
+            # Sending opens it again and fails the email
+            self.stderr.write(self.style.WARNING(f"Could not connect: {e}"))
+
+    def reconnect(self, connection) -> None:
+        # The connection may be broken after an error
+        try:
+            connection.close()
+            connection.open()
+        except Exception as e:
+            self.stderr.write(self.style.WARNING(f"Could not reconnect: {e}"))
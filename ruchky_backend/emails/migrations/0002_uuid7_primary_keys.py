@@ -0,0 +1,24 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:32
+
+import ruchky_backend.helpers.db.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("emails", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="outboxemail",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
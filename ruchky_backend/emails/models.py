@@ -0,0 +1,54 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from ruchky_backend.helpers.db.models import DateTimeMixin, UUIDMixin
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = "pending", _("Pending")
+    SENT = "sent", _("Sent")
+    DEAD = "dead", _("Dead")
+
+
+class OutboxEmail(UUIDMixin, DateTimeMixin):
+    """
+    A transactional email queued during a request and sent by the
+    send_outbox command. Emails that keep failing are marked dead.
+
+    The context holds activation and password reset links, so it is cleared
+    once the email is sent or dead.
+    """
+
+    template_prefix = models.CharField(_("Template Prefix"), max_length=255)
+    to = models.EmailField(_("To"))
+    # Values are JSON or model references, see outbox.serialize_context
+    context = models.JSONField(_("Context"), default=dict)
+    locale = models.CharField(_("Locale"), max_length=16)
+
+    status = models.CharField(
+        _("Status"),
+        max_length=10,
+        choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    next_attempt_at = models.DateTimeField(_("Next Attempt At"), default=timezone.now)
+    sent_at = models.DateTimeField(_("Sent At"), blank=True, null=True)
+    last_error = models.TextField(_("Last Error"), blank=True)
+
+    class Meta:
+        verbose_name = _("Outbox Email")
+        verbose_name_plural = _("Outbox Emails")
+        ordering = ("-created_at",)
+        indexes = [
+            # Only pending emails are polled, sent ones don't grow the index
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="emails_outbox_pending_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.template_prefix} to {self.to}"
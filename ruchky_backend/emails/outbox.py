@@ -0,0 +1,122 @@
+from typing import Any, Dict, Optional
+
+from allauth.account import app_settings as account_settings
+from allauth.account.adapter import get_adapter
+from django.apps import apps
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import models
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import Template
+from django.template.loader import get_template
+from django.utils import translation
+
+from ruchky_backend.emails.models import OutboxEmail
+
+# Marks a serialized model instance in the context
+MODEL_KEY = "__model__"
+
+
+def serialize_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Makes a template context storable as JSON. Model instances are stored
+    as references and loaded again when rendering, values that are neither
+    (e.g. the request) are dropped.
+    """
+    serialized = {}
+    for key, value in context.items():
+        if isinstance(value, models.Model):
+            serialized[key] = {MODEL_KEY: value._meta.label_lower, "pk": str(value.pk)}
+        elif value is None or isinstance(value, (str, int, float, bool, list, dict)):
+            serialized[key] = value
+    return serialized
+
+
+def deserialize_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    :raises ObjectDoesNotExist: if a referenced instance was deleted
+    """
+    deserialized = {}
+    for key, value in context.items():
+        if isinstance(value, dict) and MODEL_KEY in value:
+            model = apps.get_model(value[MODEL_KEY])
+            value = model._default_manager.get(pk=value["pk"])
+        deserialized[key] = value
+    return deserialized
+
+
+def enqueue_email(
+    template_prefix: str, to: str, context: Dict[str, Any]
+) -> OutboxEmail:
+    """Stores an email in the outbox, it's rendered and sent by send_outbox"""
+    return OutboxEmail.objects.create(
+        template_prefix=template_prefix,
+        to=to,
+        context=serialize_context(context),
+        locale=translation.get_language() or settings.LANGUAGE_CODE,
+    )
+
+
+class EmailRenderer:
+    """
+    Renders outbox emails like allauth's adapter.render_mail. Templates are
+    loaded and compiled once for the lifetime of the renderer and rendered
+    with the locale of each email activated.
+    """
+
+    def __init__(self):
+        self.adapter = get_adapter()
+        self._templates: Dict[str, Optional[Template]] = {}
+
+    def get_template(self, name: str) -> Optional[Template]:
+        """Returns the template, or None if it does not exist"""
+        if name not in self._templates:
+            try:
+                self._templates[name] = get_template(name)
+            except TemplateDoesNotExist:
+                self._templates[name] = None
+        return self._templates[name]
+
+    def render(self, email: OutboxEmail) -> EmailMultiAlternatives:
+        """
+        :raises TemplateDoesNotExist: if there is no subject or body template
+        :raises ObjectDoesNotExist: if a referenced instance was deleted
+        """
+        context = deserialize_context(email.context)
+
+        prefix = email.template_prefix
+        subject_template = self.get_template(f"{prefix}_subject.txt")
+        text_template = self.get_template(f"{prefix}_message.txt")
+        html_template = self.get_template(
+            f"{prefix}_message.{account_settings.TEMPLATE_EXTENSION}"
+        )
+        if subject_template is None:
+            raise TemplateDoesNotExist(f"{prefix}_subject.txt")
+        if text_template is None and html_template is None:
+            # We need at least one body
+            raise TemplateDoesNotExist(f"{prefix}_message.txt")
+
+        with translation.override(email.locale):
+            subject = subject_template.render(context)
+            # Remove superfluous line breaks
+            subject = " ".join(subject.splitlines()).strip()
+            bodies = {
+                content_type: template.render(context).strip()
+                for content_type, template in [
+                    ("text/plain", text_template),
+                    ("text/html", html_template),
+                ]
+                if template is not None
+            }
+
+        message = EmailMultiAlternatives(
+            self.adapter.format_email_subject(subject),
+            bodies.get("text/plain", bodies.get("text/html")),
+            self.adapter.get_from_email(),
+            [email.to],
+        )
+        if "text/plain" not in bodies:
+            message.content_subtype = "html"
+        elif "text/html" in bodies:
+            message.attach_alternative(bodies["text/html"], "text/html")
+        return message
@@ -0,0 +1,149 @@
+import os
+import smtplib
+import tempfile
+
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ruchky_backend.emails.models import OutboxEmail, OutboxStatus
+from ruchky_backend.emails.outbox import enqueue_email
+from ruchky_backend.users.models import User
+
+
+class SendOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password"
+        )
+
+    def enqueue(self, to="user@example.com", template_prefix=None):
+        return enqueue_email(
+            template_prefix or "account/email/email_confirmation",
+            to,
+            {
+                "user": self.user,
+                "activate_url": "https://example.com/confirm/key",
+                "current_site": {"name": "Na.Ruchky", "domain": "api.example.com"},
+            },
+        )
+
+    def send_outbox(self, *args):
+        call_command("send_outbox", *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_register_queues_confirmation(self):
+        response = self.client.post(
+            "/api/v1/auth/register",
+            {"email": "new@example.com", "password": "Secret-password-1"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get(to="new@example.com")
+        self.assertEqual(email.template_prefix, "account/email/email_confirmation")
+
+        self.send_outbox()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(mail.outbox[0].subject.startswith("Na.Ruchky | "))
+        self.assertIn("new@example.com", mail.outbox[0].body)
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxStatus.SENT)
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(email.context, {})
+
+    def test_batches_share_one_connection(self):
+        for i in range(5):
+            self.enqueue(to=f"user-{i}@example.com")
+
+        with mock.patch(
+            "ruchky_backend.emails.management.commands.send_outbox.get_connection",
+            wraps=mail.get_connection,
+        ) as get_connection:
+            self.send_outbox("--batch-size", "2")
+
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn("example.com/confirm/key", mail.outbox[0].body)
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxStatus.SENT).exists())
+
+    def test_failures_are_retried_then_dead(self):
+        email = self.enqueue()
+
+        with mock.patch(
+            "django.core.mail.backends.locmem.EmailBackend.send_messages",
+            side_effect=smtplib.SMTPServerDisconnected("gone"),
+        ):
+            self.send_outbox("--max-attempts", "2")
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutboxStatus.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertIn("SMTPServerDisconnected", email.last_error)
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            self.send_outbox("--max-attempts", "2")
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxStatus.DEAD)
+        self.assertEqual(email.attempts, 2)
+        self.assertEqual(email.context, {})
+
+    def test_dropped_connection_is_not_an_attempt(self):
+        for i in range(2):
+            self.enqueue(to=f"user-{i}@example.com")
+        send_messages = locmem.EmailBackend.send_messages
+        calls = []
+
+        def drop_between_batches(backend, messages):
+            calls.append(messages)
+            # The server dropped the session after the first batch
+            if len(calls) == 2:
+                raise smtplib.SMTPServerDisconnected("idle")
+            return send_messages(backend, messages)
+
+        with (
+            mock.patch.object(
+                locmem.EmailBackend, "send_messages", drop_between_batches
+            ),
+            mock.patch.object(locmem.EmailBackend, "close", autospec=True) as close,
+        ):
+            self.send_outbox("--batch-size", "1")
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            set(OutboxEmail.objects.values_list("status", "attempts")),
+            {(OutboxStatus.SENT, 1)},
+        )
+        # Closed when the outbox is drained, instead of idling open
+        close.assert_called()
+
+    def test_missing_template_is_dead(self):
+        email = self.enqueue(template_prefix="account/email/missing")
+
+        self.send_outbox()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxStatus.DEAD)
+        self.assertEqual(mail.outbox, [])
+
+    def test_file_backend(self):
+        self.enqueue()
+
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(
+                EMAIL_BACKEND="django.core.mail.backends.filebased.EmailBackend",
+                EMAIL_FILE_PATH=directory,
+            ):
+                self.send_outbox()
+
+            (name,) = os.listdir(directory)
+            with open(os.path.join(directory, name)) as f:
+                self.assertIn("To: user@example.com", f.read())
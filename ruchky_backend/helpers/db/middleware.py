@@ -0,0 +1,67 @@
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest
+
+from ruchky_backend.helpers.db.routers import use_replica
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def is_pinned_to_primary(request: HttpRequest) -> bool:
+    return settings.REPLICA_PIN_COOKIE_NAME in request.COOKIES
+
+
+def read_from_replica(view):
+    """
+    Serves safe requests from the replica, unless the client wrote
+    recently and is pinned to the primary.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        if request.method not in SAFE_METHODS or is_pinned_to_primary(request):
+            return view(request, *args, **kwargs)
+        with use_replica():
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """
+    Pins clients to the primary for REPLICA_PIN_SECONDS after a write, so
+    they read their own writes while the replica catches up. Async capable,
+    so async views run on the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request: HttpRequest, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE_NAME,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return response
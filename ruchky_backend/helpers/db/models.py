@@ -1,11 +1,16 @@
 import os
 import re
-from uuid import uuid4
+import threading
+import time
+from typing import List, Tuple, Type
+from uuid import UUID
 
+from django.apps import apps
 from django.db import models
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from ruchky_backend.helpers.storage.paths import ORIGINAL_RENDITION
+
 
 def slugify_camelcase(string: str, sep: str = "-") -> str:
     """
@@ -32,18 +37,67 @@ def generate_filename(instance: models.Model, filename: str) -> str:
     :param filename: filename
     :return: generated filename
 
-    Filename consist of slugified model name, current datetime and time
-    and uuid
+    Filename consist of slugified model name and the original rendition
+    name. The storage replaces it with a content addressed name on save,
+    e.g. 'pet_image/a1/b2/a1b2..._original.jpg'
     """
     f, ext = os.path.splitext(filename)
     model_name = slugify_camelcase(instance._meta.model.__name__, "_")
-    strftime = timezone.datetime.now()
-    hex_ = uuid4().hex
-    return f"{model_name}/{hex_}_{strftime}{ext}"
+    return f"{model_name}/{ORIGINAL_RENDITION}{ext.lower()}"
+
+
+def get_media_fields() -> List[Tuple[Type[models.Model], models.FileField]]:
+    """
+    Returns (model, field) pairs for every file field of the project models
+    """
+    return [
+        (model, field)
+        for model in apps.get_models()
+        if model.__module__.startswith("ruchky_backend.")
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+    ]
+
+
+_uuid7_lock = threading.Lock()
+# Unix time in milliseconds and random bits of the last generated UUID
+_uuid7_last = [0, 0]
+
+
+def uuid7() -> UUID:
+    """
+    Generates a time ordered UUID (RFC 9562 version 7)
+
+    :return: UUID starting with a 48 bit millisecond timestamp
+
+    Ids of new rows are larger than the existing ones, so inserts append to
+    the right of the primary key index instead of splitting random pages.
+    Within the same millisecond the random bits are incremented, ids of a
+    process never go backwards. Python has uuid.uuid7 only from 3.14.
+    """
+    with _uuid7_lock:
+        timestamp = time.time_ns() // 1_000_000
+        if timestamp > _uuid7_last[0]:
+            # 73 of the 74 random bits, leaving room for increments
+            rand = int.from_bytes(os.urandom(10)) >> 7
+        else:
+            timestamp, rand = _uuid7_last[0], _uuid7_last[1] + 1
+            if rand >> 74:
+                timestamp, rand = timestamp + 1, int.from_bytes(os.urandom(10)) >> 7
+        _uuid7_last[:] = timestamp, rand
+
+    return UUID(
+        int=timestamp << 80
+        | 0x7 << 76
+        | (rand >> 62) << 64
+        | 0b10 << 62
+        | (rand & (1 << 62) - 1)
+    )
 
 
 class UUIDMixin(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    # Existing uuid4 ids stay valid, only new rows get time ordered ones
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
 
     class Meta:
         abstract = True
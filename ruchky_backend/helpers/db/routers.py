@@ -0,0 +1,115 @@
+import threading
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from ruchky_backend.helpers.logger import logger
+
+REPLICA_ALIAS = "replica"
+
+# Seconds of replay lag, 0 when the replica is caught up or is the primary
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+    )
+END
+"""
+
+_read_from_replica: ContextVar[bool] = ContextVar("read_from_replica", default=False)
+
+
+class ReplicaLagProbe:
+    """
+    Caches the replica lag per process, so only one query is made every
+    REPLICA_LAG_CHECK_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._lag: Optional[float] = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._checked_at = float("-inf")
+            self._lag = None
+
+    def get_lag(self) -> Optional[float]:
+        """Returns the replica lag in seconds, None if it is unreachable"""
+        if time.monotonic() - self._checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return self._lag
+
+        # Only one thread probes, the others keep using the previous value
+        if not self._lock.acquire(blocking=False):
+            return self._lag
+        try:
+            try:
+                replica = connections[REPLICA_ALIAS]
+                replica.ensure_connection()
+                # A raw cursor keeps the probe out of query counts and budgets
+                with (
+                    replica.wrap_database_errors,
+                    replica.connection.cursor() as cursor,
+                ):
+                    cursor.execute(REPLICA_LAG_SQL)
+                    self._lag = float(cursor.fetchone()[0])
+            except DatabaseError as e:
+                logger.warning(f"Replica is unreachable, reading from primary: {e}")
+                self._lag = None
+            self._checked_at = time.monotonic()
+            return self._lag
+        finally:
+            self._lock.release()
+
+    def is_healthy(self) -> bool:
+        lag = self.get_lag()
+        return lag is not None and lag <= settings.REPLICA_MAX_LAG
+
+
+replica_lag_probe = ReplicaLagProbe()
+
+
+@contextmanager
+def use_replica():
+    """
+    Routes reads made inside the block to the replica, as long as it is
+    reachable and its lag is below REPLICA_MAX_LAG.
+    """
+    token = _read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to the replica inside use_replica() blocks and everything
+    else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _read_from_replica.get() or REPLICA_ALIAS not in settings.DATABASES:
+            return None
+        if connections["default"].in_atomic_block:
+            # Reads inside a transaction must see its own writes
+            return None
+        return REPLICA_ALIAS if replica_lag_probe.is_healthy() else None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
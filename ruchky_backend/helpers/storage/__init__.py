@@ -1,10 +1,36 @@
+import os
+
+from datetime import datetime, timezone
 from django.conf import settings
+from django.core.files import File
 from django.core.files.storage import FileSystemStorage
+from google.api_core.exceptions import NotFound
 from storages.backends.gcloud import GoogleCloudStorage
-from functools import lru_cache
-from typing import Union
+from storages.utils import clean_name
+from functools import lru_cache, wraps
+from itertools import batched
+from typing import Iterable, Iterator, List, NamedTuple, Union
 
 from ruchky_backend.helpers.logger import logger
+from ruchky_backend.helpers.storage.cache import CachedStorage
+from ruchky_backend.helpers.storage.paths import (
+    IMMUTABLE_CACHE_CONTROL,
+    address_name,
+    is_content_addressed,
+)
+from ruchky_backend.monitoring.metrics import STORAGE_LATENCY
+from ruchky_backend.monitoring.timing import timed
+
+# Backend methods that may reach the bucket, timed per request
+TIMED_METHODS = {"open", "exists", "delete", "size", "url", "listdir"}
+
+
+class StoredObject(NamedTuple):
+    name: str
+    modified: datetime
+    # Changes whenever the object is touched (GCS metageneration, or the
+    # modification time in nanoseconds on the filesystem)
+    version: int
 
 
 class MediaRootGoogleCloudStorage(GoogleCloudStorage):
@@ -13,6 +39,66 @@ class MediaRootGoogleCloudStorage(GoogleCloudStorage):
     location = "media"
     file_overwrite = False
 
+    def get_object_parameters(self, name):
+        """Media objects are content addressed, so they can be cached forever."""
+        object_parameters = super().get_object_parameters(name)
+        object_parameters.setdefault("cache_control", IMMUTABLE_CACHE_CONTROL)
+        return object_parameters
+
+    def iter_object_pages(self, page_size: int = 1000) -> Iterator[List[StoredObject]]:
+        """Yields pages of all media objects"""
+        prefix = f"{self.location}/" if self.location else ""
+        blobs = self.bucket.list_blobs(
+            prefix=prefix,
+            page_size=page_size,
+            fields="items(name,updated,metageneration),nextPageToken",
+        )
+        for page in blobs.pages:
+            yield [
+                StoredObject(
+                    blob.name[len(prefix) :], blob.updated, blob.metageneration
+                )
+                for blob in page
+            ]
+
+    def touch(self, name: str) -> None:
+        """Updates the object metadata, which refreshes its modification time"""
+        blob = self.bucket.blob(self._normalize_name(clean_name(name)))
+        blob.metadata = {"touched_at": datetime.now(timezone.utc).isoformat()}
+        try:
+            blob.patch()
+        except NotFound:
+            raise FileNotFoundError(name)
+
+    def delete_many(self, objects: Iterable[StoredObject]) -> None:
+        """
+        Deletes objects using batch requests (at most 100 per request).
+        Objects touched since they were listed fail the precondition and
+        are kept.
+        """
+        for chunk in batched(objects, 100):
+            with self.client.batch(raise_exception=False):
+                for obj in chunk:
+                    self.bucket.delete_blob(
+                        self._normalize_name(clean_name(obj.name)),
+                        if_metageneration_match=obj.version,
+                    )
+
+
+def iter_filesystem_objects(storage: FileSystemStorage) -> Iterator[StoredObject]:
+    """Yields all files of a filesystem storage"""
+    root = storage.location
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            version = os.stat(path).st_mtime_ns
+            yield StoredObject(
+                os.path.relpath(path, root).replace(os.sep, "/"),
+                datetime.fromtimestamp(version / 10**9, tz=timezone.utc),
+                version,
+            )
+
 
 class StorageProvider:
     """
@@ -21,7 +107,9 @@ class StorageProvider:
     """
 
     _instance = None
-    _storage: Union[FileSystemStorage, MediaRootGoogleCloudStorage] = None
+    _storage: Union[FileSystemStorage, MediaRootGoogleCloudStorage, CachedStorage] = (
+        None
+    )
 
     def __new__(cls):
         if cls._instance is None:
@@ -44,15 +132,111 @@ class StorageProvider:
                 f"Error initializing Google Cloud Storage: {e}. Falling back to FileSystemStorage"
             )
             self._storage = FileSystemStorage()
+            return
+
+        if settings.MEDIA_CACHE_DIR:
+            self._storage = CachedStorage(
+                self._storage,
+                location=settings.MEDIA_CACHE_DIR,
+                max_size=settings.MEDIA_CACHE_MAX_SIZE,
+            )
 
     @property
-    def storage(self) -> Union[FileSystemStorage, MediaRootGoogleCloudStorage]:
+    def storage(
+        self,
+    ) -> Union[FileSystemStorage, MediaRootGoogleCloudStorage, CachedStorage]:
         """Get the configured storage backend."""
         return self._storage
 
+    def save(self, name, content, max_length=None):
+        """
+        Saves the content under a content addressed name.
+
+        Names that are already content addressed (e.g. renditions) are stored
+        as given. Identical content maps to the same object, so an existing
+        object is reused instead of being uploaded again.
+        """
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        with timed("storage"), STORAGE_LATENCY.labels("save").time():
+            if not is_content_addressed(name):
+                name = address_name(name, content)
+                # Touched so the GC doesn't delete an old orphan with the same
+                # content before the new reference is committed
+                if self._storage.exists(name) and self.touch(name):
+                    return name
+
+            return self._storage.save(name, content, max_length=max_length)
+
+    @property
+    def remote(self) -> Union[FileSystemStorage, MediaRootGoogleCloudStorage]:
+        """Get the storage backend behind the local cache (if any)."""
+        if isinstance(self._storage, CachedStorage):
+            return self._storage.backend
+        return self._storage
+
+    def touch(self, name: str) -> bool:
+        """
+        Refreshes the modification time of a stored object.
+
+        Returns False if the object no longer exists in the remote storage.
+        """
+        remote = self.remote
+        try:
+            if isinstance(remote, MediaRootGoogleCloudStorage):
+                remote.touch(name)
+            else:
+                os.utime(remote.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def iter_object_pages(self, page_size: int = 1000) -> Iterator[List[StoredObject]]:
+        """Yields pages of all stored objects."""
+        remote = self.remote
+        if isinstance(remote, MediaRootGoogleCloudStorage):
+            yield from remote.iter_object_pages(page_size)
+            return
+
+        for page in batched(iter_filesystem_objects(remote), page_size):
+            yield list(page)
+
+    def delete_many(self, objects: List[StoredObject]) -> None:
+        """
+        Deletes listed objects in bulk, dropping their locally cached copies.
+        Objects touched since they were listed are kept.
+        """
+        if isinstance(self._storage, CachedStorage):
+            for obj in objects:
+                self._storage.cache.delete(obj.name)
+
+        remote = self.remote
+        if isinstance(remote, MediaRootGoogleCloudStorage):
+            remote.delete_many(objects)
+            return
+
+        for obj in objects:
+            try:
+                if os.stat(remote.path(obj.name)).st_mtime_ns == obj.version:
+                    remote.delete(obj.name)
+            except FileNotFoundError:
+                pass
+
     def __getattr__(self, name):
         """Delegate all unknown attributes to the storage backend."""
-        return getattr(self._storage, name)
+        attr = getattr(self._storage, name)
+        if name not in TIMED_METHODS:
+            return attr
+
+        @wraps(attr)
+        def timed_call(*args, **kwargs):
+            with timed("storage"), STORAGE_LATENCY.labels(name).time():
+                return attr(*args, **kwargs)
+
+        return timed_call
 
 
 @lru_cache(maxsize=None)
@@ -0,0 +1,274 @@
+import fcntl
+import os
+import tempfile
+import threading
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, TextIO
+
+from django.core.files import File
+
+from ruchky_backend.helpers.logger import logger
+from ruchky_backend.helpers.storage.paths import hash_name
+from ruchky_backend.monitoring.metrics import record_cache_lookup
+
+
+class StorageUnavailable(OSError):
+    """Raised when the remote storage can't be reached and nothing is cached."""
+
+
+class DiskLRUCache:
+    """
+    Size bounded LRU of files on local disk keyed by object name.
+
+    Entries are stored under a digest of the key, so any object name is a
+    safe file name. Workers may share one cache directory: recency is kept
+    in the file modification times and the total size in a file updated
+    under an exclusive lock, so together they stay within max_size. Eviction
+    rescans the directory, which also corrects the total for files removed
+    behind the cache's back.
+    """
+
+    # Eviction frees space down to this fraction of max_size, so a full cache
+    # isn't rescanned on every write
+    low_watermark = 0.9
+    # Seconds between recency updates of an entry, spares a write per hit
+    touch_interval = 60
+    # Temporary files older than this were left behind by an interrupted write
+    stale_tmp_age = 3600
+
+    def __init__(self, location: str, max_size: int, name: str = "default"):
+        self.name = name
+        self.location = Path(location)
+        self.max_size = max_size
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.location.mkdir(parents=True, exist_ok=True)
+        with self._locked() as total_file:
+            self._evict(total_file)
+
+    def _path(self, digest: str) -> Path:
+        return self.location / digest[:2] / digest
+
+    @contextmanager
+    def _locked(self) -> Iterator[TextIO]:
+        """Locks the directory, yields the file keeping the total size"""
+        with self._lock, open(self.location / ".size", "a+") as total_file:
+            fcntl.flock(total_file, fcntl.LOCK_EX)
+            try:
+                yield total_file
+            finally:
+                fcntl.flock(total_file, fcntl.LOCK_UN)
+
+    def _set_total(self, total_file: TextIO, total: int) -> None:
+        total_file.seek(0)
+        total_file.truncate()
+        total_file.write(str(total))
+        total_file.flush()
+        self._size = total
+
+    def _add_total(self, total_file: TextIO, delta: int) -> int:
+        total_file.seek(0)
+        total = max(int(total_file.read().strip() or 0) + delta, 0)
+        self._set_total(total_file, total)
+        return total
+
+    def _touch(self, path: Path, modified_ns: int) -> None:
+        """Marks an entry as recently used"""
+        now = time.time_ns()
+        if now - modified_ns < self.touch_interval * 10**9:
+            return
+        try:
+            os.utime(path, ns=(now, now))
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[Path]:
+        """Returns the local path of a cached object and marks it as recently used"""
+        path = self._path(hash_name(key))
+
+        try:
+            modified_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            record_cache_lookup(self.name, hit=False)
+            return None
+
+        record_cache_lookup(self.name, hit=True)
+        self._touch(path, modified_ns)
+        return path
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        Opens a cached object for reading, or returns None on a miss.
+
+        Unlike get(), the returned handle stays readable even if another
+        worker evicts the entry right after the lookup.
+        """
+        path = self._path(hash_name(key))
+
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            record_cache_lookup(self.name, hit=False)
+            return None
+
+        record_cache_lookup(self.name, hit=True)
+        self._touch(path, os.fstat(f.fileno()).st_mtime_ns)
+        return f
+
+    def put(self, key: str, chunks: Iterable[bytes]) -> Path:
+        """Streams the chunks into the cache and returns the local path"""
+        path = self._path(hash_name(key))
+        path.parent.mkdir(exist_ok=True)
+
+        # Write to a temporary file first, so readers never see partial files
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in chunks:
+                    tmp.write(chunk)
+                    size += len(chunk)
+            # Explicit nanosecond time, coarse file system clocks may tie
+            now = time.time_ns()
+            os.utime(tmp_path, ns=(now, now))
+
+            with self._locked() as total_file:
+                try:
+                    replaced = path.stat().st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+                if self._add_total(total_file, size - replaced) > self.max_size:
+                    self._evict(total_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return path
+
+    def delete(self, key: str) -> None:
+        path = self._path(hash_name(key))
+        with self._locked() as total_file:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            self._add_total(total_file, -size)
+
+    @property
+    def size(self) -> int:
+        """Total size of the directory as of this process' last write"""
+        return self._size
+
+    def _evict(self, total_file: TextIO) -> None:
+        """
+        Rescans the directory and removes least recently used entries until
+        the cache fits max_size. Called with the directory locked.
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        for path in self.location.glob("??/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".tmp":
+                # Left behind by an interrupted write
+                if now - stat.st_mtime > self.stale_tmp_age:
+                    path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime_ns, path, stat.st_size))
+            total += stat.st_size
+
+        if total > self.max_size:
+            target = self.max_size * self.low_watermark
+            for _, path, size in sorted(entries):
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+        self._set_total(total_file, total)
+
+
+class CachedStorage:
+    """
+    Read-through local disk cache in front of a remote storage backend.
+
+    Media objects are content addressed and never change, so cached copies
+    are served without revalidation. Reads return real file handles, which
+    can be mmap'ed or passed to sendfile by the server.
+
+    When the backend fails, it is skipped for `retry_after` seconds: cached
+    objects keep being served, misses raise StorageUnavailable immediately
+    instead of waiting on network timeouts.
+    """
+
+    def __init__(self, backend, location: str, max_size: int, retry_after: int = 30):
+        self.backend = backend
+        self.cache = DiskLRUCache(location, max_size, name="media")
+        self.retry_after = retry_after
+        self._unavailable_until = 0.0
+
+    def _call_backend(self, method: str, *args, **kwargs):
+        if time.monotonic() < self._unavailable_until:
+            raise StorageUnavailable(f"Storage backend is unavailable ({method})")
+
+        try:
+            return getattr(self.backend, method)(*args, **kwargs)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            self._unavailable_until = time.monotonic() + self.retry_after
+            logger.warning(
+                f"Storage backend failed on {method}: {e}. "
+                f"Serving from local cache for {self.retry_after}s"
+            )
+            raise StorageUnavailable(str(e)) from e
+
+    def open(self, name: str, mode: str = "rb") -> File:
+        if mode not in ("r", "rb"):
+            return self._call_backend("open", name, mode)
+
+        cached = self.cache.open(name)
+        if cached is None:
+            with self._call_backend("open", name, "rb") as remote:
+                cached = open(self.cache.put(name, remote.chunks()), "rb")
+        return File(cached, name=name)
+
+    def save(self, name: str, content, max_length: Optional[int] = None) -> str:
+        name = self._call_backend("save", name, content, max_length=max_length)
+        try:
+            # Populate on upload, the first read usually follows right away
+            self.cache.put(name, content.chunks())
+        except OSError as e:
+            logger.warning(f"Could not cache {name}: {e}")
+        return name
+
+    def delete(self, name: str) -> None:
+        self.cache.delete(name)
+        self._call_backend("delete", name)
+
+    def exists(self, name: str) -> bool:
+        if self.cache.get(name) is not None:
+            return True
+        return self._call_backend("exists", name)
+
+    def size(self, name: str) -> int:
+        path = self.cache.get(name)
+        if path is not None:
+            return path.stat().st_size
+        return self._call_backend("size", name)
+
+    def __getattr__(self, name):
+        """Delegate all unknown attributes to the storage backend."""
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
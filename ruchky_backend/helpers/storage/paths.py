@@ -0,0 +1,80 @@
+import hashlib
+import os
+import re
+from typing import Optional
+
+ORIGINAL_RENDITION = "original"
+
+# Objects are never rewritten in place, so edge caches can keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 128-bit digest keeps names well under ImageField's default max_length of 100
+DIGEST_SIZE = 16
+
+CONTENT_ADDRESSED_NAME_RE = re.compile(
+    r"^(?:(?P<prefix>.+)/)?"
+    r"(?P<shard>[0-9a-f]{2}/[0-9a-f]{2})/"
+    r"(?P<digest>[0-9a-f]{32})_(?P<rendition>[a-z0-9-]+)(?P<ext>\.[a-z0-9]+)?$"
+)
+
+
+def hash_content(content) -> str:
+    """
+    Returns a hex digest of the file content, reading it in chunks
+
+    :param content: Django File (or file-like object with chunks())
+    :return: hex digest
+    """
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return hasher.hexdigest()
+
+
+def hash_name(name: str) -> str:
+    """Returns a digest for an object name (used for non-addressed originals)"""
+    return hashlib.blake2b(name.encode(), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def content_addressed_name(
+    prefix: str, digest: str, ext: str, rendition: str = ORIGINAL_RENDITION
+) -> str:
+    """
+    Builds an immutable object name from a content digest
+
+    :param prefix: top level directory (usually the slugified model name)
+    :param digest: hex digest of the original content
+    :param ext: file extension including the dot
+    :param rendition: rendition of the original, e.g. 'original' or 'w320-cover'
+    :return: object name
+
+    'pet_image', 'a1b2...', '.jpg' -> 'pet_image/a1/b2/a1b2..._original.jpg'
+    """
+    shard = f"{digest[:2]}/{digest[2:4]}"
+    name = f"{shard}/{digest}_{rendition}{ext.lower()}"
+    return f"{prefix}/{name}" if prefix else name
+
+
+def parse_content_addressed_name(name: str) -> Optional[re.Match]:
+    """Returns the match for a content addressed name or None for legacy names"""
+    return CONTENT_ADDRESSED_NAME_RE.match(name)
+
+
+def is_content_addressed(name: str) -> bool:
+    return parse_content_addressed_name(name) is not None
+
+
+def address_name(name: str, content) -> str:
+    """
+    Converts an upload name into its content addressed form.
+
+    The directory part of the upload name is kept as the prefix and the
+    extension is preserved, everything else is derived from the content.
+    """
+    prefix = os.path.dirname(name)
+    ext = os.path.splitext(name)[1]
+    return content_addressed_name(prefix, hash_content(content), ext)
@@ -0,0 +1,153 @@
+import io
+import os
+import threading
+
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, TypeVar
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+from ruchky_backend.helpers.storage.cache import DiskLRUCache
+from ruchky_backend.helpers.storage.paths import (
+    content_addressed_name,
+    hash_name,
+    parse_content_addressed_name,
+)
+
+T = TypeVar("T")
+
+FITS = ("cover", "contain")
+
+# fmt query value -> (Pillow format, file extension, content type)
+FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+    "png": ("PNG", ".png", "image/png"),
+}
+
+
+class RenditionSpec(NamedTuple):
+    width: int
+    height: Optional[int]
+    fit: str
+    fmt: str
+
+    @property
+    def rendition(self) -> str:
+        """Rendition part of the object name, e.g. 'w35h35-cover'"""
+        height = f"h{self.height}" if self.height else ""
+        return f"w{self.width}{height}-{self.fit}"
+
+    @property
+    def content_type(self) -> str:
+        return FORMATS[self.fmt][2]
+
+
+def parse_spec(
+    width: Optional[str],
+    height: Optional[str],
+    fit: Optional[str],
+    fmt: Optional[str],
+) -> RenditionSpec:
+    """
+    Validates the query parameters against the configured allow-lists
+
+    :raises ValueError: if any of the parameters is not allowed
+    """
+    try:
+        width_value = int(width)
+        height_value = int(height) if height else None
+    except (TypeError, ValueError):
+        raise ValueError("w and h must be integers")
+
+    if width_value not in settings.MEDIA_RESIZE_WIDTHS:
+        raise ValueError(f"w must be one of {settings.MEDIA_RESIZE_WIDTHS}")
+    if height_value is not None and height_value not in settings.MEDIA_RESIZE_HEIGHTS:
+        raise ValueError(f"h must be one of {settings.MEDIA_RESIZE_HEIGHTS}")
+
+    fit = fit or FITS[0]
+    if fit not in FITS:
+        raise ValueError(f"fit must be one of {list(FITS)}")
+
+    fmt = fmt or "webp"
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {list(FORMATS)}")
+
+    return RenditionSpec(width_value, height_value, fit, fmt)
+
+
+def rendition_name(source_name: str, spec: RenditionSpec) -> str:
+    """
+    Returns the object name of a rendition of the source object.
+
+    Renditions of content addressed originals share their digest and shard,
+    so they are listed right after the original. Legacy names are hashed.
+    """
+    match = parse_content_addressed_name(source_name)
+    if match:
+        prefix, digest = match["prefix"] or "", match["digest"]
+    else:
+        prefix, digest = os.path.dirname(source_name), hash_name(source_name)
+    return content_addressed_name(prefix, digest, FORMATS[spec.fmt][1], spec.rendition)
+
+
+def render(source, spec: RenditionSpec) -> bytes:
+    """Resizes the source image according to the spec and encodes it"""
+    with Image.open(source) as image:
+        # Lets the JPEG decoder downscale while decoding
+        image.draft(None, (spec.width, spec.height or 1))
+        image = ImageOps.exif_transpose(image)
+
+        if spec.height and spec.fit == "cover":
+            image = ImageOps.fit(
+                image, (spec.width, spec.height), Image.Resampling.LANCZOS
+            )
+        else:
+            image.thumbnail(
+                (spec.width, spec.height or image.height), Image.Resampling.LANCZOS
+            )
+
+        pil_format = FORMATS[spec.fmt][0]
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        output = io.BytesIO()
+        image.save(output, pil_format, quality=settings.MEDIA_RESIZE_QUALITY)
+        return output.getvalue()
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into a single execution.
+
+    Callers wait for the one in progress and then run their own call, which
+    is expected to find the result in a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[str, List] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                return fn()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
+
+
+@lru_cache(maxsize=None)
+def get_rendition_cache() -> DiskLRUCache:
+    """Get the local disk cache for renditions."""
+    return DiskLRUCache(
+        settings.MEDIA_RESIZE_CACHE_DIR,
+        settings.MEDIA_RESIZE_CACHE_MAX_SIZE,
+        name="renditions",
+    )
@@ -0,0 +1,107 @@
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotModified,
+)
+from django.views.decorators.http import require_safe
+from PIL import Image, UnidentifiedImageError
+
+from ruchky_backend.helpers.logger import logger
+from ruchky_backend.helpers.storage import storage
+from ruchky_backend.helpers.storage.cache import StorageUnavailable
+from ruchky_backend.helpers.storage.paths import IMMUTABLE_CACHE_CONTROL, hash_name
+from ruchky_backend.helpers.storage.renditions import (
+    RenditionSpec,
+    SingleFlight,
+    get_rendition_cache,
+    parse_spec,
+    render,
+    rendition_name,
+)
+
+resize_flight = SingleFlight()
+
+
+def build_rendition(source_name: str, name: str, spec: RenditionSpec) -> Path:
+    """
+    Returns the local path of a rendition, generating it if needed
+    """
+    cache = get_rendition_cache()
+
+    # Another request may have finished it while we waited
+    path = cache.get(name)
+    if path is not None:
+        return path
+
+    # Generated by another worker
+    if storage.exists(name):
+        with storage.open(name, "rb") as stored:
+            return cache.put(name, stored.chunks())
+
+    with storage.open(source_name, "rb") as source:
+        content = render(source, spec)
+
+    storage.save(name, ContentFile(content))
+    return cache.put(name, [content])
+
+
+@require_safe
+def media_resize(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    Serves a resized rendition of a stored image.
+
+    Query parameters: w (required), h, fit (cover/contain) and fmt
+    (webp/jpeg/png). Sizes are limited to MEDIA_RESIZE_WIDTHS and
+    MEDIA_RESIZE_HEIGHTS.
+    """
+    try:
+        spec = parse_spec(
+            request.GET.get("w"),
+            request.GET.get("h"),
+            request.GET.get("fit"),
+            request.GET.get("fmt"),
+        )
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type="text/plain")
+
+    name = rendition_name(path, spec)
+    etag = f'"{hash_name(name)}"'
+
+    # Renditions (and their ETags) must not outlive a deleted source
+    try:
+        if not storage.exists(path):
+            raise Http404("Image not found")
+    except StorageUnavailable:
+        # Cached renditions are still served while the bucket is unreachable
+        pass
+
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponseNotModified()
+
+    rendition = get_rendition_cache().open(name)
+
+    if rendition is None:
+        try:
+            rendition = open(
+                resize_flight.do(name, lambda: build_rendition(path, name, spec)),
+                "rb",
+            )
+        except FileNotFoundError:
+            raise Http404("Image not found")
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            return HttpResponse(
+                "Not a supported image", status=400, content_type="text/plain"
+            )
+        except StorageUnavailable as e:
+            logger.warning(f"Could not build rendition {name}: {e}")
+            return HttpResponse(status=503)
+
+    response = FileResponse(rendition, content_type=spec.content_type)
+    response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    response["ETag"] = etag
+    return response
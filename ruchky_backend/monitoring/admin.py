@@ -0,0 +1,86 @@
+import json
+
+from django.contrib import admin
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+from unfold.admin import ModelAdmin
+
+from ruchky_backend.monitoring.models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(ModelAdmin):
+    """
+    Read-only admin for captured slow queries.
+    """
+
+    list_display = (
+        "endpoint",
+        "short_sql",
+        "calls",
+        "avg_duration",
+        "max_duration_ms",
+        "updated_at",
+    )
+    list_filter = ("database", "endpoint")
+    search_fields = ("sql", "endpoint", "path")
+    fieldsets = (
+        (None, {"fields": ("endpoint", "path", "query_params", "database")}),
+        (
+            _("Statistics"),
+            {
+                "fields": (
+                    "calls",
+                    "avg_duration",
+                    "max_duration_ms",
+                    "last_duration_ms",
+                    "created_at",
+                    "updated_at",
+                )
+            },
+        ),
+        (_("Query"), {"fields": ("sql", "example_sql", "example_params")}),
+        (_("Plan"), {"fields": ("plan_preview",)}),
+    )
+    readonly_fields = (
+        "endpoint",
+        "path",
+        "query_params",
+        "database",
+        "calls",
+        "avg_duration",
+        "max_duration_ms",
+        "last_duration_ms",
+        "created_at",
+        "updated_at",
+        "sql",
+        "example_sql",
+        "example_params",
+        "plan_preview",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def short_sql(self, obj):
+        return obj.sql[:100]
+
+    short_sql.short_description = _("SQL")
+
+    def avg_duration(self, obj):
+        return f"{obj.avg_duration_ms:.1f}"
+
+    avg_duration.short_description = _("Avg Duration (ms)")
+
+    def plan_preview(self, obj):
+        if not obj.plan:
+            return "-"
+        return format_html(
+            '<pre style="white-space: pre-wrap;">{}</pre>',
+            json.dumps(obj.plan, indent=2),
+        )
+
+    plan_preview.short_description = _("Plan")
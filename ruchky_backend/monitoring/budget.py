@@ -0,0 +1,60 @@
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest
+
+from ruchky_backend.helpers.logger import logger
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """connection.execute_wrapper() hook counting queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_budget(max_queries: int):
+    """
+    Limits the number of queries of an endpoint, including the ones made
+    while its response is serialized. Use with ninja's decorate_view:
+
+        @router.get("", response=List[PetSchema])
+        @decorate_view(query_budget(5))
+        def list_pets(request): ...
+
+    Exceeding the budget raises QueryBudgetExceeded when
+    QUERY_BUDGET_STRICT is set (local and tests), otherwise it is logged.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs):
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = view(request, *args, **kwargs)
+
+            if counter.count > max_queries:
+                message = (
+                    f"{request.method} {request.path} made {counter.count} "
+                    f"queries, the budget is {max_queries}"
+                )
+                if settings.QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,244 @@
+import json
+import re
+import time
+
+from collections import Counter
+from contextlib import ExitStack
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+
+from ruchky_backend.monitoring.models import SlowQuery
+from ruchky_backend.monitoring.slow_queries import explain
+from ruchky_backend.monitoring.timing import CapturedQuery
+
+# ((status)::text = 'active'::text), (price <= '500'::numeric), (is_charity)
+CONDITION_RE = re.compile(
+    r"^\(*(?:NOT )?(?P<column>\w+)\)?(?:::[\w ]+?)?\)?"
+    r"(?:\s+(?P<operator>= ANY|IS NOT NULL|IS NULL|<>|<=|>=|=|<|>)\s?.*)?$"
+)
+EQUALITY_OPERATORS = {None, "=", "= ANY", "IS NULL"}
+RANGE_OPERATORS = {"<", ">", "<=", ">="}
+
+Sample = Tuple[str, Dict[str, Any]]
+
+
+class Suggestion(NamedTuple):
+    table: str
+    columns: Tuple[str, ...]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a sample of API requests, explains the queries they run and "
+        "suggests indexes for large sequential scans. Requests are sent "
+        "anonymously, by default the ones that produced slow queries"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sample",
+            metavar="FILE",
+            help='JSON list of {"path": ..., "params": {...}} requests to replay '
+            "instead of the slow query log",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=500,
+            help="Maximum number of requests replayed (default: 500)",
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Ignore scans of tables with fewer estimated rows (default: 1000)",
+        )
+        parser.add_argument(
+            "--host",
+            help="Host header of the replayed requests, one of ALLOWED_HOSTS "
+            "(default: the first of ALLOWED_HOSTS)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        start_time = time.time()
+        samples = self.get_samples(options["sample"])[: options["limit"]]
+        self.min_rows = options["min_rows"]
+        self.host = options["host"] or get_default_host()
+        self.table_rows: Dict[Tuple[str, str], float] = {}
+
+        # Replayed queries are not slow queries of real traffic
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=float("inf")):
+            queries = self.replay(samples)
+
+        suggestions: Counter = Counter()
+        examples: Dict[Suggestion, str] = {}
+        for query, source in queries:
+            plan = explain(query.alias, query.sql, query.params)
+            for suggestion in self.analyze(query.alias, plan or []):
+                suggestions[suggestion] += 1
+                examples.setdefault(suggestion, source)
+
+        # An index also serves the queries filtering on its leading columns
+        for suggestion in sorted(suggestions, key=lambda s: len(s.columns)):
+            for other in suggestions:
+                if (
+                    other.table == suggestion.table
+                    and len(other.columns) > len(suggestion.columns)
+                    and other.columns[: len(suggestion.columns)] == suggestion.columns
+                ):
+                    suggestions[other] += suggestions.pop(suggestion)
+                    break
+
+        for suggestion, count in suggestions.most_common():
+            columns = ", ".join(suggestion.columns)
+            self.stdout.write(
+                f"{count:>5}x CREATE INDEX ON {suggestion.table} ({columns})"
+                f"  -- e.g. {examples[suggestion]}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Replayed {len(samples)} requests, explained {len(queries)} "
+                f"queries and suggested {len(suggestions)} indexes "
+                f"in {time.time() - start_time:.2f} seconds"
+            )
+        )
+
+    def get_samples(self, path: Optional[str]) -> List[Sample]:
+        if path:
+            try:
+                with open(path) as f:
+                    return [
+                        (item["path"], item.get("params", {})) for item in json.load(f)
+                    ]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                raise CommandError(f"Could not read samples from {path}: {e}")
+
+        samples = []
+        for slow_query in SlowQuery.objects.filter(endpoint__startswith="GET "):
+            sample = (slow_query.path, slow_query.query_params)
+            if sample not in samples:
+                samples.append(sample)
+        return samples
+
+    def replay(self, samples: List[Sample]) -> List[Tuple[CapturedQuery, str]]:
+        """Returns the queries run by each request along with the request"""
+        queries: List[Tuple[CapturedQuery, str]] = []
+        # The test client's testserver host is not allowed outside of tests
+        client = Client(HTTP_HOST=self.host)
+
+        for path, params in samples:
+            captured: List[CapturedQuery] = []
+
+            def capture(execute, sql, sql_params, many, context):
+                if not many:
+                    captured.append(
+                        CapturedQuery(context["connection"].alias, sql, sql_params, 0)
+                    )
+                return execute(sql, sql_params, many, context)
+
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(capture))
+                response = client.get(path, params, secure=True)
+
+            if response.status_code >= 400:
+                self.stderr.write(f"{path} {params}: {response.status_code}")
+            queries.extend((query, f"{path} {params}") for query in captured)
+        return queries
+
+    def analyze(self, alias: str, plan: List) -> Iterator[Suggestion]:
+        for entry in plan:
+            for table, condition, sort_keys in find_seq_scans(entry["Plan"]):
+                if self.get_table_rows(alias, table) < self.min_rows:
+                    continue
+                columns = suggest_columns(condition, sort_keys)
+                if columns:
+                    yield Suggestion(table, columns)
+
+    def get_table_rows(self, alias: str, table: str) -> float:
+        """Planner estimate of the table size, tables never analyzed count as 0"""
+        if (alias, table) not in self.table_rows:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE relname = %s", [table]
+                )
+                row = cursor.fetchone()
+            self.table_rows[alias, table] = max(row[0], 0) if row else 0
+        return self.table_rows[alias, table]
+
+
+def get_default_host() -> str:
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*":
+            # .example.com allows example.com and its subdomains
+            return host.lstrip(".")
+    return "localhost"
+
+
+def find_seq_scans(
+    node: Dict[str, Any], sort_keys: Tuple[str, ...] = ()
+) -> Iterator[Tuple[str, str, Tuple[str, ...]]]:
+    """
+    Yields the table, filter and sort keys of the filtered sequential scans
+    in a JSON plan. Sort keys are the ones of the closest sort above the scan.
+    """
+    if node["Node Type"] in ("Sort", "Incremental Sort"):
+        sort_keys = tuple(node.get("Sort Key", ()))
+    if node["Node Type"] == "Seq Scan" and ("Filter" in node or sort_keys):
+        yield node["Relation Name"], node.get("Filter", ""), sort_keys
+    elif node["Node Type"] in ("Hash Join", "Merge Join", "Nested Loop"):
+        # Sort keys of a join do not apply to the scans below it
+        sort_keys = ()
+    for child in node.get("Plans", ()):
+        yield from find_seq_scans(child, sort_keys)
+
+
+def split_conditions(condition: str) -> List[str]:
+    """Splits a plan filter into its top level AND conditions"""
+    if condition.startswith("(") and condition.endswith(")"):
+        depth = 0
+        for i, char in enumerate(condition):
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            if not depth and i < len(condition) - 1:
+                break
+        else:
+            condition = condition[1:-1]
+
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(condition):
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        if not depth and condition.startswith(" AND ", i):
+            parts.append(condition[start:i])
+            start = i + len(" AND ")
+    parts.append(condition[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def suggest_columns(condition: str, sort_keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Index columns for a filter and sort, in equality, sort, range order.
+    Conditions on expressions (e.g. upper(location)) can't use a plain index
+    and are left out.
+    """
+    equality, ranges = [], []
+    for part in split_conditions(condition):
+        match = CONDITION_RE.match(part)
+        if not match:
+            continue
+        column, operator = match["column"], match["operator"]
+        if operator in EQUALITY_OPERATORS and column not in equality:
+            equality.append(column)
+        elif operator in RANGE_OPERATORS and column not in ranges:
+            ranges.append(column)
+
+    sort_columns = [key.rsplit(".", 1)[-1] for key in sort_keys]
+    columns = equality + [key for key in sort_columns if key.split()[0] not in equality]
+    # Only the first range column narrows the index scan
+    if ranges and ranges[0] not in equality:
+        columns.append(ranges[0])
+    return tuple(columns)
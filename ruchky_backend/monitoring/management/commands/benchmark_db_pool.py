@@ -0,0 +1,136 @@
+import copy
+import json
+import statistics
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.utils import load_backend
+from psycopg_pool import ConnectionPool
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures connection checkout + query latency against the default "
+        "database with and without connection pooling"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Number of simulated requests per mode (default: 500)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Number of concurrent clients (default: 4)",
+        )
+        parser.add_argument(
+            "--query",
+            default="SELECT 1",
+            help="Query executed by every simulated request (default: SELECT 1)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the results as JSON",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.requests = options["requests"]
+        self.concurrency = options["concurrency"]
+        self.query = options["query"]
+
+        results = {
+            "unpooled": self.run("benchmark_unpooled", pooled=False),
+            "pooled": self.run("benchmark_pooled", pooled=True),
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for mode, stats in results.items():
+            self.stdout.write(
+                f"{mode:>9}: p50={stats['p50_ms']:.2f}ms "
+                f"p99={stats['p99_ms']:.2f}ms "
+                f"max={stats['max_ms']:.2f}ms "
+                f"({stats['requests_per_second']:.0f} req/s)"
+            )
+
+        speedup = results["unpooled"]["p50_ms"] / max(results["pooled"]["p50_ms"], 1e-6)
+        self.stdout.write(
+            self.style.SUCCESS(f"Pooling is {speedup:.1f}x faster at p50")
+        )
+
+    def get_settings(self, pooled: bool) -> Dict[str, Any]:
+        settings_dict = copy.deepcopy(connections["default"].settings_dict)
+        options = settings_dict.setdefault("OPTIONS", {})
+        settings_dict["CONN_MAX_AGE"] = 0
+
+        if pooled:
+            pool = options.get("pool")
+            options["pool"] = {
+                **(pool if isinstance(pool, dict) else {}),
+                "min_size": self.concurrency,
+                "max_size": self.concurrency,
+                "check": ConnectionPool.check_connection,
+            }
+        else:
+            options.pop("pool", None)
+        return settings_dict
+
+    def run(self, alias: str, pooled: bool) -> Dict[str, float]:
+        settings_dict = self.get_settings(pooled)
+        backend = load_backend(settings_dict["ENGINE"])
+        per_client = max(self.requests // self.concurrency, 1)
+
+        def client() -> List[float]:
+            # Each thread needs its own wrapper, the pool is shared per alias
+            connection = backend.DatabaseWrapper(settings_dict, alias)
+            timings = []
+            for _ in range(per_client):
+                start = time.perf_counter()
+                # Same lifecycle as a request: connect, query, release
+                with connection.cursor() as cursor:
+                    cursor.execute(self.query)
+                    cursor.fetchall()
+                connection.close()
+                timings.append((time.perf_counter() - start) * 1000)
+            return timings
+
+        wrapper = backend.DatabaseWrapper(settings_dict, alias)
+        if pooled:
+            # Warm up, so pool startup is not part of the measurement
+            wrapper.pool.open(wait=True)
+
+        start_time = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                timings = [
+                    timing
+                    for result in executor.map(
+                        lambda _: client(), range(self.concurrency)
+                    )
+                    for timing in result
+                ]
+        finally:
+            if pooled:
+                wrapper.close_pool()
+        elapsed = time.perf_counter() - start_time
+
+        percentiles = statistics.quantiles(timings, n=100)
+        return {
+            "requests": len(timings),
+            "concurrency": self.concurrency,
+            "p50_ms": round(percentiles[49], 3),
+            "p99_ms": round(percentiles[98], 3),
+            "max_ms": round(max(timings), 3),
+            "requests_per_second": round(len(timings) / elapsed, 1),
+        }
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import random
+import re
+import statistics
+import subprocess
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient
+
+from ruchky_backend.pets.models import (
+    Breed,
+    ListingStatus,
+    Pet,
+    PetListing,
+    Sex,
+    Species,
+)
+from ruchky_backend.users.models import User
+
+SERVER_TIMING_DB_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+LISTING_SORTS = ["-created_at", "price", "-price", "pet__birth_date", "pet__name"]
+LOCATIONS = ["Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro"]
+
+# Scenarios sent with a logged in client (see --user)
+AUTHENTICATED_SCENARIOS = {"me"}
+
+Scenario = Callable[[random.Random], Tuple[str, Dict[str, Any]]]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the public API endpoints through the ASGI application "
+        "in-process and reports latency percentiles, queries per request and "
+        "throughput as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Number of requests per endpoint (default: 200)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Number of concurrent requests (default: 8)",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Number of unmeasured requests per endpoint (default: 10)",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            help="Only run the given endpoint, can be repeated",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed for the filter mixes (default: 42)",
+        )
+        parser.add_argument(
+            "--user",
+            metavar="EMAIL",
+            help="Also benchmark authenticated endpoints, logged in as this user",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file instead of stdout",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2")
+        if settings.DEBUG:
+            self.stderr.write(
+                self.style.WARNING(
+                    "DEBUG is on, numbers include debug overhead (e.g. debug_toolbar)"
+                )
+            )
+
+        self.requests = options["requests"]
+        self.concurrency = options["concurrency"]
+        self.warmup = options["warmup"]
+        self.seed = options["seed"]
+        self.user = None
+        if options["user"]:
+            try:
+                self.user = User.objects.get(email=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+
+        scenarios = self.get_scenarios()
+        if options["endpoints"]:
+            scenarios = {
+                name: scenario
+                for name, scenario in scenarios.items()
+                if name in options["endpoints"]
+            }
+
+        results = asyncio.run(self.run_all(scenarios))
+        report = {
+            "commit": get_commit(),
+            "requests_per_endpoint": self.requests,
+            "concurrency": self.concurrency,
+            "seed": self.seed,
+            "endpoints": results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"Report written to {options['output']}")
+            )
+        else:
+            self.stdout.write(output)
+
+    def get_scenarios(self) -> Dict[str, Scenario]:
+        pet_ids = sample_ids(Pet)
+        listing_ids = sample_ids(PetListing)
+        breed_ids = sample_ids(Breed.objects.filter(is_active=True))
+
+        def list_pets(rng):
+            params = {"limit": 20, "offset": rng.choice([0, 0, 0, 20, 100])}
+            if rng.random() < 0.6:
+                params["species"] = rng.choice(Species.values)
+            if rng.random() < 0.3:
+                params["sex"] = rng.choice(Sex.values)
+            if rng.random() < 0.3:
+                params["is_vaccinated"] = "true"
+            if rng.random() < 0.2:
+                params["location"] = rng.choice(LOCATIONS)
+            return "/api/v1/pets/", params
+
+        def list_pet_listings(rng):
+            params = {"limit": 20, "offset": rng.choice([0, 0, 0, 20, 100])}
+            if rng.random() < 0.9:
+                params["status"] = ListingStatus.ACTIVE
+            if rng.random() < 0.6:
+                params["species"] = rng.choice(Species.values)
+            if rng.random() < 0.3:
+                params["max_price"] = rng.choice([500, 2000, 10000])
+            if rng.random() < 0.3:
+                params["min_age"], params["max_age"] = 0, rng.choice([1, 3, 8])
+            if rng.random() < 0.2:
+                params["is_charity"] = "true"
+            if rng.random() < 0.2:
+                params["location"] = rng.choice(LOCATIONS)
+            if rng.random() < 0.5:
+                params["sort"] = rng.choice(LISTING_SORTS)
+            return "/api/v1/pet-listings/", params
+
+        def list_breeds(rng):
+            params = {"limit": 50}
+            if rng.random() < 0.7:
+                params["species"] = rng.choice(Species.values)
+            if rng.random() < 0.3:
+                params["search"] = rng.choice(["terrier", "shepherd", "cat", "a"])
+            return "/api/v1/breeds/", params
+
+        scenarios: Dict[str, Scenario] = {
+            "list_pets": list_pets,
+            "list_pet_listings": list_pet_listings,
+            "list_breeds": list_breeds,
+        }
+        if pet_ids:
+            scenarios["get_pet"] = lambda rng: (
+                f"/api/v1/pets/{rng.choice(pet_ids)}",
+                {},
+            )
+        if listing_ids:
+            scenarios["get_pet_listing"] = lambda rng: (
+                f"/api/v1/pet-listings/{rng.choice(listing_ids)}",
+                {},
+            )
+        if breed_ids:
+            scenarios["get_breed"] = lambda rng: (
+                f"/api/v1/breeds/{rng.choice(breed_ids)}",
+                {},
+            )
+        if self.user:
+            scenarios["me"] = lambda rng: ("/api/v1/users/me", {})
+        return scenarios
+
+    async def run_all(self, scenarios: Dict[str, Scenario]) -> Dict[str, Dict]:
+        results = {}
+        for name, scenario in scenarios.items():
+            results[name] = await self.run(name, scenario)
+            stats = results[name]
+            self.stderr.write(
+                f"{name}: p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms "
+                f"p99={stats['p99_ms']}ms {stats['requests_per_second']} req/s"
+            )
+        return results
+
+    async def run(self, name: str, scenario: Scenario) -> Dict[str, Any]:
+        # Same requests for every run with the same seed
+        rng = random.Random(f"{self.seed}-{name}")
+        requests = [scenario(rng) for _ in range(self.warmup + self.requests)]
+        client = AsyncClient()
+        if name in AUTHENTICATED_SCENARIOS:
+            await client.aforce_login(self.user)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(path: str, params: Dict[str, Any]):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, params, secure=True)
+                duration = (time.perf_counter() - start) * 1000
+
+            match = SERVER_TIMING_DB_RE.search(response.get("Server-Timing", ""))
+            return duration, response.status_code, int(match[1]) if match else 0
+
+        for path, params in requests[: self.warmup]:
+            await send(path, params)
+
+        start_time = time.perf_counter()
+        samples = await asyncio.gather(
+            *(send(path, params) for path, params in requests[self.warmup :])
+        )
+        elapsed = time.perf_counter() - start_time
+
+        timings = [duration for duration, _, _ in samples]
+        percentiles = statistics.quantiles(timings, n=100)
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for _, status, _ in samples if status >= 400),
+            "p50_ms": round(percentiles[49], 3),
+            "p95_ms": round(percentiles[94], 3),
+            "p99_ms": round(percentiles[98], 3),
+            "queries_per_request": round(
+                statistics.mean(queries for _, _, queries in samples), 2
+            ),
+            "requests_per_second": round(len(samples) / elapsed, 1),
+        }
+
+
+def sample_ids(queryset, size: int = 1000) -> List[str]:
+    """
+    Returns up to size random ids. Keys are time ordered UUIDs, so the first
+    ids by key would only hit the oldest rows.
+    """
+    if not hasattr(queryset, "model"):
+        queryset = queryset.objects.all()
+    return [
+        str(pk) for pk in queryset.order_by("?").values_list("pk", flat=True)[:size]
+    ]
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,111 @@
+import json
+import time
+
+from itertools import batched
+from typing import Any, Callable, Dict
+from uuid import UUID, uuid4
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ruchky_backend.helpers.db.models import uuid7
+
+KEY_GENERATORS: Dict[str, Callable[[], UUID]] = {"uuid4": uuid4, "uuid7": uuid7}
+
+# Roughly the row width of a pet image
+PAYLOAD = "pet_image/ab/cd/" + "0" * 64 + "_original.jpg"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures bulk insert throughput and primary key index size of "
+        "uuid4 versus uuid7 keys in scratch tables of the default database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=500000,
+            help="Number of rows inserted per key type (default: 500000)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows per insert transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the results as JSON",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["rows"] < 1:
+            raise CommandError("--rows must be positive")
+        self.rows = options["rows"]
+        self.batch_size = options["batch_size"]
+
+        results = {
+            name: self.run(name, generate) for name, generate in KEY_GENERATORS.items()
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{name}: {stats['rows_per_second']:.0f} rows/s, "
+                f"index {stats['index_bytes'] / 2**20:.1f} MiB, "
+                f"table {stats['table_bytes'] / 2**20:.1f} MiB"
+            )
+
+        speedup = (
+            results["uuid7"]["rows_per_second"] / results["uuid4"]["rows_per_second"]
+        )
+        ratio = results["uuid7"]["index_bytes"] / results["uuid4"]["index_bytes"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"uuid7 inserts are {speedup:.2f}x as fast, "
+                f"with a {ratio:.2f}x primary key index"
+            )
+        )
+
+    def run(self, name: str, generate: Callable[[], UUID]) -> Dict[str, float]:
+        table = connection.ops.quote_name(f"benchmark_keys_{name}")
+        created_at = timezone.now()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(
+                f"CREATE TABLE {table} (id uuid PRIMARY KEY, "
+                "created_at timestamptz NOT NULL, image varchar(255) NOT NULL)"
+            )
+            try:
+                start_time = time.perf_counter()
+                for batch in batched(range(self.rows), self.batch_size):
+                    # One transaction per batch, like bulk_create
+                    with transaction.atomic():
+                        cursor.executemany(
+                            f"INSERT INTO {table} VALUES (%s, %s, %s)",
+                            [(generate(), created_at, PAYLOAD) for _ in batch],
+                        )
+                elapsed = time.perf_counter() - start_time
+
+                cursor.execute(
+                    "SELECT pg_relation_size(%s), pg_relation_size(%s)",
+                    [f"benchmark_keys_{name}_pkey", f"benchmark_keys_{name}"],
+                )
+                index_bytes, table_bytes = cursor.fetchone()
+            finally:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+        return {
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / elapsed, 1),
+            "index_bytes": index_bytes,
+            "table_bytes": table_bytes,
+        }
@@ -0,0 +1,115 @@
+import os
+
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    multiprocess,
+)
+
+from ruchky_backend.monitoring.timing import RequestTimings
+
+# Gunicorn workers write their samples to mmap'ed files in this directory,
+# see gunicorn.conf.py
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests by route, method and status",
+    ["route", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    ["route", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests accepted by the worker and not finished yet (queue depth)",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "SQL queries by route",
+    ["route"],
+)
+DB_QUERY_SECONDS = Counter(
+    "db_query_seconds_total",
+    "Time spent in SQL queries by route",
+    ["route"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+RATE_LIMIT_CHECKS = Counter(
+    "rate_limit_checks_total",
+    "Rate limit checks by scope, key (ip/email) and result (allowed/limited)",
+    ["scope", "key", "result"],
+)
+PASSWORD_HASHING_QUEUE_SECONDS = Histogram(
+    "password_hashing_queue_seconds",
+    "Time password hashing calls wait for a free hashing worker",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASHING_SECONDS = Histogram(
+    "password_hashing_seconds",
+    "Password hashing duration",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASHING_REJECTED = Counter(
+    "password_hashing_rejected_total",
+    "Password hashing calls rejected because the hashing pool was full",
+)
+SLOW_QUERIES_DROPPED = Counter(
+    "slow_queries_dropped_total",
+    "Slow queries not recorded because the recording queue was full",
+)
+STORAGE_LATENCY = Histogram(
+    "storage_operation_duration_seconds",
+    "Media storage operation latency",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def get_route(request: HttpRequest) -> str:
+    """Returns the matched URL pattern, so labels stay low cardinality"""
+    match = request.resolver_match
+    return match.route if match else "unmatched"
+
+
+def observe_request(
+    request: HttpRequest, response: HttpResponse, duration: float
+) -> None:
+    route = get_route(request)
+    REQUESTS.labels(route, request.method, response.status_code).inc()
+    REQUEST_LATENCY.labels(route, request.method).observe(duration)
+
+    timings: RequestTimings = getattr(request, "timings", None)
+    if timings is not None and timings.counts["db"]:
+        DB_QUERIES.labels(route).inc(timings.counts["db"])
+        DB_QUERY_SECONDS.labels(route).inc(timings.durations["db"])
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_rate_limit(scope: str, key: str, allowed: bool) -> None:
+    RATE_LIMIT_CHECKS.labels(scope, key, "allowed" if allowed else "limited").inc()
+
+
+def get_registry() -> CollectorRegistry:
+    """Returns a registry aggregating all worker processes (if forked)"""
+    if not os.environ.get(MULTIPROC_DIR_ENV):
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
@@ -0,0 +1,104 @@
+import time
+
+from contextlib import ExitStack, contextmanager
+from typing import Iterator
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.http import HttpRequest
+
+from ruchky_backend.helpers.logger import logger
+from ruchky_backend.monitoring.metrics import REQUESTS_IN_PROGRESS, observe_request
+from ruchky_backend.monitoring.slow_queries import slow_query_recorder
+from ruchky_backend.monitoring.timing import RequestTimings, collect_timings
+
+
+class MetricsMiddleware:
+    """
+    Records Prometheus request metrics. It is async capable, so requests
+    waiting for the worker's sync thread count as in progress.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        with REQUESTS_IN_PROGRESS.track_inprogress():
+            response = self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request: HttpRequest):
+        start = time.perf_counter()
+        with REQUESTS_IN_PROGRESS.track_inprogress():
+            response = await self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start)
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Records total time, SQL queries, response serialization and storage
+    calls per request. They are sent back in the Server-Timing header and
+    logged as structured fields. Slow queries are stored with their plans
+    in the background. Async capable, so async views run on the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with self.collect(request) as timings:
+            response = self.get_response(request)
+        return self.report(request, response, timings)
+
+    async def __acall__(self, request: HttpRequest):
+        with self.collect(request) as timings:
+            response = await self.get_response(request)
+        return self.report(request, response, timings)
+
+    @contextmanager
+    def collect(self, request: HttpRequest) -> Iterator[RequestTimings]:
+        with collect_timings() as timings, ExitStack() as stack:
+            request.timings = timings
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings.sql_wrapper))
+            yield timings
+
+    def report(self, request: HttpRequest, response, timings: RequestTimings):
+        if timings.slow_queries:
+            slow_query_recorder.submit(request, timings.slow_queries)
+
+        response["Server-Timing"] = timings.as_header()
+
+        fields = timings.as_dict()
+        logger.info(
+            f"{request.method} {request.path} {response.status_code} "
+            + " ".join(f"{key}={value}" for key, value in fields.items()),
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                **fields,
+            },
+        )
+        return response
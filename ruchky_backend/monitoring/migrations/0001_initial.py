@@ -0,0 +1,78 @@
+# Generated by Django 6.1.2 on 2026-10-19 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Created At"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Updated At"),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(
+                        max_length=32, unique=True, verbose_name="Fingerprint"
+                    ),
+                ),
+                ("sql", models.TextField(verbose_name="Normalized SQL")),
+                ("example_sql", models.TextField(verbose_name="Example SQL")),
+                (
+                    "example_params",
+                    models.JSONField(default=list, verbose_name="Example Parameters"),
+                ),
+                ("database", models.CharField(max_length=32, verbose_name="Database")),
+                ("plan", models.JSONField(blank=True, null=True, verbose_name="Plan")),
+                ("calls", models.PositiveIntegerField(default=1, verbose_name="Calls")),
+                (
+                    "total_duration_ms",
+                    models.FloatField(verbose_name="Total Duration (ms)"),
+                ),
+                (
+                    "max_duration_ms",
+                    models.FloatField(verbose_name="Max Duration (ms)"),
+                ),
+                (
+                    "last_duration_ms",
+                    models.FloatField(verbose_name="Last Duration (ms)"),
+                ),
+                ("endpoint", models.CharField(max_length=255, verbose_name="Endpoint")),
+                ("path", models.CharField(max_length=255, verbose_name="Path")),
+                (
+                    "query_params",
+                    models.JSONField(default=dict, verbose_name="Query Parameters"),
+                ),
+            ],
+            options={
+                "verbose_name": "Slow Query",
+                "verbose_name_plural": "Slow Queries",
+                "ordering": ("-updated_at",),
+                "indexes": [
+                    models.Index(
+                        fields=["-updated_at"], name="monitoring__updated_837f71_idx"
+                    )
+                ],
+            },
+        ),
+    ]
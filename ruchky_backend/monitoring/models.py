@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from ruchky_backend.helpers.db.models import DateTimeMixin
+
+
+class SlowQuery(DateTimeMixin):
+    """
+    Queries slower than SLOW_QUERY_THRESHOLD_MS, deduplicated by their
+    normalized SQL. Only the SLOW_QUERY_BUFFER_SIZE most recently seen
+    ones are kept.
+    """
+
+    fingerprint = models.CharField(_("Fingerprint"), max_length=32, unique=True)
+    sql = models.TextField(_("Normalized SQL"))
+    example_sql = models.TextField(_("Example SQL"))
+    example_params = models.JSONField(_("Example Parameters"), default=list)
+    database = models.CharField(_("Database"), max_length=32)
+    plan = models.JSONField(_("Plan"), blank=True, null=True)
+
+    calls = models.PositiveIntegerField(_("Calls"), default=1)
+    total_duration_ms = models.FloatField(_("Total Duration (ms)"))
+    max_duration_ms = models.FloatField(_("Max Duration (ms)"))
+    last_duration_ms = models.FloatField(_("Last Duration (ms)"))
+
+    endpoint = models.CharField(_("Endpoint"), max_length=255)
+    path = models.CharField(_("Path"), max_length=255)
+    query_params = models.JSONField(_("Query Parameters"), default=dict)
+
+    class Meta:
+        verbose_name = _("Slow Query")
+        verbose_name_plural = _("Slow Queries")
+        ordering = ("-updated_at",)
+        indexes = [models.Index(fields=["-updated_at"])]
+
+    def __str__(self):
+        return f"{self.endpoint}: {self.sql[:80]}"
+
+    @property
+    def avg_duration_ms(self) -> float:
+        return self.total_duration_ms / self.calls
@@ -0,0 +1,11 @@
+from ninja.renderers import JSONRenderer
+
+from ruchky_backend.monitoring.timing import timed
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """Records the time spent rendering API responses"""
+
+    def render(self, request, data, *, response_status):
+        with timed("serialize"):
+            return super().render(request, data, response_status=response_status)
@@ -0,0 +1,193 @@
+import re
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import HttpRequest
+from django.utils import timezone
+
+from ruchky_backend.helpers.logger import logger
+from ruchky_backend.monitoring.metrics import SLOW_QUERIES_DROPPED, get_route
+from ruchky_backend.monitoring.models import SlowQuery
+from ruchky_backend.monitoring.timing import CapturedQuery
+
+EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+# Literals and placeholders are replaced, so queries differing only in
+# their values share a fingerprint
+NORMALIZE_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize_sql(sql: str) -> Tuple[str, str]:
+    """Returns the normalized SQL and its fingerprint"""
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    sql = sql.strip()
+    return sql, blake2b(sql.encode(), digest_size=16).hexdigest()
+
+
+# Parameter types kept in the examples. Strings and bytes (emails, token
+# hashes, free text) are redacted
+SAFE_PARAM_TYPES = (bool, int, float, Decimal, date, datetime, time, timedelta, UUID)
+REDACTED = "<redacted>"
+
+
+def redact_param(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [redact_param(item) for item in value]
+    if isinstance(value, SAFE_PARAM_TYPES):
+        return str(value)
+    return REDACTED
+
+
+def redact_params(params: Any) -> Any:
+    """Makes query parameters JSON serializable, redacting sensitive values"""
+    if isinstance(params, dict):
+        return {key: redact_param(value) for key, value in params.items()}
+    return [redact_param(value) for value in params or ()]
+
+
+def explain(alias: str, sql: str, params: Any) -> Optional[List]:
+    """Returns the JSON plan of the query without executing it"""
+    if not EXPLAINABLE_RE.match(sql):
+        return None
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE off, FORMAT JSON) {sql}", params)
+            return cursor.fetchone()[0]
+    except DatabaseError as e:
+        logger.warning(f"Could not explain slow query: {e}")
+        return None
+
+
+class SlowQueryRecorder:
+    """
+    Stores slow queries in a background thread, so the UPDATE, EXPLAIN and
+    ring buffer cleanup don't delay the response.
+
+    At most SLOW_QUERY_MAX_PENDING requests wait to be recorded, the slow
+    queries of more are dropped instead of piling up behind a slow database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use, after gunicorn forked the worker
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="slow-queries"
+                )
+            return self._executor
+
+    def submit(self, request: HttpRequest, queries: List[CapturedQuery]) -> None:
+        """Queues the slow queries of a request, it never blocks the request"""
+        executor = self.get_executor()
+        with self._lock:
+            if self._pending >= settings.SLOW_QUERY_MAX_PENDING:
+                SLOW_QUERIES_DROPPED.inc(len(queries))
+                return
+            self._pending += 1
+
+        source = get_source(request)
+
+        def call() -> None:
+            try:
+                record_slow_queries(source, queries)
+            finally:
+                # Connections are per thread, this one is idle until the next
+                # slow request
+                connections.close_all()
+                with self._lock:
+                    self._pending -= 1
+
+        executor.submit(call)
+
+    def flush(self) -> None:
+        """Waits until the queued slow queries are stored"""
+        future: Future = self.get_executor().submit(lambda: None)
+        future.result()
+
+
+slow_query_recorder = SlowQueryRecorder()
+
+
+def get_source(request: HttpRequest) -> Dict[str, Any]:
+    """Returns the request fields stored along with its slow queries"""
+    return {
+        "endpoint": f"{request.method} {get_route(request)}"[:255],
+        "path": request.path[:255],
+        "query_params": {key: request.GET.getlist(key) for key in request.GET},
+    }
+
+
+def record_slow_queries(
+    source: Dict[str, Any], queries: Iterable[CapturedQuery]
+) -> None:
+    """Stores the slow queries of a request, it never raises"""
+    try:
+        for query in queries:
+            record_slow_query(source, query)
+    except DatabaseError as e:
+        logger.warning(f"Could not record slow queries: {e}")
+
+
+def record_slow_query(source: Dict[str, Any], query: CapturedQuery) -> None:
+    sql, fingerprint = normalize_sql(query.sql)
+    duration_ms = query.duration * 1000
+
+    seen = SlowQuery.objects.filter(fingerprint=fingerprint).update(
+        calls=F("calls") + 1,
+        total_duration_ms=F("total_duration_ms") + duration_ms,
+        max_duration_ms=Greatest("max_duration_ms", duration_ms),
+        last_duration_ms=duration_ms,
+        updated_at=timezone.now(),
+        **source,
+    )
+    if seen:
+        return
+
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.create(
+                fingerprint=fingerprint,
+                sql=sql,
+                example_sql=query.sql,
+                example_params=redact_params(query.params),
+                database=query.alias,
+                plan=explain(query.alias, query.sql, query.params),
+                total_duration_ms=duration_ms,
+                max_duration_ms=duration_ms,
+                last_duration_ms=duration_ms,
+                **source,
+            )
+    except IntegrityError:
+        # Recorded by another worker in the meantime
+        return
+
+    # Ring buffer: drop the least recently seen queries
+    SlowQuery.objects.filter(
+        pk__in=SlowQuery.objects.order_by("-updated_at").values("pk")[
+            settings.SLOW_QUERY_BUFFER_SIZE :
+        ]
+    ).delete()
@@ -0,0 +1,193 @@
+import json
+import tempfile
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from ruchky_backend.monitoring.management.commands.advise_indexes import (
+    suggest_columns,
+)
+from ruchky_backend.monitoring.models import SlowQuery
+from ruchky_backend.monitoring.slow_queries import (
+    REDACTED,
+    normalize_sql,
+    redact_params,
+    slow_query_recorder,
+)
+from ruchky_backend.pets.models import Breed, Species
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Breed.objects.create(name="Beagle", species=Species.DOG)
+
+    def test_reports_request_timings(self):
+        with self.assertLogs("ruchky_backend.helpers.logger", "INFO") as logs:
+            response = self.client.get("/api/v1/breeds/")
+
+        self.assertEqual(response.status_code, 200)
+        metrics = {
+            entry.split(";")[0]: entry
+            for entry in response["Server-Timing"].split(", ")
+        }
+        self.assertIn("total", metrics)
+        self.assertIn('desc="2 queries"', metrics["db"])
+        self.assertIn('desc="1 renders"', metrics["serialize"])
+
+        record = logs.records[-1]
+        self.assertEqual(record.path, "/api/v1/breeds/")
+        self.assertEqual(record.db_queries, 2)
+
+
+class MetricsTests(TestCase):
+    @override_settings(METRICS_TOKEN="secret")
+    def test_exposes_request_metrics(self):
+        self.client.get("/api/v1/breeds/")
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'http_requests_total{method="GET",route="api/v1/breeds/",status="200"}',
+            body,
+        )
+        self.assertIn('db_queries_total{route="api/v1/breeds/"}', body)
+        self.assertIn("http_requests_in_progress", body)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_requires_token_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    def test_hidden_without_token_outside_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+class SlowQueryTests(TransactionTestCase):
+    # Slow queries are stored by a background thread on its own connections,
+    # listing reads go to the replica
+    databases = {"default", "replica"}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close_pool()
+        super().tearDownClass()
+
+    def test_captures_plan_and_source(self):
+        self.client.get("/api/v1/pet-listings/", {"species": "dog"})
+        self.client.get("/api/v1/pet-listings/", {"species": "cat"})
+        slow_query_recorder.flush()
+
+        query = SlowQuery.objects.get(sql__contains='"pets_listingsearchdoc"."card"')
+        self.assertEqual(query.calls, 2)
+        self.assertEqual(query.endpoint, "GET api/v1/pet-listings/")
+        self.assertEqual(query.query_params, {"species": ["cat"]})
+        self.assertIn("Plan", query.plan[0])
+        self.assertIn(REDACTED, query.example_params)
+        self.assertNotIn("dog", query.example_params)
+
+    @override_settings(SLOW_QUERY_BUFFER_SIZE=1)
+    def test_keeps_most_recent_queries(self):
+        self.client.get("/api/v1/pet-listings/")
+        slow_query_recorder.flush()
+        self.assertEqual(SlowQuery.objects.count(), 1)
+
+    @override_settings(SLOW_QUERY_MAX_PENDING=0)
+    def test_drops_queries_when_queue_is_full(self):
+        self.client.get("/api/v1/pet-listings/")
+        slow_query_recorder.flush()
+        self.assertEqual(SlowQuery.objects.count(), 0)
+
+    def test_redacts_params(self):
+        self.assertEqual(
+            redact_params(["user@example.com", 5, None, True, ["dog", 1.5]]),
+            [REDACTED, "5", None, "True", [REDACTED, "1.5"]],
+        )
+        self.assertEqual(redact_params({"token": b"hash"}), {"token": REDACTED})
+
+    def test_fingerprint_ignores_values(self):
+        first = normalize_sql("SELECT * FROM t WHERE a = 1 AND b IN (%s, %s)")
+        second = normalize_sql("SELECT  *  FROM t WHERE a = 25 AND b IN (%s)")
+        self.assertEqual(first, second)
+
+
+class AdviseIndexesTests(TestCase):
+    def advise(self, *args):
+        stdout = StringIO()
+        call_command("advise_indexes", "--min-rows", "0", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_suggests_index_for_sequential_scan(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_indexscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as sample:
+            json.dump(
+                [{"path": "/api/v1/pet-listings/", "params": {"species": "dog"}}],
+                sample,
+            )
+            sample.flush()
+            output = self.advise("--sample", sample.name)
+
+        self.assertIn(
+            "2x CREATE INDEX ON pets_listingsearchdoc "
+            "(species, status, created_at DESC, listing_id DESC)",
+            output,
+        )
+        self.assertIn("Replayed 1 requests", output)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_replays_slow_query_requests(self):
+        SlowQuery.objects.create(
+            fingerprint="0" * 32,
+            sql="SELECT ?",
+            example_sql="SELECT 1",
+            database="default",
+            total_duration_ms=300,
+            max_duration_ms=300,
+            last_duration_ms=300,
+            endpoint="GET api/v1/breeds/",
+            path="/api/v1/breeds/",
+            query_params={"species": ["cat"]},
+        )
+
+        output = self.advise()
+        slow_query_recorder.flush()
+
+        self.assertIn("Replayed 1 requests", output)
+        # Replayed queries are not recorded again
+        self.assertEqual(SlowQuery.objects.count(), 1)
+
+    def test_replays_with_allowed_host(self):
+        stderr = StringIO()
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as sample:
+            json.dump([{"path": "/api/v1/pet-listings/"}], sample)
+            sample.flush()
+            with override_settings(ALLOWED_HOSTS=[".example.com"]):
+                call_command(
+                    "advise_indexes",
+                    "--sample",
+                    sample.name,
+                    stdout=StringIO(),
+                    stderr=stderr,
+                )
+
+        self.assertEqual(stderr.getvalue(), "")
+
+    def test_orders_equality_sort_range_columns(self):
+        condition = (
+            "((price <= '500'::numeric) AND ((species)::text = 'dog'::text) "
+            "AND (upper((location)::text) ~~ '%KYIV%'::text) AND is_charity)"
+        )
+        self.assertEqual(
+            suggest_columns(condition, ("pets_listingsearchdoc.created_at DESC",)),
+            ("species", "is_charity", "created_at DESC", "price"),
+        )
@@ -0,0 +1,109 @@
+import time
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+
+# Server-Timing metric name -> description of its counter
+METRICS = {
+    "db": "queries",
+    "serialize": "renders",
+    "storage": "calls",
+}
+
+
+class CapturedQuery(NamedTuple):
+    alias: str
+    sql: str
+    params: Any
+    duration: float
+
+
+class RequestTimings:
+    """Accumulates time spent per metric while a request is served."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.slow_query_threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+        self.slow_queries: List[CapturedQuery] = []
+
+    def add(self, metric: str, duration: float) -> None:
+        self.durations[metric] += duration
+        self.counts[metric] += 1
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.start
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.add("db", duration)
+            if duration >= self.slow_query_threshold and not many:
+                self.slow_queries.append(
+                    CapturedQuery(context["connection"].alias, sql, params, duration)
+                )
+
+    def as_dict(self) -> Dict[str, float]:
+        """Flat structured log fields, durations in milliseconds"""
+        fields = {"total_ms": round(self.total * 1000, 2)}
+        for metric, label in METRICS.items():
+            fields[f"{metric}_ms"] = round(self.durations[metric] * 1000, 2)
+            fields[f"{metric}_{label}"] = self.counts[metric]
+        return fields
+
+    def as_header(self) -> str:
+        """Server-Timing header value"""
+        entries = []
+        for metric, label in METRICS.items():
+            if self.counts[metric]:
+                entries.append(
+                    f"{metric};dur={self.durations[metric] * 1000:.1f};"
+                    f'desc="{self.counts[metric]} {label}"'
+                )
+        entries.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def get_current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def collect_timings():
+    """Collects timings recorded by timed() inside the block"""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(metric: str):
+    """Adds the duration of the block to the current request (if any)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(metric, time.perf_counter() - start)
@@ -0,0 +1,29 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.http import require_safe
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from ruchky_backend.monitoring.metrics import get_registry
+
+
+@require_safe
+def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Prometheus metrics of all worker processes.
+
+    Requires an "Authorization: Bearer <METRICS_TOKEN>" header. Without a
+    token the endpoint is only served with DEBUG.
+    """
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            raise Http404()
+    else:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            return HttpResponse(status=401)
+
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -3,7 +3,15 @@ from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from unfold.admin import ModelAdmin, TabularInline
 
-from ruchky_backend.pets.models import Breed, Pet, PetListing, PetImage, PetSocialLink
+from ruchky_backend.pets.models import (
+    ArchivedPetImage,
+    ArchivedPetListing,
+    Breed,
+    Pet,
+    PetListing,
+    PetImage,
+    PetSocialLink,
+)
 
 
 class PetImageInline(TabularInline):
@@ -210,3 +218,58 @@ class PetListingAdmin(ModelAdmin):
         "pet__owner__last_name",
     )
     readonly_fields = ("views_count",)
+
+
+class ArchivedPetImageInline(TabularInline):
+    """
+    Read-only inline for the images of an archived listing.
+    """
+
+    model = ArchivedPetImage
+    extra = 0
+    fields = ("image", "order", "caption", "image_preview")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def image_preview(self, obj):
+        if obj.image:
+            return format_html(
+                '<img src="{}" style="max-height: 100px; max-width: 100px;" />',
+                obj.image.url,
+            )
+        return "-"
+
+    image_preview.short_description = _("Preview")
+
+
+@admin.register(ArchivedPetListing)
+class ArchivedPetListingAdmin(ModelAdmin):
+    """
+    Read-only admin for listings moved to the archive by archive_listings.
+    """
+
+    list_display = ("id", "title", "pet", "status", "price", "archived_at")
+    list_filter = ("status", "archived_at")
+    search_fields = ("id", "title", "pet__name", "pet__owner__email")
+    readonly_fields = (
+        "id",
+        "pet",
+        "title",
+        "status",
+        "price",
+        "views_count",
+        "created_at",
+        "updated_at",
+        "archived_at",
+        "card",
+    )
+    inlines = [ArchivedPetImageInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
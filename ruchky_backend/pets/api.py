@@ -5,6 +5,7 @@ from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from ninja import Router, File, Query
+from ninja.decorators import decorate_view
 from ninja.pagination import paginate
 from ninja.files import UploadedFile
 from django.utils import timezone
@@ -20,14 +21,17 @@ from ruchky_backend.pets.schemas import (
     BreedFilterParams,
 )
 from ruchky_backend.pets.models import (
+    ArchivedPetListing,
     Pet,
     PetListing,
     PetImage,
     Sex,
     Species,
     ListingStatus,
+    ListingSearchDoc,
     Breed,
 )
+from ruchky_backend.monitoring.budget import query_budget
 
 breeds_router = Router(tags=["breeds"])
 pets_router = Router(tags=["pets"])
@@ -35,7 +39,15 @@ pet_listings_router = Router(tags=["pet_listings"])
 pet_images_router = Router(tags=["pet_images"])
 
 
+def get_pets_queryset():
+    """Pets with everything PetSchema needs, in a constant number of queries"""
+    return Pet.objects.select_related("breed", "profile_picture").prefetch_related(
+        "social_links", "images", "tags"
+    )
+
+
 @pets_router.get("", response=List[PetSchema])
+@decorate_view(query_budget(5))
 @paginate
 def list_pets(
     request: HttpRequest,
@@ -51,7 +63,7 @@ def list_pets(
     owner_id: UUID = None,
     organization_id: UUID = None,
 ):
-    pets = Pet.objects
+    pets = get_pets_queryset()
 
     if species:
         pets = pets.filter(species=species)
@@ -80,11 +92,26 @@ def list_pets(
 
 
 @pets_router.get("/{id}", response=PetSchema)
+@decorate_view(query_budget(4))
 def get_pet(request, id: UUID):
-    return get_object_or_404(Pet, id=id)
+    return get_object_or_404(get_pets_queryset(), id=id)
+
+
+# API sort names -> ListingSearchDoc columns
+LISTING_SORT_FIELDS = {
+    "price": "price",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+    "pet__name": "pet_name",
+    "pet__species": "species",
+    "pet__breed": "breed_name",
+    "pet__birth_date": "birth_date",
+    "pet__owner__organization__name": "organization_name",
+}
 
 
 @pet_listings_router.get("", response=List[PetListingSchema])
+@decorate_view(query_budget(2))
 @paginate
 def list_pet_listings(
     request,
@@ -110,6 +137,9 @@ def list_pet_listings(
     List pet listings with filtering and sorting options.
 
     Returns paginated list of pet listings based on provided filters.
+    Served from the denormalized ListingSearchDoc table and its
+    precomputed cards, without joins. Cards are validated with
+    PetListingSchema, which resolves image URLs.
     """
     filters = {}
 
@@ -120,50 +150,40 @@ def list_pet_listings(
     if max_price is not None:
         filters["price__lte"] = max_price
     if species is not None:
-        filters["pet__species"] = species
+        filters["species"] = species
     if sex is not None:
-        filters["pet__sex"] = sex
+        filters["sex"] = sex
     if name:
-        filters["pet__name__icontains"] = name.strip()
+        filters["pet_name__icontains"] = name.strip()
     if breed:
-        filters["pet__breed__icontains"] = breed.strip()
+        filters["breed_name__icontains"] = breed.strip()
     if location:
-        filters["pet__location__icontains"] = location.strip()
+        filters["location__icontains"] = location.strip()
     if is_vaccinated is not None:
-        filters["pet__is_vaccinated"] = is_vaccinated
+        filters["is_vaccinated"] = is_vaccinated
     if is_hypoallergenic is not None:
-        filters["pet__is_hypoallergenic"] = is_hypoallergenic
+        filters["is_hypoallergenic"] = is_hypoallergenic
     if owner_id is not None:
-        filters["pet__owner_id"] = owner_id
+        filters["owner_id"] = owner_id
     if organization_id is not None:
-        filters["pet__owner__organization_id"] = organization_id
+        filters["organization_id"] = organization_id
     if organization_name:
-        filters["pet__owner__organization__name__icontains"] = organization_name.strip()
+        filters["organization_name__icontains"] = organization_name.strip()
     if is_charity is not None:
-        filters["pet__owner__organization__is_charity"] = is_charity
+        filters["is_charity"] = is_charity
 
     # Age filtering
     now_date = timezone.now().date()
     if min_age is not None:
-        filters["pet__birth_date__lte"] = now_date - relativedelta(years=min_age)
+        filters["birth_date__lte"] = now_date - relativedelta(years=min_age)
     if max_age is not None:
-        filters["pet__birth_date__gte"] = now_date - relativedelta(years=max_age)
-
-    # Base queryset with select_related for better performance
-    pet_listings = PetListing.objects.select_related(
-        "pet", "pet__owner", "pet__owner__organization"
-    ).filter(**filters)
-
-    allowed_sort_fields = {
-        "price",
-        "created_at",
-        "updated_at",
-        "pet__name",
-        "pet__species",
-        "pet__breed",
-        "pet__birth_date",
-        "pet__owner__organization__name",
-    }
+        filters["birth_date__gte"] = now_date - relativedelta(years=max_age)
+
+    # Listing ids break ties, so pages are stable. New ids are time ordered,
+    # so listings created at the same time keep their creation order
+    search_docs = ListingSearchDoc.objects.filter(**filters).order_by(
+        "-created_at", "-listing_id"
+    )
 
     if sort:
         sort_direction = ""
@@ -173,21 +193,33 @@ def list_pet_listings(
             sort_direction = "-"
             sort_field = sort[1:]
 
-        if sort_field not in allowed_sort_fields:
-            pass
-        else:
-            pet_listings = pet_listings.order_by(f"{sort_direction}{sort_field}")
+        if sort_field in LISTING_SORT_FIELDS:
+            search_docs = search_docs.order_by(
+                f"{sort_direction}{LISTING_SORT_FIELDS[sort_field]}",
+                f"{sort_direction}listing_id",
+            )
 
-    return pet_listings
+    return search_docs.values_list("card", flat=True)
 
 
 @pet_listings_router.get("/{id}", response=PetListingSchema)
+@decorate_view(query_budget(4))
 def get_pet_listing(request, id: UUID):
-    return get_object_or_404(PetListing, id=id)
+    listings = PetListing.objects.select_related(
+        "pet", "pet__breed", "pet__profile_picture"
+    ).prefetch_related("pet__social_links", "pet__images", "pet__tags")
+    listing = listings.filter(id=id).first()
+    if listing is None:
+        # Closed listings are moved to the archive, see archive_listings.
+        # Their card is validated like a live listing, which resolves URLs
+        archived = get_object_or_404(ArchivedPetListing.objects.only("card"), id=id)
+        return archived.card
+    return listing
 
 
 # Pet Images API endpoints
 @pet_images_router.get("/{pet_id}", response=List[PetImageSchema])
+@decorate_view(query_budget(2))
 def list_pet_images(request, pet_id: UUID):
     """
     Get all images for a specific pet.
@@ -264,6 +296,7 @@ breeds_router = Router()
 
 
 @breeds_router.get("", response=List[BreedSchema])
+@decorate_view(query_budget(2))
 @paginate
 def list_breeds(
     request: HttpRequest,
@@ -419,6 +452,7 @@ def list_breeds(
 
 
 @breeds_router.get("/{id}", response=BreedSchema)
+@decorate_view(query_budget(1))
 def get_breed(request: HttpRequest, id: UUID):
     """
     Get detailed information about a specific breed.
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PetsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ruchky_backend.pets"
+
+    def ready(self):
+        from ruchky_backend.pets import signals  # noqa
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable
+from uuid import UUID
+
+from django.db import transaction
+
+from ruchky_backend.pets.models import (
+    ArchivedPetImage,
+    ArchivedPetListing,
+    ListingStatus,
+    PetListing,
+)
+from ruchky_backend.pets.search import build_card, get_listings_queryset
+
+CLOSED_STATUSES = [
+    ListingStatus.SOLD,
+    ListingStatus.ADOPTED,
+    ListingStatus.EXPIRED,
+    ListingStatus.ARCHIVED,
+]
+
+
+def get_archivable_listings(cutoff: datetime):
+    """Closed listings last updated before the cutoff"""
+    return PetListing.objects.filter(status__in=CLOSED_STATUSES, updated_at__lt=cutoff)
+
+
+@transaction.atomic
+def archive_listings(ids: Iterable[UUID], cutoff: datetime) -> int:
+    """
+    Moves the listings among ids that are still archivable to the archive
+    tables, with a snapshot of their card and image references. Listings
+    locked by another transaction (e.g. a concurrent run) are skipped.
+    Returns how many were moved.
+    """
+    listings = list(
+        get_listings_queryset(get_archivable_listings(cutoff).filter(pk__in=ids))
+        # Related rows are left unlocked, some are on the nullable side of a join
+        .select_for_update(skip_locked=True, of=("self",))
+    )
+    if not listings:
+        return 0
+
+    ArchivedPetListing.objects.bulk_create(
+        [
+            ArchivedPetListing(
+                id=listing.id,
+                pet_id=listing.pet_id,
+                title=listing.title,
+                status=listing.status,
+                price=listing.price,
+                views_count=listing.views_count,
+                created_at=listing.created_at,
+                updated_at=listing.updated_at,
+                card=build_card(listing),
+            )
+            for listing in listings
+        ]
+    )
+    ArchivedPetImage.objects.bulk_create(
+        [
+            ArchivedPetImage(
+                listing_id=listing.id,
+                image=image.image.name,
+                order=image.order,
+                caption=image.caption,
+            )
+            for listing in listings
+            for image in listing.pet.images.all()
+        ]
+    )
+
+    # Search documents are deleted with them
+    PetListing.objects.filter(pk__in=[listing.pk for listing in listings]).delete()
+    return len(listings)
+
+
+def rename_card_media(card: Any, names: Dict[str, str]) -> Any:
+    """
+    Returns the card snapshot with the storage names found in names replaced
+    by their new names. Snapshots are not rebuilt from the current rows, so
+    media migrations rewrite them in place.
+    """
+    if isinstance(card, dict):
+        return {key: rename_card_media(value, names) for key, value in card.items()}
+    if isinstance(card, list):
+        return [rename_card_media(value, names) for value in card]
+    if isinstance(card, str):
+        return names.get(card, card)
+    return card
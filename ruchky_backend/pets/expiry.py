@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from typing import List
+from uuid import UUID
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DurationField, ExpressionWrapper, F, Min, QuerySet, Value
+from django.db.models.functions import Coalesce
+
+from ruchky_backend.pets.models import ListingStatus, PetListing
+from ruchky_backend.pets.signals import listings_expired
+from ruchky_backend.users.models import OrganizationProfile
+
+
+def get_expired_listings(now: datetime) -> QuerySet[PetListing]:
+    """Active listings older than the TTL of their owner's organization"""
+    ttl_days = Coalesce(
+        "pet__owner__organization__listing_ttl_days", Value(settings.LISTING_TTL_DAYS)
+    )
+    ttl = ExpressionWrapper(
+        ttl_days * Value(timedelta(days=1)), output_field=DurationField()
+    )
+    # Bounds the scan of the active listings index by the shortest TTL, a TTL
+    # of 0 expires listings right away
+    shortest_ttl = settings.LISTING_TTL_DAYS
+    organization_ttl = OrganizationProfile.objects.aggregate(
+        days=Min("listing_ttl_days")
+    )["days"]
+    if organization_ttl is not None:
+        shortest_ttl = min(shortest_ttl, organization_ttl)
+    return (
+        PetListing.objects.filter(
+            status=ListingStatus.ACTIVE,
+            created_at__lte=now - timedelta(days=shortest_ttl),
+        )
+        .alias(expires_at=F("created_at") + ttl)
+        .filter(expires_at__lte=now)
+    )
+
+
+@transaction.atomic
+def expire_listings(now: datetime, limit: int) -> List[UUID]:
+    """
+    Sets up to limit expired listings to EXPIRED in a single statement and
+    returns their ids. Listings locked by another transaction (e.g. a run
+    on another node) are skipped. Sends listings_expired once for the batch.
+    """
+    candidates = (
+        get_expired_listings(now)
+        .select_for_update(skip_locked=True, of=("self",))
+        .values("pk")[:limit]
+    )
+    sql, params = candidates.query.sql_with_params()
+    quote_name = connection.ops.quote_name
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {quote_name(PetListing._meta.db_table)} "
+            f"SET {quote_name('status')} = %s, {quote_name('updated_at')} = %s "
+            f"WHERE {quote_name('id')} IN ({sql}) RETURNING {quote_name('id')}",
+            [ListingStatus.EXPIRED, now, *params],
+        )
+        listing_ids = [row[0] for row in cursor.fetchall()]
+
+    if listing_ids:
+        listings_expired.send(
+            sender=PetListing, listing_ids=listing_ids, updated_at=now
+        )
+    return listing_ids
@@ -0,0 +1,64 @@
+import time
+
+from datetime import timedelta
+from itertools import batched
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ruchky_backend.pets.archive import archive_listings, get_archivable_listings
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves closed listings (sold, adopted, expired, archived) that were "
+        "not updated for a while to the archive tables. Meant to be run "
+        "periodically, several runs can overlap"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.LISTING_ARCHIVE_AFTER_DAYS,
+            help="Archive listings closed for more than this many days "
+            f"(default: {settings.LISTING_ARCHIVE_AFTER_DAYS})",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of listings moved per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the listings that would be archived",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        start_time = time.time()
+
+        listings = get_archivable_listings(cutoff)
+        if options["dry_run"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"{listings.count()} listings would be archived")
+            )
+            return
+
+        archived = 0
+        # Ids are listed once, each batch locks and rechecks its listings
+        ids = listings.order_by("pk").values_list("pk", flat=True)
+        for batch in batched(ids.iterator(), options["batch_size"]):
+            archived += archive_listings(batch, cutoff)
+            self.stdout.write(f"Archived {archived} listings...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived} listings "
+                f"in {time.time() - start_time:.2f} seconds"
+            )
+        )
@@ -0,0 +1,50 @@
+import time
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ruchky_backend.pets.expiry import expire_listings, get_expired_listings
+
+
+class Command(BaseCommand):
+    help = (
+        "Sets active listings older than their TTL (the organization's "
+        "listing TTL or LISTING_TTL_DAYS) to expired. Meant to be run "
+        "periodically, runs on several nodes can overlap"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of listings expired per statement (default: 1000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the listings that would expire",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        now = timezone.now()
+        start_time = time.time()
+
+        if options["dry_run"]:
+            count = get_expired_listings(now).count()
+            self.stdout.write(self.style.SUCCESS(f"{count} listings would expire"))
+            return
+
+        expired = 0
+        # Until no unlocked expired listings are left
+        while listing_ids := expire_listings(now, options["batch_size"]):
+            expired += len(listing_ids)
+            self.stdout.write(f"Expired {expired} listings...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Expired {expired} listings in {time.time() - start_time:.2f} seconds"
+            )
+        )
@@ -0,0 +1,185 @@
+import re
+import time
+
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ruchky_backend.helpers.db.models import get_media_fields
+from ruchky_backend.helpers.storage import StoredObject, storage
+from ruchky_backend.helpers.storage.paths import (
+    ORIGINAL_RENDITION,
+    hash_name,
+    is_content_addressed,
+    parse_content_addressed_name,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes stored media objects that are no longer referenced by any "
+        "image field (PetImage, Breed, OrganizationProfile)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="Only delete orphans older than this many hours (default: 24)",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=1000,
+            help="Number of storage objects listed and diffed at once (default: 1000)",
+        )
+        parser.add_argument(
+            "--delete-batch-size",
+            type=int,
+            default=500,
+            help="Number of orphans deleted per batch (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report orphaned objects without deleting them",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.dry_run = options["dry_run"]
+        self.delete_batch_size = options["delete_batch_size"]
+        self.media_fields = get_media_fields()
+        self.legacy_digests = self.get_legacy_digests()
+        # Digest of the last original listed and whether it is kept
+        self.group_digest: Optional[str] = None
+        self.group_live = False
+
+        cutoff = timezone.now() - timedelta(hours=options["grace_hours"])
+        start_time = time.time()
+
+        scanned = 0
+        orphaned = 0
+        pending: List[StoredObject] = []
+
+        # Only one page of names is held in memory at a time
+        for page in storage.iter_object_pages(page_size=options["page_size"]):
+            scanned += len(page)
+            # Objects are deleted only if untouched since listed, so content
+            # uploaded again in the meantime is kept
+            candidates = {obj.name: obj for obj in page if obj.modified < cutoff}
+
+            originals = {
+                name
+                for name in candidates
+                if not is_rendition(parse_content_addressed_name(name))
+            }
+            orphans = originals - self.get_referenced(originals)
+            orphans.update(self.get_orphaned_renditions(page, candidates, orphans))
+
+            orphaned += len(orphans)
+            pending.extend(candidates[name] for name in sorted(orphans))
+
+            while len(pending) >= self.delete_batch_size:
+                self.delete(pending[: self.delete_batch_size])
+                del pending[: self.delete_batch_size]
+
+            self.stdout.write(
+                f"Scanned {scanned} objects, {orphaned} orphaned so far..."
+            )
+
+        if pending:
+            self.delete(pending)
+
+        action = "Found" if self.dry_run else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {orphaned} orphaned objects out of {scanned} "
+                f"in {time.time() - start_time:.2f} seconds"
+            )
+        )
+
+    def get_orphaned_renditions(
+        self,
+        page: List[StoredObject],
+        candidates: Dict[str, StoredObject],
+        orphans: Set[str],
+    ) -> Set[str]:
+        """
+        Returns the candidate renditions whose original is not kept
+
+        Renditions share the prefix, shard and digest of their original and
+        sort right after it ('original' < 'w...'), so the group of the last
+        original listed carries over to the next page however many
+        renditions it has. Renditions of legacy originals are named after a
+        hash of the original name instead.
+        """
+        orphaned = set()
+        for obj in page:
+            match = parse_content_addressed_name(obj.name)
+            if not match:
+                continue
+            if not is_rendition(match):
+                self.group_digest = match["digest"]
+                self.group_live = obj.name not in orphans
+                continue
+
+            if obj.name not in candidates:
+                continue
+            if match["digest"] == self.group_digest:
+                live = self.group_live
+            else:
+                live = match["digest"] in self.legacy_digests
+            if not live:
+                orphaned.add(obj.name)
+        return orphaned
+
+    def get_legacy_digests(self) -> Set[str]:
+        """
+        Returns the digests that renditions of referenced legacy (not content
+        addressed) originals are named after
+        """
+        digests = set()
+        for model, field in self.media_fields:
+            names = (
+                model._default_manager.exclude(**{f"{field.attname}__isnull": True})
+                .exclude(**{field.attname: ""})
+                .values_list(field.attname, flat=True)
+            )
+            digests.update(
+                hash_name(name)
+                for name in names.iterator()
+                if not is_content_addressed(name)
+            )
+        return digests
+
+    def get_referenced(self, names: Set[str]) -> Set[str]:
+        """
+        Returns the subset of names referenced by any media field
+        """
+        referenced = set()
+        if not names:
+            return referenced
+
+        for model, field in self.media_fields:
+            referenced.update(
+                model._default_manager.filter(
+                    **{f"{field.attname}__in": names}
+                ).values_list(field.attname, flat=True)
+            )
+        return referenced
+
+    def delete(self, objects: List[StoredObject]) -> None:
+        if self.dry_run:
+            for obj in objects:
+                self.stdout.write(f"Orphaned: {obj.name}")
+            return
+
+        storage.delete_many(objects)
+        self.stdout.write(f"Deleted {len(objects)} orphaned objects")
+
+
+def is_rendition(match: Optional[re.Match]) -> bool:
+    return bool(match) and match["rendition"] != ORIGINAL_RENDITION
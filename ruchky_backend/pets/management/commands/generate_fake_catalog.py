@@ -0,0 +1,329 @@
+import random
+import time
+
+from datetime import timedelta
+from decimal import Decimal
+from itertools import batched
+from typing import Any, Iterable, List
+from uuid import UUID
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.utils import timezone
+from taggit.models import Tag
+
+from ruchky_backend.helpers.storage.paths import (
+    ORIGINAL_RENDITION,
+    content_addressed_name,
+    hash_name,
+)
+from ruchky_backend.pets.models import (
+    Breed,
+    ListingStatus,
+    Pet,
+    PetImage,
+    PetListing,
+    Sex,
+    Species,
+    UUIDTaggedItem,
+)
+from ruchky_backend.pets.search import update_search_docs
+from ruchky_backend.users.models import OrganizationProfile, User
+
+FAKE_EMAIL_DOMAIN = "fake.na-ruchky.test"
+
+NAMES = [
+    "Bella", "Luna", "Charlie", "Max", "Milo", "Daisy", "Rocky", "Simba",
+    "Nala", "Oscar", "Leo", "Coco", "Archie", "Ruby", "Teddy", "Lola",
+    "Barsik", "Murchyk", "Sirko", "Businka", "Ryzhyk", "Pukh", "Tisha", "Zhuzha",
+]  # fmt: skip
+LOCATIONS = [
+    "Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "Vinnytsia", "Poltava",
+    "Chernihiv", "Zhytomyr", "Uzhhorod", "Ivano-Frankivsk", "Ternopil",
+]  # fmt: skip
+TAGS = [
+    "friendly", "calm", "playful", "house-trained", "good-with-kids",
+    "good-with-cats", "good-with-dogs", "senior", "special-needs", "energetic",
+]  # fmt: skip
+LISTING_STATUSES = [
+    (ListingStatus.ACTIVE, 70),
+    (ListingStatus.ADOPTED, 15),
+    (ListingStatus.SOLD, 5),
+    (ListingStatus.EXPIRED, 7),
+    (ListingStatus.ARCHIVED, 3),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a deterministic synthetic catalog (organizations, users, "
+        "pets, images, tags and listings) for benchmarks. Meant to be run "
+        "once against an empty database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organizations",
+            type=int,
+            default=100,
+            help="Number of organizations, each with one user (default: 100)",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1000,
+            help="Number of individual users (default: 1000)",
+        )
+        parser.add_argument(
+            "--pets",
+            type=int,
+            default=10000,
+            help="Number of pets (default: 10000)",
+        )
+        parser.add_argument(
+            "--images-per-pet",
+            type=int,
+            default=5,
+            help="Number of images per pet (default: 5)",
+        )
+        parser.add_argument(
+            "--breeds",
+            type=int,
+            default=350,
+            help="Minimum size of the breed catalog, existing breeds are reused "
+            "(default: 350)",
+        )
+        parser.add_argument(
+            "--listing-ratio",
+            type=float,
+            default=0.8,
+            help="Share of pets that have a listing (default: 0.8)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of pets written per COPY batch (default: 10000)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed, the same seed generates the same catalog (default: 42)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        start_time = time.time()
+
+        breed_ids = self.create_breeds(options["breeds"])
+        owner_ids = self.create_owners(options["organizations"], options["users"])
+        tag_ids = self.create_tags()
+
+        self.pet_content_type_id = ContentType.objects.get_for_model(Pet).id
+        self.images_per_pet = options["images_per_pet"]
+        self.listing_ratio = options["listing_ratio"]
+
+        created = 0
+        for batch in batched(range(options["pets"]), options["batch_size"]):
+            batch_start = time.time()
+            self.create_pets(len(batch), breed_ids, owner_ids, tag_ids)
+            created += len(batch)
+            self.stdout.write(
+                f"Created {created}/{options['pets']} pets "
+                f"({len(batch) / (time.time() - batch_start):.0f} pets/s)"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {created} pets with {created * self.images_per_pet} "
+                f"images in {time.time() - start_time:.2f} seconds"
+            )
+        )
+
+    def uuid(self) -> UUID:
+        """Seeded UUID4, so ids are the same across runs"""
+        return UUID(int=self.rng.getrandbits(128), version=4)
+
+    def create_breeds(self, count: int) -> List[UUID]:
+        existing = Breed.objects.count()
+
+        new_breeds = [
+            Breed(
+                id=self.uuid(),
+                name=f"Synthetic Breed {i:04d}",
+                species=Species.DOG if i % 3 else Species.CAT,
+                life_span=f"{self.rng.randint(8, 12)} - {self.rng.randint(13, 18)} years",
+                weight=f"{self.rng.randint(2, 20)} - {self.rng.randint(21, 60)} kg",
+            )
+            for i in range(max(count - existing, 0))
+        ]
+        Breed.objects.bulk_create(new_breeds, batch_size=1000, ignore_conflicts=True)
+        self.stdout.write(f"Breed catalog: {existing} existing, {len(new_breeds)} new")
+
+        return list(Breed.objects.values_list("id", flat=True).order_by("id"))
+
+    def create_owners(self, organizations: int, users: int) -> List[UUID]:
+        # Unusable password, hashing it per user would dominate the runtime
+        password = make_password(None)
+
+        profiles = [
+            OrganizationProfile(
+                id=self.uuid(),
+                name=f"Shelter {i:05d}",
+                address=self.rng.choice(LOCATIONS),
+                is_charity=self.rng.random() < 0.6,
+            )
+            for i in range(organizations)
+        ]
+        OrganizationProfile.objects.bulk_create(profiles, batch_size=1000)
+
+        owners = [
+            User(
+                id=self.uuid(),
+                email=f"org-{i}@{FAKE_EMAIL_DOMAIN}",
+                password=password,
+                organization=profile,
+            )
+            for i, profile in enumerate(profiles)
+        ] + [
+            User(
+                id=self.uuid(),
+                email=f"user-{i}@{FAKE_EMAIL_DOMAIN}",
+                password=password,
+                first_name=self.rng.choice(NAMES),
+            )
+            for i in range(users)
+        ]
+        User.objects.bulk_create(owners, batch_size=1000)
+        self.stdout.write(
+            f"Created {organizations} organizations and {len(owners)} users"
+        )
+
+        return [owner.id for owner in owners]
+
+    def create_tags(self) -> List[int]:
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=name) for name in TAGS], ignore_conflicts=True
+        )
+        return list(Tag.objects.filter(name__in=TAGS).values_list("id", flat=True))
+
+    @transaction.atomic
+    def create_pets(
+        self,
+        count: int,
+        breed_ids: List[UUID],
+        owner_ids: List[UUID],
+        tag_ids: List[int],
+    ) -> None:
+        """
+        Writes one batch with COPY. Pets reference their first image as
+        profile picture, the deferred foreign key is checked on commit.
+        COPY sends no signals, the search documents of the batch are built
+        in the same transaction.
+        """
+        rng = self.rng
+        today = self.now.date()
+        pets, images, tagged_items, listings = [], [], [], []
+
+        for _ in range(count):
+            species = rng.choice(Species.values)
+            image_ids = [self.uuid() for _ in range(self.images_per_pet)]
+            created_at = self.now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+
+            pet = Pet(
+                id=self.uuid(),
+                created_at=created_at,
+                updated_at=created_at,
+                name=rng.choice(NAMES),
+                species=species,
+                breed_id=rng.choice(breed_ids) if rng.random() < 0.85 else None,
+                sex=rng.choice(Sex.values),
+                birth_date=today - timedelta(days=rng.randint(30, 15 * 365)),
+                location=rng.choice(LOCATIONS),
+                is_vaccinated=rng.random() < 0.7,
+                is_hypoallergenic=rng.random() < 0.1,
+                short_description=f"A lovely {species} looking for a home",
+                profile_picture_id=image_ids[0] if image_ids else None,
+                owner_id=rng.choice(owner_ids),
+            )
+            pets.append(pet)
+
+            for order, image_id in enumerate(image_ids):
+                name = content_addressed_name(
+                    "pet_image", hash_name(str(image_id)), ".jpg", ORIGINAL_RENDITION
+                )
+                images.append(
+                    PetImage(
+                        id=image_id,
+                        created_at=created_at,
+                        updated_at=created_at,
+                        pet_id=pet.id,
+                        image=name,
+                        order=order,
+                    )
+                )
+
+            for tag_id in rng.sample(tag_ids, rng.randint(0, min(3, len(tag_ids)))):
+                tagged_items.append(
+                    UUIDTaggedItem(
+                        object_id=pet.id,
+                        content_type_id=self.pet_content_type_id,
+                        tag_id=tag_id,
+                    )
+                )
+
+            if rng.random() < self.listing_ratio:
+                statuses, weights = zip(*LISTING_STATUSES)
+                listings.append(
+                    PetListing(
+                        id=self.uuid(),
+                        created_at=created_at,
+                        updated_at=created_at,
+                        pet_id=pet.id,
+                        title=f"{pet.name} is looking for a family",
+                        status=rng.choices(statuses, weights)[0],
+                        price=(
+                            Decimal(rng.randint(0, 400) * 50)
+                            if rng.random() < 0.5
+                            else None
+                        ),
+                        views_count=rng.randint(0, 5000),
+                    )
+                )
+
+        copy_objects(Pet, pets)
+        copy_objects(PetImage, images)
+        copy_objects(UUIDTaggedItem, tagged_items)
+        copy_objects(PetListing, listings)
+        update_search_docs(
+            PetListing.objects.filter(pk__in=[listing.id for listing in listings])
+        )
+
+
+def copy_objects(model: type[models.Model], objects: Iterable[models.Model]) -> None:
+    """
+    Inserts unsaved model instances with COPY, which is several times faster
+    than bulk_create. Fields are prepared like a regular save, except that
+    auto_now values are taken as given.
+    """
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if not (isinstance(field, models.AutoField) and field.primary_key)
+    ]
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+            for obj in objects:
+                copy.write_row(
+                    [
+                        field.get_db_prep_save(getattr(obj, field.attname), connection)
+                        for field in fields
+                    ]
+                )
@@ -0,0 +1,195 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import batched
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from ruchky_backend.helpers.db.models import get_media_fields
+from ruchky_backend.helpers.storage import storage
+from ruchky_backend.helpers.storage.paths import is_content_addressed
+from ruchky_backend.pets.archive import rename_card_media
+from ruchky_backend.pets.models import (
+    ArchivedPetImage,
+    ArchivedPetListing,
+    Breed,
+    Pet,
+    PetImage,
+    PetListing,
+)
+from ruchky_backend.pets.search import update_search_docs
+
+# Lookups of the pets whose listing cards show objects of a media model
+CARD_PET_LOOKUPS = {PetImage: "images__in", Breed: "breed__in"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrites stored media objects to content addressed names and updates "
+        "the database references in bulk"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows updated per bulk update (default: 500)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Number of parallel storage copies (default: 8)",
+        )
+        parser.add_argument(
+            "--delete-old",
+            action="store_true",
+            help="Delete the legacy objects once the references are updated",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many objects would be rewritten",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.batch_size = options["batch_size"]
+        self.workers = options["workers"]
+        self.delete_old = options["delete_old"]
+        self.dry_run = options["dry_run"]
+        # Legacy name -> content addressed name of the objects rewritten so far
+        self.renamed: Dict[str, str] = {}
+
+        start_time = time.time()
+        total_rewritten = 0
+        total_failed = 0
+
+        for model, field in get_media_fields():
+            rewritten, failed = self.migrate_field(model, field)
+            total_rewritten += rewritten
+            total_failed += failed
+
+        action = "Would rewrite" if self.dry_run else "Rewrote"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {total_rewritten} objects ({total_failed} failed) "
+                f"in {time.time() - start_time:.2f} seconds"
+            )
+        )
+
+    def migrate_field(
+        self, model: type[models.Model], field: models.FileField
+    ) -> Tuple[int, int]:
+        """
+        Rewrites all legacy objects referenced by a single file field
+        """
+        label = f"{model._meta.label}.{field.name}"
+        queryset = (
+            model._default_manager.exclude(**{f"{field.attname}__isnull": True})
+            .exclude(**{field.attname: ""})
+            .only("pk", field.attname)
+            .order_by("pk")
+        )
+
+        rewritten = 0
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for batch in batched(
+                queryset.iterator(chunk_size=self.batch_size), self.batch_size
+            ):
+                pending = [
+                    obj
+                    for obj in batch
+                    if not is_content_addressed(getattr(obj, field.attname).name)
+                ]
+                if not pending:
+                    continue
+
+                if self.dry_run:
+                    rewritten += len(pending)
+                    continue
+
+                old_names = [getattr(obj, field.attname).name for obj in pending]
+                new_names = list(pool.map(self.rewrite_object, old_names))
+
+                updated = []
+                for obj, old_name, new_name in zip(pending, old_names, new_names):
+                    if new_name is None:
+                        failed += 1
+                        continue
+                    setattr(obj, field.attname, new_name)
+                    updated.append((obj, old_name))
+                    self.renamed[old_name] = new_name
+
+                # bulk_update sends no signals, the cards are rebuilt before
+                # the legacy objects they reference can be deleted
+                with transaction.atomic():
+                    model._default_manager.bulk_update(
+                        [obj for obj, _ in updated], [field.attname]
+                    )
+                    self.update_cards(model, [obj.pk for obj, _ in updated])
+                    self.update_archived_cards(model, [obj.pk for obj, _ in updated])
+                rewritten += len(updated)
+
+                if self.delete_old:
+                    list(pool.map(storage.delete, [name for _, name in updated]))
+
+                self.stdout.write(f"{label}: rewrote {rewritten} objects so far...")
+
+        self.stdout.write(f"{label}: {rewritten} rewritten, {failed} failed")
+        return rewritten, failed
+
+    def update_cards(self, model: type[models.Model], pks: List[Any]) -> None:
+        """
+        Rebuilds the search documents of the listings showing the objects
+        """
+        lookup = CARD_PET_LOOKUPS.get(model)
+        if lookup is not None:
+            update_search_docs(
+                PetListing.objects.filter(pet__in=Pet.objects.filter(**{lookup: pks}))
+            )
+
+    def update_archived_cards(self, model: type[models.Model], pks: List[Any]) -> None:
+        """
+        Rewrites the storage names in the card snapshots of the archived
+        listings showing the objects
+        """
+        if model is ArchivedPetImage:
+            archived = ArchivedPetListing.objects.filter(
+                pk__in=ArchivedPetImage.objects.filter(pk__in=pks).values("listing_id")
+            )
+        elif model is Breed:
+            archived = ArchivedPetListing.objects.filter(
+                card__pet__breed_info__id__in=[str(pk) for pk in pks]
+            )
+        else:
+            return
+
+        changed = []
+        for listing in archived.only("pk", "card").order_by("pk"):
+            card = rename_card_media(listing.card, self.renamed)
+            if card != listing.card:
+                listing.card = card
+                changed.append(listing)
+        ArchivedPetListing.objects.bulk_update(changed, ["card"])
+
+    def rewrite_object(self, name: str) -> Optional[str]:
+        """
+        Copies a legacy object to its content addressed name and returns it
+        """
+        # Objects referenced by several rows (e.g. a pet image and its
+        # archived copy) are copied once, --delete-old may have removed them
+        if name in self.renamed:
+            return self.renamed[name]
+        try:
+            with storage.open(name, "rb") as content:
+                return storage.save(name, content)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(f"Missing object, skipping: {name}"))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Error rewriting {name}: {str(e)}"))
+        return None
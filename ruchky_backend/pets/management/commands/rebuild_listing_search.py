@@ -0,0 +1,47 @@
+import time
+
+from itertools import batched
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ruchky_backend.pets.models import PetListing
+from ruchky_backend.pets.search import update_search_docs
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the listing search documents (ListingSearchDoc) of every "
+        "listing, e.g. after generate_fake_catalog or other bulk loads that "
+        "skip signals"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of listings rebuilt per transaction (default: 500)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = options["batch_size"]
+        start_time = time.time()
+        total = PetListing.objects.count()
+
+        written = 0
+        ids = PetListing.objects.order_by("pk").values_list("pk", flat=True)
+        for batch in batched(ids.iterator(chunk_size=batch_size), batch_size):
+            with transaction.atomic():
+                written += update_search_docs(
+                    PetListing.objects.filter(pk__in=batch), batch_size
+                )
+            self.stdout.write(f"Rebuilt {written}/{total} search documents...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {written} search documents "
+                f"in {time.time() - start_time:.2f} seconds"
+            )
+        )
@@ -1,19 +1,29 @@
 import os
 import asyncio
 import aiohttp
+import hashlib
+import io
+import json
 import time
-import queue
+import tarfile
+import tempfile
 import threading
 import random
 import logging
 
-from typing import Dict, List, Any, Optional, Set
+from asgiref.sync import async_to_sync, sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Set, Tuple
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.core.files.base import ContentFile
 from django.db import transaction
+from django.utils import timezone
 
-from ruchky_backend.pets.models import Breed, Species
+from ruchky_backend.helpers.db.models import generate_filename
+from ruchky_backend.helpers.storage import storage
+from ruchky_backend.pets.models import Breed, PetListing, Species
+from ruchky_backend.pets.search import update_search_docs
 
 # Get API keys from environment variables
 CATS_API_KEY = os.getenv("CATS_API_KEY", "")
@@ -23,6 +33,34 @@ DOGS_API_KEY = os.getenv("DOGS_API_KEY", "")
 MIN_REQUEST_INTERVAL = 0.2  # Minimum time between requests in seconds
 MAX_REQUEST_INTERVAL = 0.5  # Maximum time between requests in seconds (adds jitter)
 
+# Snapshot archive layout: breeds.json plus the images they reference
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BREEDS_FILE = "breeds.json"
+SNAPSHOT_IMAGES_DIR = "images"
+SNAPSHOT_KEY_FIELDS = ["name", "species"]
+SNAPSHOT_FIELDS = SNAPSHOT_KEY_FIELDS + [
+    "description",
+    "life_span",
+    "weight",
+    "origin",
+    "api_id",
+    "source_hash",
+    "source_image_url",
+]
+SNAPSHOT_IMAGE_FIELDS = ["image", "image_hover"]
+
+# Breed fields taken from the APIs, a change in any of them updates the row
+SYNCED_FIELDS = [
+    "name",
+    "species",
+    "api_id",
+    "description",
+    "origin",
+    "life_span",
+    "weight",
+]
+DEFAULT_CHECKPOINT = os.path.join(tempfile.gettempdir(), "seed_breeds_checkpoint.json")
+
 
 class Command(BaseCommand):
     help = "Seeds the database with dog and cat breeds with images from online APIs"
@@ -50,6 +88,11 @@ class Command(BaseCommand):
             default=3,
             help="Maximum number of concurrent API requests (default: 3)",
         )
+        parser.add_argument(
+            "--storage-workers",
+            type=int,
+            help="Number of parallel image uploads (default: --concurrency)",
+        )
         parser.add_argument(
             "--rate-limit",
             type=float,
@@ -59,13 +102,38 @@ class Command(BaseCommand):
         parser.add_argument(
             "--verbose",
             action="store_true",
-            help="Enable verbose output for debugging",
+            help="Enable verbose output for debugging, including image "
+            "pipeline throughput",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip breeds that an interrupted run already synced",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            metavar="PATH",
+            default=DEFAULT_CHECKPOINT,
+            help=f"File that tracks synced breeds (default: {DEFAULT_CHECKPOINT})",
+        )
+        parser.add_argument(
+            "--export-snapshot",
+            metavar="PATH",
+            help="Write the breeds in the database and their images to a "
+            "compressed archive instead of seeding",
+        )
+        parser.add_argument(
+            "--from-snapshot",
+            metavar="PATH",
+            help="Seed from an archive written by --export-snapshot instead of "
+            "the online APIs",
         )
 
     def handle(self, *args: Any, **options: Any) -> None:
         self.skip_images = options.get("skip_images", False)
         self.retry_count = options.get("retry", 3)
         self.concurrency = options.get("concurrency", 3)
+        self.storage_workers = options.get("storage_workers") or self.concurrency
         self.rate_limit = options.get("rate-limit", 0.3)
         self.verbose = options.get("verbose", False)
 
@@ -82,15 +150,11 @@ class Command(BaseCommand):
         MIN_REQUEST_INTERVAL = self.rate_limit
         MAX_REQUEST_INTERVAL = self.rate_limit * 1.5
 
-        # Create image processing queue and shared state
-        self.image_queue = queue.Queue()
-        self.processing_complete = threading.Event()
+        # Image pipeline counters
         self.successful_images = 0
         self.failed_images = 0
 
-        # Create rate limiting locks for each API
-        self.cat_api_lock = asyncio.Lock()
-        self.dog_api_lock = asyncio.Lock()
+        # Rate limiting state for each API, the locks are created per event loop
         self.last_cat_request_time = 0
         self.last_dog_request_time = 0
 
@@ -103,53 +167,48 @@ class Command(BaseCommand):
             f"concurrency: {self.concurrency}, rate limit: {self.rate_limit}s"
         )
 
+        if options["clear"] and options["resume"]:
+            raise CommandError("--clear and --resume cannot be used together")
+
+        if options["export_snapshot"]:
+            self.export_snapshot(options["export_snapshot"])
+            return
+
         # Clear existing breeds if needed (synchronous operation)
         if options.get("clear", False):
             with transaction.atomic():
                 Breed.objects.all().delete()
                 self.stdout.write(self.style.SUCCESS("Cleared existing breeds"))
 
-        # Fetch breed data using async operations
-        loop = asyncio.get_event_loop()
-        dog_breeds_data, cat_breeds_data = loop.run_until_complete(
-            self.fetch_breed_data()
-        )
+        if options["from_snapshot"]:
+            count = self.load_snapshot(options["from_snapshot"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Successfully loaded {count} breeds from snapshot in {time.time() - total_start_time:.2f} seconds"
+                )
+            )
+            return
 
-        # Start image processing thread if needed
-        if not self.skip_images:
-            self.logger.info("Starting image processing thread")
-            self.processing_complete.clear()
-            image_processor = threading.Thread(
-                target=self.process_image_queue, daemon=True
+        self.checkpoint = Checkpoint(options["checkpoint"], resume=options["resume"])
+        if self.checkpoint:
+            self.stdout.write(
+                f"Resuming, {len(self.checkpoint)} breeds were already synced"
             )
-            image_processor.start()
+
+        # Fetch breed data using async operations
+        dog_breeds_data, cat_breeds_data = async_to_sync(self.fetch_breed_data)()
 
         # Process dog breeds (synchronous database operations)
         dog_start_time = time.time()
         dog_breeds = []
         if dog_breeds_data:
-            # Create breeds
-            dog_breeds = self.create_dog_breeds(dog_breeds_data)
+            # Create and update breeds
+            dog_breeds = self.sync_breeds(Species.DOG, dog_breeds_data)
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Successfully created {len(dog_breeds)} dog breeds in {time.time() - dog_start_time:.2f} seconds"
+                    f"Successfully synced dog breeds in {time.time() - dog_start_time:.2f} seconds"
                 )
             )
-
-            # Download images if needed
-            if not self.skip_images and dog_breeds:
-                image_start_time = time.time()
-                self.stdout.write(f"Downloading {len(dog_breeds)} dog breed images...")
-
-                # Download images asynchronously and queue for processing
-                loop.run_until_complete(self.download_dog_breed_images(dog_breeds))
-
-                # Print status
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Queued dog breed images in {time.time() - image_start_time:.2f} seconds"
-                    )
-                )
         else:
             self.stdout.write(self.style.ERROR("Failed to fetch dog breeds data"))
 
@@ -157,67 +216,59 @@ class Command(BaseCommand):
         cat_start_time = time.time()
         cat_breeds = []
         if cat_breeds_data:
-            # Create breeds
-            cat_breeds = self.create_cat_breeds(cat_breeds_data)
+            # Create and update breeds
+            cat_breeds = self.sync_breeds(Species.CAT, cat_breeds_data)
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Successfully created {len(cat_breeds)} cat breeds in {time.time() - cat_start_time:.2f} seconds"
+                    f"Successfully synced cat breeds in {time.time() - cat_start_time:.2f} seconds"
                 )
             )
-
-            # Download images if needed
-            if not self.skip_images and cat_breeds:
-                image_start_time = time.time()
-                self.stdout.write(f"Downloading {len(cat_breeds)} cat breed images...")
-
-                # Download images asynchronously and queue for processing
-                loop.run_until_complete(self.download_cat_breed_images(cat_breeds))
-
-                # Print status
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Queued cat breed images in {time.time() - image_start_time:.2f} seconds"
-                    )
-                )
         else:
             self.stdout.write(self.style.ERROR("Failed to fetch cat breeds data"))
 
-        # Wait for all image processing to complete
+        # Download and store images for both species in one pipeline
         if not self.skip_images and (dog_breeds or cat_breeds):
-            try:
-                total_count = len(dog_breeds) + len(cat_breeds)
-                self.stdout.write(
-                    f"Waiting for {total_count} images to be processed..."
-                )
-
-                # Wait for the queue to be empty and all processing to complete
-                waiting_start = time.time()
-
-                # Wait for the queue to be processed
-                while (
-                    not self.image_queue.empty() and time.time() - waiting_start < 300
-                ):  # 5 minute timeout
-                    self.stdout.write(
-                        f"Queue size: {self.image_queue.qsize()}. Waiting..."
-                    )
-                    time.sleep(5)
+            image_start_time = time.time()
+            self.stdout.write(
+                f"Downloading {len(dog_breeds) + len(cat_breeds)} breed images..."
+            )
 
-                # Signal thread to complete
-                self.processing_complete.set()
+            async_to_sync(self.run_image_pipeline)(dog_breeds + cat_breeds)
 
-                # Wait for thread to join if it exists
-                if image_processor.is_alive():
-                    image_processor.join(timeout=10)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Image processing complete: {self.successful_images} successful, "
+                    f"{self.failed_images} failed in {time.time() - image_start_time:.2f} seconds"
+                )
+            )
 
+        # Keep the checkpoint for --resume unless every breed was processed.
+        # Failed images don't count, breeds without one are retried next run
+        if (
+            dog_breeds_data
+            and cat_breeds_data
+            and all(
+                self.checkpoint.is_processed(
+                    checkpoint_key(breed["species"], breed["api_id"])
+                )
+                for breed in dog_breeds_data + cat_breeds_data
+            )
+        ):
+            self.checkpoint.delete()
+            if self.checkpoint.failed:
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Image processing complete: {self.successful_images} successful, {self.failed_images} failed"
+                    self.style.WARNING(
+                        f"Images of {len(self.checkpoint.failed)} breeds failed, "
+                        "they are downloaded again on the next run"
                     )
                 )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Error waiting for image processing: {str(e)}")
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Not all breeds were synced, run again with --resume to continue "
+                    f"(checkpoint: {self.checkpoint.path})"
                 )
+            )
 
         # Total dog and cat breeds
         total_breeds = len(self.get_existing_breeds(Species.DOG)) + len(
@@ -231,59 +282,165 @@ class Command(BaseCommand):
             )
         )
 
-    def process_image_queue(self):
-        """Worker thread to process saved images in a synchronous context"""
-        self.logger.info("Image processor thread started")
+    def export_snapshot(self, path: str) -> None:
+        """
+        Writes all breeds and their images to a gzipped tar archive that
+        --from-snapshot can load without network access
+        """
+        breeds = list(Breed.objects.order_by("species", "name"))
+        image_names = sorted(
+            {
+                getattr(breed, field).name
+                for breed in breeds
+                for field in SNAPSHOT_IMAGE_FIELDS
+                if getattr(breed, field)
+            }
+        )
 
-        while not (self.image_queue.empty() and self.processing_complete.is_set()):
+        def read_image(name: str) -> Optional[bytes]:
             try:
-                # Get next item from queue with a timeout to allow checking for completion
-                try:
-                    breed, image_content, file_name = self.image_queue.get(timeout=2)
-                    self.logger.debug(
-                        f"Processing image for {breed.name}, queue size: {self.image_queue.qsize()}"
-                    )
-                except queue.Empty:
-                    # Check if we should exit
-                    if self.processing_complete.is_set():
-                        self.logger.info("Processing complete flag set, exiting thread")
-                        break
-                    continue
+                with storage.open(name, "rb") as f:
+                    return f.read()
+            except Exception as e:
+                self.logger.warning(f"Could not read image {name}: {str(e)}")
+                return None
+
+        # Stored names are content addressed, so their base names are unique
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            images = {
+                name: content
+                for name, content in zip(
+                    image_names, executor.map(read_image, image_names)
+                )
+                if content is not None
+            }
+
+        snapshot = {"version": SNAPSHOT_VERSION, "breeds": []}
+        for breed in breeds:
+            breed_data = {field: getattr(breed, field) for field in SNAPSHOT_FIELDS}
+            breed_data["is_active"] = breed.is_active
+            for field in SNAPSHOT_IMAGE_FIELDS:
+                name = getattr(breed, field).name
+                breed_data[field] = (
+                    f"{SNAPSHOT_IMAGES_DIR}/{os.path.basename(name)}"
+                    if name in images
+                    else None
+                )
+            snapshot["breeds"].append(breed_data)
 
-                try:
-                    # Save image to breed (synchronous operation)
-                    breed.image.save(file_name, ContentFile(image_content), save=True)
-                    self.successful_images += 1
+        with tarfile.open(path, "w:gz") as archive:
+            add_to_archive(
+                archive, SNAPSHOT_BREEDS_FILE, json.dumps(snapshot, indent=2).encode()
+            )
+            for name, content in images.items():
+                add_to_archive(
+                    archive,
+                    f"{SNAPSHOT_IMAGES_DIR}/{os.path.basename(name)}",
+                    content,
+                )
 
-                    # Print progress every 5 images
-                    if self.successful_images % 5 == 0:
-                        self.stdout.write(
-                            f"Saved {self.successful_images} images so far..."
-                        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exported {len(breeds)} breeds and {len(images)} images to {path}"
+            )
+        )
 
-                except Exception as e:
-                    self.failed_images += 1
-                    self.logger.error(f"Error saving image for {breed.name}: {str(e)}")
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"Error saving image for {breed.name}: {str(e)}"
-                        )
+    def load_snapshot(self, path: str) -> int:
+        """
+        Upserts breeds from a snapshot archive in a single query, uploading
+        their images in parallel first. Returns the number of breeds loaded.
+        """
+        try:
+            with tarfile.open(path, "r:gz") as archive:
+                snapshot = json.load(archive.extractfile(SNAPSHOT_BREEDS_FILE))
+                if snapshot.get("version") != SNAPSHOT_VERSION:
+                    raise CommandError(
+                        f"Unsupported snapshot version: {snapshot.get('version')}"
                     )
 
-                # Mark task as done
-                self.image_queue.task_done()
+                image_paths = set()
+                if not self.skip_images:
+                    image_paths = {
+                        breed_data[field]
+                        for breed_data in snapshot["breeds"]
+                        for field in SNAPSHOT_IMAGE_FIELDS
+                        if breed_data.get(field)
+                    }
+                images = {
+                    image_path: archive.extractfile(image_path).read()
+                    for image_path in sorted(image_paths)
+                }
+        except (OSError, KeyError, tarfile.TarError, ValueError) as e:
+            raise CommandError(f"Could not read snapshot {path}: {str(e)}")
+
+        upload_start_time = time.time()
+        stored_names = self.upload_images(images)
+        if images:
+            self.stdout.write(
+                f"Uploaded {len(stored_names)} of {len(images)} images in {time.time() - upload_start_time:.2f} seconds"
+            )
+
+        breeds = []
+        for breed_data in snapshot["breeds"]:
+            breed = Breed(
+                **{field: breed_data.get(field) for field in SNAPSHOT_FIELDS},
+                is_active=breed_data.get("is_active", True),
+            )
+            for field in SNAPSHOT_IMAGE_FIELDS:
+                setattr(breed, field, stored_names.get(breed_data.get(field)))
+            breeds.append(breed)
+
+        update_fields = [
+            field for field in SNAPSHOT_FIELDS if field not in SNAPSHOT_KEY_FIELDS
+        ] + ["is_active", "updated_at"]
+        if not self.skip_images:
+            update_fields += SNAPSHOT_IMAGE_FIELDS
+
+        # Existing breeds are updated in place on the unique_breed_per_species
+        # constraint, so loading the same snapshot twice is a no-op. The
+        # upsert sends no signals, the cards showing them are rebuilt.
+        with transaction.atomic():
+            Breed.objects.bulk_create(
+                breeds,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=SNAPSHOT_KEY_FIELDS,
+                update_fields=update_fields,
+            )
+            update_search_docs(
+                PetListing.objects.filter(
+                    pet__breed__name__in={breed.name for breed in breeds}
+                )
+            )
+        return len(breeds)
+
+    def upload_images(self, images: Dict[str, bytes]) -> Dict[str, str]:
+        """
+        Saves images to the storage with a pool of --concurrency threads.
+        Returns the stored name of every image that was uploaded.
+        """
 
+        def upload(image_path: str) -> Optional[str]:
+            name = generate_filename(Breed(), os.path.basename(image_path))
+            try:
+                return storage.save(name, ContentFile(images[image_path]))
             except Exception as e:
-                self.logger.error(f"Unexpected error in image processor: {str(e)}")
+                self.logger.error(f"Error uploading image {image_path}: {str(e)}")
+                return None
 
-        self.logger.info(
-            f"Image processor thread ending. Successful: {self.successful_images}, Failed: {self.failed_images}"
-        )
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return {
+                image_path: name
+                for image_path, name in zip(images, executor.map(upload, images))
+                if name is not None
+            }
 
     async def fetch_breed_data(self) -> tuple:
         """
         Asynchronously fetches both dog and cat breed data
         """
+        self.create_rate_limit_locks()
+
         async with aiohttp.ClientSession() as session:
             # Create semaphore for concurrency control
             semaphore = asyncio.Semaphore(self.concurrency)
@@ -367,6 +524,8 @@ class Command(BaseCommand):
                 if "weight" in breed_data and "metric" in breed_data["weight"]:
                     breed["weight"] = breed_data["weight"]["metric"]
 
+                breed["image_url"] = (breed_data.get("image") or {}).get("url", "")
+
                 breeds_to_create.append(breed)
 
             # Sort breeds by name for consistency
@@ -383,7 +542,7 @@ class Command(BaseCommand):
     ) -> List[Dict[str, Any]]:
         """
         Fetches cat breeds from TheCatAPI
-        Returns raw API response data for processing
+        Returns processed breed data ready for creation
         """
         self.stdout.write("Fetching cat breeds from TheCatAPI...")
         try:
@@ -407,11 +566,10 @@ class Command(BaseCommand):
                         return []
 
                     try:
-                        cat_breeds = await response.json()
+                        cat_breeds_data = await response.json()
                         self.logger.debug(
-                            f"Received {len(cat_breeds) if isinstance(cat_breeds, list) else 'non-list'} cat breeds"
+                            f"Received {len(cat_breeds_data) if isinstance(cat_breeds_data, list) else 'non-list'} cat breeds"
                         )
-                        return cat_breeds
                     except Exception as e:
                         self.stdout.write(
                             self.style.ERROR(
@@ -420,10 +578,53 @@ class Command(BaseCommand):
                         )
                         return []
 
+            if not cat_breeds_data or not isinstance(cat_breeds_data, list):
+                self.stdout.write(self.style.ERROR("Invalid response from TheCatAPI"))
+                return []
+
+            breeds_to_create = []
+
+            for breed_data in cat_breeds_data:
+                breed_id = breed_data.get("id")
+                breed_name = breed_data.get("name")
+
+                if not breed_id or not breed_name:
+                    continue
+
+                breed = {
+                    "name": breed_name,
+                    "species": Species.CAT,
+                    "api_id": str(breed_id),
+                }
+                if "description" in breed_data:
+                    breed["description"] = breed_data["description"]
+
+                if "origin" in breed_data:
+                    breed["origin"] = breed_data["origin"]
+
+                if "life_span" in breed_data:
+                    breed["life_span"] = breed_data["life_span"]
+
+                if "weight" in breed_data and "metric" in breed_data["weight"]:
+                    breed["weight"] = breed_data["weight"]["metric"]
+
+                breed["image_url"] = (breed_data.get("image") or {}).get("url", "")
+
+                breeds_to_create.append(breed)
+
+            breeds_to_create.sort(key=lambda x: x["name"])
+
+            return breeds_to_create
+
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error fetching cat breeds: {str(e)}"))
             return []
 
+    def create_rate_limit_locks(self) -> None:
+        """Asyncio locks are bound to the event loop they are first used in"""
+        self.cat_api_lock = asyncio.Lock()
+        self.dog_api_lock = asyncio.Lock()
+
     async def _respect_rate_limit(self, lock: asyncio.Lock, is_dog_api: bool = False):
         """
         Ensures rate limits are respected for API requests
@@ -448,309 +649,293 @@ class Command(BaseCommand):
                     )
                     await asyncio.sleep(wait_time)
 
-    def create_dog_breeds(
-        self, breeds_data: List[Dict[str, Any]]
+    def sync_breeds(
+        self, species: str, breeds_data: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """
-        Creates dog breeds in the database and returns a list of created breeds with their API IDs
-        This is a synchronous operation using Django's ORM
+        Creates new breeds and updates the changed ones, one query each.
+        Returns the breeds whose image is missing or whose source image
+        changed, with the info needed to download it.
         """
-        breeds_created = []
-        existing_breeds = self.get_existing_breeds(Species.DOG)
-
-        # Create breeds in a transaction for consistency
-        with transaction.atomic():
-            for breed_data in breeds_data:
-                breed_name = breed_data["name"]
-                api_id = breed_data.pop("api_id", "")
-
-                # Skip if breed already exists
-                if breed_name in existing_breeds:
-                    self.stdout.write(
-                        f"Dog breed '{breed_name}' already exists, skipping."
-                    )
-                    continue
-
-                # Create breed instance
-                breed = Breed(**breed_data, is_active=True)
-
-                # Save the breed to generate an ID (required for image association)
-                breed.save()
-
-                self.logger.debug(f"Created dog breed: {breed_name} (ID: {breed.id})")
-
-                # Add breed and API ID to the list for image downloads
-                breeds_created.append({"breed": breed, "api_id": api_id})
+        existing_breeds = {
+            breed.name: breed for breed in Breed.objects.filter(species=species)
+        }
+        to_create, to_update, needs_image, synced = [], [], [], []
+
+        for breed_data in breeds_data:
+            key = checkpoint_key(species, breed_data["api_id"])
+            if key in self.checkpoint:
+                continue
+
+            source_hash = content_hash(breed_data)
+            breed = existing_breeds.get(breed_data["name"])
+            if breed is None:
+                breed = Breed(is_active=True)
+                to_create.append(breed)
+            elif breed.source_hash != source_hash:
+                to_update.append(breed)
+
+            if breed.source_hash != source_hash:
+                for field in SYNCED_FIELDS:
+                    setattr(breed, field, breed_data.get(field))
+                breed.source_hash = source_hash
+
+            # Without a URL in the list the image is found by search, then
+            # source_image_url holds the URL an earlier run resolved
+            image_url = breed_data.get("image_url", "")
+            if not self.skip_images and (
+                not breed.image or (image_url and breed.source_image_url != image_url)
+            ):
+                needs_image.append(
+                    {"breed": breed, "api_id": breed.api_id, "image_url": image_url}
+                )
+            else:
+                synced.append(key)
 
-        return breeds_created
+        # bulk_update skips auto_now
+        now = timezone.now()
+        for breed in to_update:
+            breed.updated_at = now
 
-    def create_cat_breeds(
-        self, breeds_data: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """
-        Creates cat breeds in the database and returns a list of created breeds with their API IDs
-        This is a synchronous operation using Django's ORM
-        """
-        breeds_created = []
-        existing_breeds = self.get_existing_breeds(Species.CAT)
-
-        # Create breeds in a transaction for consistency
+        # bulk_update sends no signals, new breeds have no listings yet
         with transaction.atomic():
-            for breed_data in breeds_data:
-                breed_name = breed_data.get("name", "")
-                breed_id = breed_data.get("id", "")
-
-                if not breed_name or not breed_id:
-                    continue
-
-                # Skip if breed already exists
-                if breed_name in existing_breeds:
-                    self.stdout.write(
-                        f"Cat breed '{breed_name}' already exists, skipping."
-                    )
-                    continue
-
-                breed_info = {
-                    "name": breed_name,
-                    "species": Species.CAT,
-                    "is_active": True,
-                }
-
-                if "description" in breed_data:
-                    breed_info["description"] = breed_data["description"]
-
-                if "origin" in breed_data:
-                    breed_info["origin"] = breed_data["origin"]
-
-                if "life_span" in breed_data:
-                    breed_info["life_span"] = breed_data["life_span"]
-
-                if "weight" in breed_data and "metric" in breed_data["weight"]:
-                    breed_info["weight"] = breed_data["weight"]["metric"]
-
-                breed = Breed(**breed_info)
-
-                # Save the breed to generate an ID (required for image association)
-                breed.save()
-
-                self.logger.debug(f"Created cat breed: {breed_name} (ID: {breed.id})")
-
-                # Add breed and API ID to the list for image downloads
-                breeds_created.append({"breed": breed, "api_id": breed_id})
+            Breed.objects.bulk_create(to_create, batch_size=1000)
+            Breed.objects.bulk_update(
+                to_update,
+                SYNCED_FIELDS + ["source_hash", "updated_at"],
+                batch_size=1000,
+            )
+            update_search_docs(PetListing.objects.filter(pet__breed__in=to_update))
+        self.checkpoint.add(*synced)
 
-        return breeds_created
+        self.stdout.write(
+            f"{species.capitalize()} breeds: {len(to_create)} created, "
+            f"{len(to_update)} updated, "
+            f"{len(breeds_data) - len(to_create) - len(to_update)} unchanged"
+        )
+        return needs_image
 
-    async def download_dog_breed_images(self, breeds: List[Dict[str, Any]]) -> None:
-        """
-        Downloads images for dog breeds asynchronously and adds them to the processing queue
+    async def run_image_pipeline(self, breeds: List[Dict[str, Any]]) -> None:
         """
-        self.logger.info(f"Starting to download {len(breeds)} dog breed images")
-
-        async with aiohttp.ClientSession() as session:
-            # Create semaphore for concurrency control
-            semaphore = asyncio.Semaphore(self.concurrency)
-
-            # Create tasks for downloading images
-            tasks = []
-            for breed_info in breeds:
-                tasks.append(
-                    self._download_dog_image(
-                        session, semaphore, breed_info["breed"], breed_info["api_id"]
-                    )
-                )
+        Downloads breed images and stores them.
 
-            # Execute all tasks concurrently
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Log the results
-            exceptions = [r for r in results if isinstance(r, Exception)]
-            if exceptions:
-                self.logger.warning(
-                    f"Got {len(exceptions)} exceptions while downloading dog images"
-                )
-                for e in exceptions[:5]:  # Log first 5 exceptions
-                    self.logger.warning(f"Download exception: {str(e)}")
-
-        self.logger.info("Completed downloading dog breed images")
-
-    async def download_cat_breed_images(self, breeds: List[Dict[str, Any]]) -> None:
-        """
-        Downloads images for cat breeds asynchronously and adds them to the processing queue
+        Downloads (at most --concurrency at a time) feed a bounded queue that
+        --storage-workers writers drain. When storage is slower than the
+        APIs the downloads wait for room in the queue, so at most
+        concurrency + 3 * storage workers images are held in memory
+        (downloading, queued and being uploaded).
         """
-        self.logger.info(f"Starting to download {len(breeds)} cat breed images")
-
-        async with aiohttp.ClientSession() as session:
-            # Create semaphore for concurrency control
-            semaphore = asyncio.Semaphore(self.concurrency)
+        self.create_rate_limit_locks()
+        self.download_stage = StageCounter("download")
+        self.storage_stage = StageCounter("storage")
+
+        image_queue = asyncio.Queue(maxsize=self.storage_workers * 2)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # Held from the download until the image is queued, unlike the
+        # request semaphore which is released after each request
+        download_slots = asyncio.Semaphore(self.concurrency)
+
+        with ThreadPoolExecutor(max_workers=self.storage_workers) as executor:
+            writers = [
+                asyncio.create_task(self.store_images(image_queue, executor))
+                for _ in range(self.storage_workers)
+            ]
+            reporter = (
+                asyncio.create_task(self.report_progress(image_queue))
+                if self.verbose
+                else None
+            )
 
-            # Create tasks for downloading images
-            tasks = []
-            for breed_info in breeds:
-                tasks.append(
-                    self._download_cat_image(
-                        session, semaphore, breed_info["breed"], breed_info["api_id"]
+            async with aiohttp.ClientSession() as session:
+                await asyncio.gather(
+                    *(
+                        self.download_image(
+                            session, semaphore, download_slots, image_queue, breed_info
+                        )
+                        for breed_info in breeds
                     )
                 )
 
-            # Execute all tasks concurrently
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Let the writers drain the queue, then stop them
+            await image_queue.join()
+            for task in writers + [reporter]:
+                if task:
+                    task.cancel()
+            await asyncio.gather(*writers, return_exceptions=True)
 
-            # Log the results
-            exceptions = [r for r in results if isinstance(r, Exception)]
-            if exceptions:
-                self.logger.warning(
-                    f"Got {len(exceptions)} exceptions while downloading cat images"
-                )
-                for e in exceptions[:5]:  # Log first 5 exceptions
-                    self.logger.warning(f"Download exception: {str(e)}")
-
-        self.logger.info("Completed downloading cat breed images")
+        if self.verbose:
+            self.write_stage_stats()
 
-    async def _download_dog_image(
+    async def download_image(
         self,
         session: aiohttp.ClientSession,
         semaphore: asyncio.Semaphore,
-        breed: Breed,
-        api_id: str,
+        download_slots: asyncio.Semaphore,
+        image_queue: asyncio.Queue,
+        breed_info: Dict[str, Any],
     ) -> None:
         """
-        Downloads an image for a dog breed and adds it to the queue for processing
+        Downloads an image for a breed and waits for room in the queue to
+        hand it over to the storage writers
         """
-        try:
-            self.logger.debug(
-                f"Downloading image for dog breed: {breed.name} (ID: {api_id})"
-            )
+        breed = breed_info["breed"]
+        get_image = (
+            self._get_dog_breed_image
+            if breed.species == Species.DOG
+            else self._get_cat_breed_image
+        )
+        async with download_slots:
+            start_time = time.time()
+
+            try:
+                self.logger.debug(
+                    f"Downloading image for {breed.species} breed: {breed.name} (ID: {breed_info['api_id']})"
+                )
+                image = await get_image(
+                    session, semaphore, breed_info["api_id"], breed_info["image_url"]
+                )
+            except Exception as e:
+                image = None
+                self.logger.error(f"Error downloading image for {breed.name}: {str(e)}")
 
-            # Get image content
-            image_content = await self._get_dog_breed_image(session, semaphore, api_id)
-            if not image_content:
-                self.logger.warning(
-                    f"Could not get image content for dog breed {breed.name}"
+            if not image:
+                self.download_stage.fail()
+                self.failed_images += 1
+                self.checkpoint.fail(checkpoint_key(breed.species, breed.api_id))
+                self.stdout.write(
+                    self.style.WARNING(f"Could not get image content for {breed.name}")
                 )
                 return
 
-            # Add to processing queue (will be handled by synchronous thread)
+            self.download_stage.add(len(image[1]), time.time() - start_time)
             file_name = f"{breed.name.lower().replace(' ', '_')}.jpg"
-            self.logger.debug(f"Adding dog image for {breed.name} to processing queue")
-            self.image_queue.put((breed, image_content, file_name))
-            self.logger.debug(
-                f"Current queue size after adding dog image: {self.image_queue.qsize()}"
-            )
+            await image_queue.put((breed, *image, file_name))
 
-        except Exception as e:
-            self.logger.error(f"Error downloading image for dog {breed.name}: {str(e)}")
-            self.stdout.write(
-                self.style.WARNING(
-                    f"Error downloading image for {breed.name}: {str(e)}"
-                )
-            )
-
-    async def _download_cat_image(
-        self,
-        session: aiohttp.ClientSession,
-        semaphore: asyncio.Semaphore,
-        breed: Breed,
-        api_id: str,
+    async def store_images(
+        self, image_queue: asyncio.Queue, executor: ThreadPoolExecutor
     ) -> None:
         """
-        Downloads an image for a cat breed and adds it to the queue for processing
+        Storage writer: uploads queued images in the thread pool, then saves
+        the breed. ORM calls run in the thread that called async_to_sync.
         """
-        try:
-            self.logger.debug(
-                f"Downloading image for cat breed: {breed.name} (ID: {api_id})"
-            )
+        loop = asyncio.get_running_loop()
 
-            # Get image content
-            image_content = await self._get_cat_breed_image(session, semaphore, api_id)
-            if not image_content:
-                self.logger.warning(
-                    f"Could not get image content for cat breed {breed.name}"
+        while True:
+            breed, image_url, image_content, file_name = await image_queue.get()
+            start_time = time.time()
+            try:
+                # Only sets the field name, the breed is saved below
+                await loop.run_in_executor(
+                    executor,
+                    lambda: breed.image.save(
+                        file_name, ContentFile(image_content), save=False
+                    ),
                 )
-                return
+                breed.source_image_url = image_url
+                await sync_to_async(self.save_breed_image)(breed)
 
-            # Add to processing queue (will be handled by synchronous thread)
-            file_name = f"{breed.name.lower().replace(' ', '_')}.jpg"
-            self.logger.debug(f"Adding cat image for {breed.name} to processing queue")
-            self.image_queue.put((breed, image_content, file_name))
-            self.logger.debug(
-                f"Current queue size after adding cat image: {self.image_queue.qsize()}"
-            )
-
-        except Exception as e:
-            self.logger.error(f"Error downloading image for cat {breed.name}: {str(e)}")
-            self.stdout.write(
-                self.style.WARNING(
-                    f"Error downloading image for {breed.name}: {str(e)}"
+                self.storage_stage.add(len(image_content), time.time() - start_time)
+                self.successful_images += 1
+                if self.successful_images % 5 == 0:
+                    self.stdout.write(
+                        f"Saved {self.successful_images} images so far..."
+                    )
+            except Exception as e:
+                self.storage_stage.fail()
+                self.failed_images += 1
+                self.checkpoint.fail(checkpoint_key(breed.species, breed.api_id))
+                self.logger.error(f"Error saving image for {breed.name}: {str(e)}")
+                self.stdout.write(
+                    self.style.WARNING(f"Error saving image for {breed.name}: {str(e)}")
                 )
-            )
+            finally:
+                image_queue.task_done()
+
+    def save_breed_image(self, breed: Breed) -> None:
+        breed.save(update_fields=["image", "source_image_url", "updated_at"])
+        self.checkpoint.add(checkpoint_key(breed.species, breed.api_id))
+
+    async def report_progress(self, image_queue: asyncio.Queue) -> None:
+        while True:
+            await asyncio.sleep(5)
+            self.write_stage_stats(queue_size=image_queue.qsize())
+
+    def write_stage_stats(self, queue_size: Optional[int] = None) -> None:
+        queued = "" if queue_size is None else f" | queued: {queue_size}"
+        self.stdout.write(f"{self.download_stage} | {self.storage_stage}{queued}")
 
     async def _get_dog_breed_image(
         self,
         session: aiohttp.ClientSession,
         semaphore: asyncio.Semaphore,
         breed_id: str,
-    ) -> Optional[bytes]:
+        image_url: str = "",
+    ) -> Optional[Tuple[str, bytes]]:
         """
-        Fetches an image for a dog breed from TheDogAPI
-        Returns the image content as bytes if successful, None otherwise
+        Fetches an image for a dog breed from TheDogAPI, searching for one
+        unless the breed list already included its URL
+        Returns the image URL and content if successful, None otherwise
         """
         headers = {"x-api-key": DOGS_API_KEY} if DOGS_API_KEY else {}
 
         for attempt in range(self.retry_count):
             try:
-                # Respect rate limits
-                await self._respect_rate_limit(self.dog_api_lock, True)
-
-                self.logger.debug(f"Fetching image for dog breed ID: {breed_id}")
-                async with semaphore:
-                    # Use the same approach as for cats
-                    async with session.get(
-                        "https://api.thedogapi.com/v1/images/search",
-                        params={"breed_ids": breed_id, "limit": 1},
-                        headers=headers,
-                    ) as response:
-                        # Update last request time
-                        self.last_dog_request_time = time.time()
-
-                        if response.status == 429:  # Too Many Requests
-                            self.logger.warning(
-                                f"Rate limit hit for dog breed {breed_id}. Waiting longer..."
-                            )
-                            # Exponential backoff
-                            await asyncio.sleep(MIN_REQUEST_INTERVAL * (2**attempt))
-                            continue
-
-                        if response.status != 200:
-                            self.logger.warning(
-                                f"Failed to fetch dog image for {breed_id}: Status {response.status}"
-                            )
-                            await asyncio.sleep(1)
-                            continue
-
-                        try:
-                            data = await response.json()
-                            self.logger.debug(
-                                f"Dog image search response for {breed_id}: {data}"
-                            )
-                        except Exception as e:
-                            self.logger.error(
-                                f"Error parsing dog image response for {breed_id}: {str(e)}"
-                            )
-                            await asyncio.sleep(1)
-                            continue
-
-                if not data or not isinstance(data, list) or len(data) == 0:
-                    self.logger.warning(f"No results returned for dog breed {breed_id}")
-                    await asyncio.sleep(1)
-                    continue
-
-                image_url = data[0].get("url")
                 if not image_url:
-                    self.logger.warning(
-                        f"No image URL in response for dog breed {breed_id}"
-                    )
-                    await asyncio.sleep(1)
-                    continue
+                    # Respect rate limits
+                    await self._respect_rate_limit(self.dog_api_lock, True)
+
+                    self.logger.debug(f"Fetching image for dog breed ID: {breed_id}")
+                    async with semaphore:
+                        # Use the same approach as for cats
+                        async with session.get(
+                            "https://api.thedogapi.com/v1/images/search",
+                            params={"breed_ids": breed_id, "limit": 1},
+                            headers=headers,
+                        ) as response:
+                            # Update last request time
+                            self.last_dog_request_time = time.time()
+
+                            if response.status == 429:  # Too Many Requests
+                                self.logger.warning(
+                                    f"Rate limit hit for dog breed {breed_id}. Waiting longer..."
+                                )
+                                # Exponential backoff
+                                await asyncio.sleep(MIN_REQUEST_INTERVAL * (2**attempt))
+                                continue
+
+                            if response.status != 200:
+                                self.logger.warning(
+                                    f"Failed to fetch dog image for {breed_id}: Status {response.status}"
+                                )
+                                await asyncio.sleep(1)
+                                continue
+
+                            try:
+                                data = await response.json()
+                                self.logger.debug(
+                                    f"Dog image search response for {breed_id}: {data}"
+                                )
+                            except Exception as e:
+                                self.logger.error(
+                                    f"Error parsing dog image response for {breed_id}: {str(e)}"
+                                )
+                                await asyncio.sleep(1)
+                                continue
+
+                    if not data or not isinstance(data, list) or len(data) == 0:
+                        self.logger.warning(
+                            f"No results returned for dog breed {breed_id}"
+                        )
+                        await asyncio.sleep(1)
+                        continue
+
+                    image_url = data[0].get("url")
+                    if not image_url:
+                        self.logger.warning(
+                            f"No image URL in response for dog breed {breed_id}"
+                        )
+                        await asyncio.sleep(1)
+                        continue
 
                 # Respect rate limits before downloading the image
                 await self._respect_rate_limit(self.dog_api_lock, True)
@@ -773,7 +958,7 @@ class Command(BaseCommand):
                         self.logger.debug(
                             f"Downloaded dog image for {breed_id}, size: {len(image_content)} bytes"
                         )
-                        return image_content
+                        return image_url, image_content
 
             except Exception as e:
                 self.logger.error(
@@ -791,68 +976,73 @@ class Command(BaseCommand):
         session: aiohttp.ClientSession,
         semaphore: asyncio.Semaphore,
         breed_id: str,
-    ) -> Optional[bytes]:
+        image_url: str = "",
+    ) -> Optional[Tuple[str, bytes]]:
         """
-        Fetches a representative image for a cat breed from TheCatAPI
-        Returns the image content as bytes if successful, None otherwise
+        Fetches a representative image for a cat breed from TheCatAPI,
+        searching for one unless the breed list already included its URL
+        Returns the image URL and content if successful, None otherwise
         """
         headers = {"x-api-key": CATS_API_KEY} if CATS_API_KEY else {}
 
         for attempt in range(self.retry_count):
             try:
-                # Respect rate limits
-                await self._respect_rate_limit(self.cat_api_lock)
-
-                self.logger.debug(f"Fetching image for cat breed ID: {breed_id}")
-                async with semaphore:
-                    # Use the exact URL and parameters as requested
-                    async with session.get(
-                        "https://api.thecatapi.com/v1/images/search",
-                        params={"breed_ids": breed_id, "limit": 1},
-                        headers=headers,
-                    ) as response:
-                        # Update last request time
-                        self.last_cat_request_time = time.time()
-
-                        if response.status == 429:  # Too Many Requests
-                            self.logger.warning(
-                                f"Rate limit hit for cat breed {breed_id}. Waiting longer..."
-                            )
-                            # Exponential backoff
-                            await asyncio.sleep(MIN_REQUEST_INTERVAL * (2**attempt))
-                            continue
-
-                        if response.status != 200:
-                            self.logger.warning(
-                                f"Failed to fetch cat image for {breed_id}: Status {response.status}"
-                            )
-                            await asyncio.sleep(1)
-                            continue
-
-                        try:
-                            data = await response.json()
-                            self.logger.debug(
-                                f"Cat image search response for {breed_id}: {data}"
-                            )
-                        except Exception as e:
-                            self.logger.error(
-                                f"Error parsing cat image response for {breed_id}: {str(e)}"
-                            )
-                            await asyncio.sleep(1)
-                            continue
-
-                if not data or not isinstance(data, list) or len(data) == 0:
-                    self.logger.warning(f"No results returned for cat breed {breed_id}")
-                    await asyncio.sleep(1)
-                    continue
-
-                image_url = data[0].get("url")
                 if not image_url:
-                    self.logger.warning(
-                        f"No image URL in response for cat breed {breed_id}"
-                    )
-                    await asyncio.sleep(1)
-                    continue
+                    # Respect rate limits
+                    await self._respect_rate_limit(self.cat_api_lock)
+
+                    self.logger.debug(f"Fetching image for cat breed ID: {breed_id}")
+                    async with semaphore:
+                        # Use the exact URL and parameters as requested
+                        async with session.get(
+                            "https://api.thecatapi.com/v1/images/search",
+                            params={"breed_ids": breed_id, "limit": 1},
+                            headers=headers,
+                        ) as response:
+                            # Update last request time
+                            self.last_cat_request_time = time.time()
+
+                            if response.status == 429:  # Too Many Requests
+                                self.logger.warning(
+                                    f"Rate limit hit for cat breed {breed_id}. Waiting longer..."
+                                )
+                                # Exponential backoff
+                                await asyncio.sleep(MIN_REQUEST_INTERVAL * (2**attempt))
+                                continue
+
+                            if response.status != 200:
+                                self.logger.warning(
+                                    f"Failed to fetch cat image for {breed_id}: Status {response.status}"
+                                )
+                                await asyncio.sleep(1)
+                                continue
+
+                            try:
+                                data = await response.json()
+                                self.logger.debug(
+                                    f"Cat image search response for {breed_id}: {data}"
+                                )
+                            except Exception as e:
+                                self.logger.error(
+                                    f"Error parsing cat image response for {breed_id}: {str(e)}"
+                                )
+                                await asyncio.sleep(1)
+                                continue
+
+                    if not data or not isinstance(data, list) or len(data) == 0:
+                        self.logger.warning(
+                            f"No results returned for cat breed {breed_id}"
+                        )
+                        await asyncio.sleep(1)
+                        continue
+
+                    image_url = data[0].get("url")
+                    if not image_url:
+                        self.logger.warning(
+                            f"No image URL in response for cat breed {breed_id}"
+                        )
+                        await asyncio.sleep(1)
+                        continue
 
                 # Respect rate limits before downloading the image
                 await self._respect_rate_limit(self.cat_api_lock)
@@ -875,7 +1065,7 @@ class Command(BaseCommand):
                         self.logger.debug(
                             f"Downloaded cat image for {breed_id}, size: {len(image_content)} bytes"
                         )
-                        return image_content
+                        return image_url, image_content
 
             except Exception as e:
                 self.logger.error(
@@ -893,3 +1083,100 @@ class Command(BaseCommand):
         Returns a set of existing breed names for the specified species
         """
         return set(Breed.objects.filter(species=species).values_list("name", flat=True))
+
+
+class StageCounter:
+    """Throughput of one image pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self.items = 0
+        self.failed = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+
+    def add(self, size: int, duration: float) -> None:
+        self.items += 1
+        self.bytes += size
+        self.busy_seconds += duration
+
+    def fail(self) -> None:
+        self.failed += 1
+
+    def __str__(self) -> str:
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        average = self.busy_seconds / self.items if self.items else 0
+        return (
+            f"{self.name}: {self.items} done, {self.failed} failed, "
+            f"{self.items / elapsed:.1f} images/s, "
+            f"{self.bytes / elapsed / 1024:.0f} KiB/s, avg {average:.2f}s"
+        )
+
+
+def content_hash(breed_data: Dict[str, Any]) -> str:
+    """Hash of the synced fields, to detect breeds that changed upstream"""
+    values = {field: breed_data.get(field) for field in SYNCED_FIELDS}
+    return hashlib.blake2b(
+        json.dumps(values, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+
+
+def checkpoint_key(species: str, api_id: str) -> str:
+    return f"{species}:{api_id}"
+
+
+class Checkpoint:
+    """
+    Keys of the breeds that are fully synced (row and image), saved after
+    every change so that an interrupted run can be resumed.
+
+    Breeds whose image failed are only kept in memory: the run can still
+    finish, and a resumed run retries them.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.processed: Set[str] = set()
+        self.failed: Set[str] = set()
+
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                self.processed = set(json.load(f)["processed"])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.processed
+
+    def __len__(self) -> int:
+        return len(self.processed)
+
+    def fail(self, key: str) -> None:
+        with self.lock:
+            self.failed.add(key)
+
+    def is_processed(self, key: str) -> bool:
+        """Whether the breed was synced or its image failed in this run"""
+        return key in self.processed or key in self.failed
+
+    def add(self, *keys: str) -> None:
+        if not keys:
+            return
+        with self.lock:
+            self.processed.update(keys)
+            # Write and rename, so a crash never leaves a partial file
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump({"processed": sorted(self.processed)}, f)
+            os.replace(temp_path, self.path)
+
+    def delete(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def add_to_archive(archive: tarfile.TarFile, name: str, content: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mtime = int(time.time())
+    archive.addfile(info, io.BytesIO(content))
@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pets", "0007_pet_is_hypoallergenic"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="breed",
+            name="api_id",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="Breed ID in TheDogAPI or TheCatAPI",
+                max_length=50,
+                verbose_name="API ID",
+            ),
+        ),
+        migrations.AddField(
+            model_name="breed",
+            name="source_hash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=32
+            ),
+        ),
+        migrations.AddField(
+            model_name="breed",
+            name="source_image_url",
+            field=models.URLField(
+                blank=True, default="", editable=False, max_length=500
+            ),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pets", "0008_breed_sync_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ListingSearchDoc",
+            fields=[
+                (
+                    "listing",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_doc",
+                        serialize=False,
+                        to="pets.petlisting",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "Active"),
+                            ("sold", "Sold"),
+                            ("adopted", "Adopted"),
+                            ("expired", "Expired"),
+                            ("archived", "Archived"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "price",
+                    models.DecimalField(decimal_places=2, max_digits=10, null=True),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("pet_name", models.CharField(max_length=100)),
+                (
+                    "species",
+                    models.CharField(
+                        choices=[("dog", "Dog"), ("cat", "Cat")], max_length=20
+                    ),
+                ),
+                (
+                    "sex",
+                    models.CharField(
+                        choices=[("f", "Female"), ("m", "Male")], max_length=1
+                    ),
+                ),
+                (
+                    "breed_name",
+                    models.CharField(blank=True, default="", max_length=100),
+                ),
+                ("birth_date", models.DateField()),
+                ("location", models.CharField(blank=True, max_length=100, null=True)),
+                ("is_vaccinated", models.BooleanField()),
+                ("is_hypoallergenic", models.BooleanField()),
+                ("owner_id", models.UUIDField()),
+                ("organization_id", models.UUIDField(null=True)),
+                (
+                    "organization_name",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                ("is_charity", models.BooleanField(null=True)),
+                ("card", models.JSONField()),
+            ],
+            options={
+                "verbose_name": "Listing Search Document",
+                "verbose_name_plural": "Listing Search Documents",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "-created_at", "-listing"],
+                        name="pets_listin_status_1bab44_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "active")),
+                        fields=["-created_at", "-listing"],
+                        name="pets_lsd_active_created_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "active")),
+                        fields=["price"],
+                        name="pets_lsd_active_price_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "active")),
+                        fields=["species", "sex", "-created_at", "-listing"],
+                        name="pets_lsd_active_species_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "active")),
+                        fields=["birth_date"],
+                        name="pets_lsd_active_birth_date_idx",
+                    ),
+                    models.Index(
+                        fields=["owner_id"], name="pets_listin_owner_i_5d0ae2_idx"
+                    ),
+                    models.Index(
+                        fields=["organization_id"],
+                        name="pets_listin_organiz_5cbd24_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
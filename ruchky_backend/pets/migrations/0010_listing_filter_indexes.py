@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:26
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking the tables against writes
+    atomic = False
+
+    dependencies = [
+        ("pets", "0009_listing_search_doc"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="pet",
+            index=models.Index(
+                fields=["species", "sex", "birth_date"],
+                name="pets_pet_species_7fbdc6_idx",
+            ),
+        ),
+    ]
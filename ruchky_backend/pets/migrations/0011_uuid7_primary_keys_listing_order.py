@@ -0,0 +1,64 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:32
+
+import ruchky_backend.helpers.db.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pets", "0010_listing_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="breed",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="pet",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="petimage",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="petlisting",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="petsociallink",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:43
+
+import django.core.files.storage
+import django.db.models.deletion
+import ruchky_backend.helpers.db.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pets", "0011_uuid7_primary_keys_listing_order"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedPetListing",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(editable=False, primary_key=True, serialize=False),
+                ),
+                ("title", models.CharField(max_length=100, verbose_name="Title")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "Active"),
+                            ("sold", "Sold"),
+                            ("adopted", "Adopted"),
+                            ("expired", "Expired"),
+                            ("archived", "Archived"),
+                        ],
+                        max_length=20,
+                        verbose_name="Listing Status",
+                    ),
+                ),
+                (
+                    "price",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Price",
+                    ),
+                ),
+                ("views_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(verbose_name="Created At")),
+                ("updated_at", models.DateTimeField(verbose_name="Updated At")),
+                (
+                    "archived_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Archived At"),
+                ),
+                ("card", models.JSONField()),
+                (
+                    "pet",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_listings",
+                        to="pets.pet",
+                        verbose_name="Pet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archived Pet Listing",
+                "verbose_name_plural": "Archived Pet Listings",
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedPetImage",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=ruchky_backend.helpers.db.models.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "image",
+                    models.ImageField(
+                        storage=django.core.files.storage.FileSystemStorage(),
+                        upload_to=ruchky_backend.helpers.db.models.generate_filename,
+                        verbose_name="Image",
+                    ),
+                ),
+                (
+                    "order",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Display Order"
+                    ),
+                ),
+                (
+                    "caption",
+                    models.CharField(
+                        blank=True, max_length=100, null=True, verbose_name="Caption"
+                    ),
+                ),
+                (
+                    "listing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="images",
+                        to="pets.archivedpetlisting",
+                        verbose_name="Listing",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Archived Pet Image",
+                "verbose_name_plural": "Archived Pet Images",
+                "ordering": ["order"],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:45
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking the tables against writes
+    atomic = False
+
+    dependencies = [
+        ("pets", "0012_listing_archive"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="petlisting",
+            index=models.Index(
+                condition=models.Q(("status", "active")),
+                fields=["created_at"],
+                name="pets_pl_active_created_idx",
+            ),
+        ),
+    ]
@@ -78,6 +78,22 @@ class Breed(UUIDMixin, DateTimeMixin):
 
     is_active = models.BooleanField(_("Active"), default=True)
 
+    # Filled by the seed_breeds command to sync incrementally
+    api_id = models.CharField(
+        _("API ID"),
+        max_length=50,
+        blank=True,
+        default="",
+        editable=False,
+        help_text=_("Breed ID in TheDogAPI or TheCatAPI"),
+    )
+    source_hash = models.CharField(
+        max_length=32, blank=True, default="", editable=False
+    )
+    source_image_url = models.URLField(
+        max_length=500, blank=True, default="", editable=False
+    )
+
     class Meta:
         verbose_name = _("Breed")
         verbose_name_plural = _("Breeds")
@@ -137,6 +153,9 @@ class Pet(UUIDMixin, DateTimeMixin):
 
     tags = TaggableManager(through=UUIDTaggedItem)
 
+    class Meta:
+        indexes = [models.Index(fields=["species", "sex", "birth_date"])]
+
     def __str__(self) -> str:
         """Returns a formatted string representation of the pet."""
         base = f"{self.name} ({self.get_species_display()}"
@@ -243,6 +262,16 @@ class PetListing(UUIDMixin, DateTimeMixin):
     )
     views_count = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Oldest active listings first, for expire_listings
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status=ListingStatus.ACTIVE),
+                name="pets_pl_active_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Listing for {self.pet.name} [{self.get_status_display()}]"
 
@@ -260,3 +289,153 @@ class PetListing(UUIDMixin, DateTimeMixin):
 
     def is_archived(self):
         return self.status == ListingStatus.ARCHIVED
+
+
+class ListingSearchDoc(models.Model):
+    """
+    Denormalized copy of a listing for the listing list: every column it
+    filters or sorts on, so queries hit one narrow table, and the listing
+    serialized with PetListingSchema (card).
+
+    Kept up to date by signals once a change is committed, see
+    pets/signals.py. Rebuild it with the rebuild_listing_search command
+    after bulk loads that skip signals (COPY, bulk_create, bulk_update) and
+    after a failed update, which is only logged.
+
+    Image fields of the card hold storage names, URLs are resolved when it
+    is served.
+    """
+
+    listing = models.OneToOneField(
+        PetListing,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_doc",
+    )
+    status = models.CharField(max_length=20, choices=ListingStatus.choices)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    pet_name = models.CharField(max_length=100)
+    species = models.CharField(max_length=20, choices=Species.choices)
+    sex = models.CharField(max_length=1, choices=Sex.choices)
+    breed_name = models.CharField(max_length=100, blank=True, default="")
+    birth_date = models.DateField()
+    location = models.CharField(max_length=100, blank=True, null=True)
+    is_vaccinated = models.BooleanField()
+    is_hypoallergenic = models.BooleanField()
+
+    owner_id = models.UUIDField()
+    organization_id = models.UUIDField(null=True)
+    organization_name = models.CharField(max_length=255, blank=True, default="")
+    # Null for owners without an organization
+    is_charity = models.BooleanField(null=True)
+
+    card = models.JSONField()
+
+    class Meta:
+        verbose_name = _("Listing Search Document")
+        verbose_name_plural = _("Listing Search Documents")
+        indexes = [
+            models.Index(fields=["status", "-created_at", "-listing"]),
+            # Almost every query lists active listings only, partial indexes
+            # leave out the growing tail of closed ones
+            models.Index(
+                fields=["-created_at", "-listing"],
+                condition=models.Q(status=ListingStatus.ACTIVE),
+                name="pets_lsd_active_created_idx",
+            ),
+            models.Index(
+                fields=["price"],
+                condition=models.Q(status=ListingStatus.ACTIVE),
+                name="pets_lsd_active_price_idx",
+            ),
+            models.Index(
+                fields=["species", "sex", "-created_at", "-listing"],
+                condition=models.Q(status=ListingStatus.ACTIVE),
+                name="pets_lsd_active_species_idx",
+            ),
+            models.Index(
+                fields=["birth_date"],
+                condition=models.Q(status=ListingStatus.ACTIVE),
+                name="pets_lsd_active_birth_date_idx",
+            ),
+            models.Index(fields=["owner_id"]),
+            models.Index(fields=["organization_id"]),
+        ]
+
+    def __str__(self):
+        return f"Search document for {self.pet_name} [{self.status}]"
+
+
+class ArchivedPetListing(models.Model):
+    """
+    A closed listing moved out of PetListing by the archive_listings
+    command, so the hot table only holds listings that are still served
+    in lists. It keeps the listing id, the detail endpoint falls back to
+    the card snapshot stored here.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    # The pet may be listed again or deleted after the listing is archived
+    pet = models.ForeignKey(
+        Pet,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="archived_listings",
+        verbose_name=_("Pet"),
+    )
+    title = models.CharField(_("Title"), max_length=100)
+    status = models.CharField(
+        _("Listing Status"), max_length=20, choices=ListingStatus.choices
+    )
+    price = models.DecimalField(
+        _("Price"), max_digits=10, decimal_places=2, blank=True, null=True
+    )
+    views_count = models.PositiveIntegerField(default=0)
+    # Copied from the listing
+    created_at = models.DateTimeField(_("Created At"))
+    updated_at = models.DateTimeField(_("Updated At"))
+    archived_at = models.DateTimeField(_("Archived At"), auto_now_add=True)
+    # PetListingSchema at the time of archiving, with storage names in place
+    # of URLs (see pets/search.py build_card)
+    card = models.JSONField()
+
+    class Meta:
+        verbose_name = _("Archived Pet Listing")
+        verbose_name_plural = _("Archived Pet Listings")
+
+    def __str__(self):
+        return f"Archived listing {self.title} [{self.get_status_display()}]"
+
+
+class ArchivedPetImage(UUIDMixin):
+    """
+    Images of a pet when its listing was archived. The card references
+    them, keeping them here keeps the stored objects from being collected
+    by gc_media when the pet's images change.
+    """
+
+    listing = models.ForeignKey(
+        ArchivedPetListing,
+        on_delete=models.CASCADE,
+        related_name="images",
+        verbose_name=_("Listing"),
+    )
+    image = models.ImageField(
+        verbose_name=_("Image"),
+        upload_to=generate_filename,
+        storage=storage,
+    )
+    order = models.PositiveIntegerField(_("Display Order"), default=0)
+    caption = models.CharField(_("Caption"), max_length=100, blank=True, null=True)
+
+    class Meta:
+        ordering = ["order"]
+        verbose_name = _("Archived Pet Image")
+        verbose_name_plural = _("Archived Pet Images")
+
+    def __str__(self):
+        return f"{self.listing.title} - Image {self.order}"
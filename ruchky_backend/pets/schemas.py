@@ -1,11 +1,14 @@
-from typing import Any, Dict, List, Optional
+from typing import Annotated, Any, Dict, List, Optional
 from uuid import UUID
 
 from ninja import ModelSchema, Schema
+from ninja.schema import DjangoGetter
 from django.utils.encoding import (
     force_str,
 )
+from pydantic import ConfigDict, PlainSerializer, SerializationInfo, model_validator
 
+from ruchky_backend.helpers.storage import storage
 from ruchky_backend.pets.models import (
     Breed,
     Pet,
@@ -16,9 +19,42 @@ from ruchky_backend.pets.models import (
 )
 
 
-class BreedSchema(ModelSchema):
-    image_url: Optional[str] = None
-    image_hover_url: Optional[str] = None
+def serialize_storage_url(name: str, info: SerializationInfo) -> str:
+    """
+    Storage names are turned into URLs when serialized, except for stored
+    cards (context {"storage_names": True}): signed URLs expire, so cards
+    keep the names and get fresh URLs when they are served.
+    """
+    if (info.context or {}).get("storage_names"):
+        return name
+    return storage.url(name)
+
+
+# Storage name of a file, serialized as its URL
+StorageUrl = Annotated[str, PlainSerializer(serialize_storage_url)]
+
+
+class StoredSchema(Schema):
+    """
+    Schema that can also be validated from its stored dump (a card), e.g.
+    ListingSearchDoc.card. Resolvers only apply to model instances, a dump
+    already holds the values they returned.
+    """
+
+    # Dumps hold foreign keys by field name (owner), not attribute (owner_id)
+    model_config = ConfigDict(from_attributes=True, validate_by_name=True)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _run_root_validator(cls, values, handler, info):
+        if isinstance(values, dict):
+            return handler(values)
+        return handler(DjangoGetter(values, cls, info.context))
+
+
+class BreedSchema(StoredSchema, ModelSchema):
+    image_url: Optional[StorageUrl] = None
+    image_hover_url: Optional[StorageUrl] = None
 
     class Meta:
         model = Breed
@@ -35,16 +71,16 @@ class BreedSchema(ModelSchema):
 
     @staticmethod
     def resolve_image_url(obj: Breed) -> Optional[str]:
-        """Return the URL for the breed image if available"""
+        """Return the breed image if available, served as its URL"""
         if obj.image:
-            return obj.image.url
+            return obj.image.name
         return None
 
     @staticmethod
     def resolve_image_hover_url(obj: Breed) -> Optional[str]:
-        """Return the URL for the breed hover image if available"""
+        """Return the breed hover image if available, served as its URL"""
         if obj.image_hover:
-            return obj.image_hover.url
+            return obj.image_hover.name
         return None
 
 
@@ -54,11 +90,17 @@ class PetSocialLinkSchema(ModelSchema):
         fields = ["platform", "url"]
 
 
-class PetImageSchema(ModelSchema):
+class PetImageSchema(StoredSchema, ModelSchema):
+    image: StorageUrl
+
     class Meta:
         model = PetImage
         fields = ["id", "image", "order", "caption", "created_at"]
 
+    @staticmethod
+    def resolve_image(obj: PetImage) -> str:
+        return obj.image.name
+
 
 class PetImageCreateSchema(Schema):
     image: str  # base64 encoded image will be handled in the API
@@ -71,7 +113,7 @@ class PetImageUpdateSchema(Schema):
     caption: Optional[str] = None
 
 
-class PetSchema(ModelSchema):
+class PetSchema(StoredSchema, ModelSchema):
     """
     Schema for the Pet model with both breed reference and basic breed information.
     """
@@ -80,7 +122,7 @@ class PetSchema(ModelSchema):
     images: List[PetImageSchema]
     tags: List[str] = []
     profile_picture_id: Optional[str] = None
-    profile_picture_url: Optional[str] = None
+    profile_picture_url: Optional[StorageUrl] = None
 
     # Breed-related fields
     breed_id: Optional[UUID] = None
@@ -108,7 +150,8 @@ class PetSchema(ModelSchema):
 
     @staticmethod
     def resolve_tags(obj: Pet) -> List[str]:
-        return obj.tags.names()
+        # Uses the prefetched tags, names() would query for every pet
+        return [tag.name for tag in obj.tags.all()]
 
     @staticmethod
     def resolve_profile_picture_id(obj: Pet) -> Optional[str]:
@@ -119,7 +162,7 @@ class PetSchema(ModelSchema):
     @staticmethod
     def resolve_profile_picture_url(obj: Pet) -> Optional[str]:
         if obj.profile_picture:
-            return obj.profile_picture.image.url
+            return obj.profile_picture.image.name
         return None
 
     @staticmethod
@@ -154,7 +197,7 @@ class BreedFilterParams(Schema):
     weight_range: Optional[str] = None
 
 
-class PetListingSchema(ModelSchema):
+class PetListingSchema(StoredSchema, ModelSchema):
     pet: PetSchema
 
     class Meta:
@@ -0,0 +1,104 @@
+import json
+
+from itertools import batched
+from typing import Any, Dict, Iterable
+from uuid import UUID
+
+from django.db.models import F, Func, JSONField, QuerySet, Value
+from ninja.responses import NinjaJSONEncoder
+
+from ruchky_backend.pets.models import ListingSearchDoc, PetListing
+from ruchky_backend.pets.schemas import PetListingSchema
+
+SEARCH_DOC_FIELDS = [
+    field.name
+    for field in ListingSearchDoc._meta.concrete_fields
+    if not field.primary_key
+]
+
+
+def get_listings_queryset(listings: QuerySet[PetListing]) -> QuerySet[PetListing]:
+    """Listings with everything a search document needs"""
+    return listings.select_related(
+        "pet",
+        "pet__owner",
+        "pet__owner__organization",
+        "pet__breed",
+        "pet__profile_picture",
+    ).prefetch_related("pet__social_links", "pet__images", "pet__tags")
+
+
+def encode(value: Any) -> Any:
+    """Encodes the value like API responses"""
+    return json.loads(json.dumps(value, cls=NinjaJSONEncoder))
+
+
+def build_card(listing: PetListing) -> Dict[str, Any]:
+    """
+    Listing serialized with PetListingSchema, with storage names in place of
+    URLs. Served by validating it with PetListingSchema again.
+    """
+    schema = PetListingSchema.from_orm(listing)
+    return encode(schema.model_dump(context={"storage_names": True}))
+
+
+def build_search_doc(listing: PetListing) -> ListingSearchDoc:
+    pet = listing.pet
+    organization = pet.owner.organization
+
+    return ListingSearchDoc(
+        listing=listing,
+        status=listing.status,
+        price=listing.price,
+        created_at=listing.created_at,
+        updated_at=listing.updated_at,
+        pet_name=pet.name,
+        species=pet.species,
+        sex=pet.sex,
+        breed_name=pet.breed.name if pet.breed else "",
+        birth_date=pet.birth_date,
+        location=pet.location,
+        is_vaccinated=pet.is_vaccinated,
+        is_hypoallergenic=pet.is_hypoallergenic,
+        owner_id=pet.owner_id,
+        organization_id=organization.id if organization else None,
+        organization_name=organization.name if organization else "",
+        is_charity=organization.is_charity if organization else None,
+        card=build_card(listing),
+    )
+
+
+def update_search_docs(listings: QuerySet[PetListing], batch_size: int = 500) -> int:
+    """
+    Creates or updates the search documents of the listings, returns how
+    many were written
+    """
+    listings = get_listings_queryset(listings).order_by("pk")
+    written = 0
+    for batch in batched(listings.iterator(chunk_size=batch_size), batch_size):
+        ListingSearchDoc.objects.bulk_create(
+            [build_search_doc(listing) for listing in batch],
+            update_conflicts=True,
+            unique_fields=["listing"],
+            update_fields=SEARCH_DOC_FIELDS,
+        )
+        written += len(batch)
+    return written
+
+
+def update_search_doc_fields(listing_ids: Iterable[UUID], **fields: Any) -> int:
+    """
+    Sets listing fields (e.g. status) on the search documents and their
+    cards in a single statement, for bulk changes of listings that skip
+    signals. Returns how many were updated.
+    """
+    card = Func(
+        F("card"),
+        Value(encode(fields), output_field=JSONField()),
+        template="%(expressions)s",
+        arg_joiner=" || ",
+        output_field=JSONField(),
+    )
+    return ListingSearchDoc.objects.filter(listing_id__in=listing_ids).update(
+        card=card, **fields
+    )
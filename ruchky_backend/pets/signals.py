@@ -0,0 +1,127 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from ruchky_backend.pets.models import (
+    Breed,
+    ListingStatus,
+    Pet,
+    PetImage,
+    PetListing,
+    PetSocialLink,
+)
+from ruchky_backend.pets.search import update_search_doc_fields, update_search_docs
+from ruchky_backend.users.models import OrganizationProfile, User
+
+# Sent once per batch of listings set to expired by expire_listings, which
+# skips post_save. Arguments: listing_ids, updated_at
+listings_expired = Signal()
+
+
+def update_search_docs_on_commit(listings: QuerySet[PetListing]) -> None:
+    """
+    Updates the search documents once the change is committed, so they never
+    show changes that are rolled back. A failed update is logged and left to
+    rebuild_listing_search.
+    """
+    transaction.on_commit(partial(update_search_docs, listings), robust=True)
+
+
+def is_deleted_directly(sender, origin) -> bool:
+    """
+    False if the instance is deleted by a cascade (e.g. its pet is deleted),
+    as the search document is deleted too
+    """
+    return getattr(origin, "model", type(origin)) is sender
+
+
+@receiver(post_save, sender=PetListing)
+def update_listing_search_doc(sender, instance: PetListing, raw=False, **kwargs):
+    if not raw:
+        update_search_docs_on_commit(PetListing.objects.filter(pk=instance.pk))
+
+
+@receiver(listings_expired)
+def expire_search_docs(sender, listing_ids, updated_at, **kwargs):
+    # Sent inside the expiring transaction, updated along with the listings
+    update_search_doc_fields(
+        listing_ids, status=ListingStatus.EXPIRED, updated_at=updated_at
+    )
+
+
+@receiver(post_save, sender=Pet)
+def update_pet_search_doc(sender, instance: Pet, raw=False, **kwargs):
+    if not raw:
+        update_search_docs_on_commit(PetListing.objects.filter(pet=instance))
+
+
+@receiver(post_save, sender=PetImage)
+@receiver(post_save, sender=PetSocialLink)
+def update_pet_child_search_doc(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_docs_on_commit(PetListing.objects.filter(pet_id=instance.pet_id))
+
+
+@receiver(post_delete, sender=PetImage)
+@receiver(post_delete, sender=PetSocialLink)
+def delete_pet_child_search_doc(sender, instance, origin=None, **kwargs):
+    if is_deleted_directly(sender, origin):
+        update_search_docs_on_commit(PetListing.objects.filter(pet_id=instance.pet_id))
+
+
+@receiver(m2m_changed, sender=Pet.tags.through)
+def update_pet_tags_search_doc(sender, instance, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(
+        instance, Pet
+    ):
+        update_search_docs_on_commit(PetListing.objects.filter(pet=instance))
+
+
+@receiver(post_save, sender=Breed)
+def update_breed_search_docs(sender, instance: Breed, raw=False, **kwargs):
+    if not raw:
+        update_search_docs_on_commit(PetListing.objects.filter(pet__breed=instance))
+
+
+@receiver(post_save, sender=User)
+def update_owner_search_docs(sender, instance: User, raw=False, **kwargs):
+    # Only the organization is denormalized, saves like last_login are skipped
+    update_fields = kwargs.get("update_fields")
+    if raw or (update_fields and "organization" not in update_fields):
+        return
+    update_search_docs_on_commit(PetListing.objects.filter(pet__owner=instance))
+
+
+@receiver(post_save, sender=OrganizationProfile)
+def update_organization_search_docs(
+    sender, instance: OrganizationProfile, raw=False, **kwargs
+):
+    if not raw:
+        update_search_docs_on_commit(
+            PetListing.objects.filter(pet__owner__organization=instance)
+        )
+
+
+# Deleting a breed or an organization sets the references to it to null
+# without sending post_save, the affected listings are looked up beforehand
+
+
+@receiver(pre_delete, sender=Breed)
+def delete_breed_search_docs(sender, instance: Breed, **kwargs):
+    listing_ids = list(
+        PetListing.objects.filter(pet__breed=instance).values_list("pk", flat=True)
+    )
+    update_search_docs_on_commit(PetListing.objects.filter(pk__in=listing_ids))
+
+
+@receiver(pre_delete, sender=OrganizationProfile)
+def delete_organization_search_docs(sender, instance: OrganizationProfile, **kwargs):
+    listing_ids = list(
+        PetListing.objects.filter(pet__owner__organization=instance).values_list(
+            "pk", flat=True
+        )
+    )
+    update_search_docs_on_commit(PetListing.objects.filter(pk__in=listing_ids))
@@ -1,3 +1,1114 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
 
-# Create your tests here.
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+
+from ruchky_backend.helpers.db.middleware import ReplicaPinMiddleware
+from ruchky_backend.helpers.db.models import uuid7
+from ruchky_backend.helpers.db.routers import replica_lag_probe
+from ruchky_backend.helpers.storage import storage
+from ruchky_backend.helpers.storage.cache import (
+    CachedStorage,
+    DiskLRUCache,
+    StorageUnavailable,
+)
+from ruchky_backend.helpers.storage.paths import address_name, is_content_addressed
+from ruchky_backend.helpers.storage.renditions import (
+    SingleFlight,
+    parse_spec,
+    render,
+    rendition_name,
+)
+from ruchky_backend.monitoring.budget import QueryBudgetExceeded, query_budget
+from ruchky_backend.pets.management.commands.seed_breeds import (
+    Checkpoint,
+    Command as SeedBreedsCommand,
+)
+from ruchky_backend.pets.models import (
+    ArchivedPetListing,
+    Breed,
+    ListingSearchDoc,
+    ListingStatus,
+    Pet,
+    PetImage,
+    PetListing,
+    PetSocialLink,
+    Sex,
+    SocialPlatform,
+    Species,
+)
+from ruchky_backend.pets.signals import listings_expired
+from ruchky_backend.users.models import OrganizationProfile, User
+
+
+class CountingStorage(FileSystemStorage):
+    """Local filesystem stand-in for the bucket that counts reads."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = 0
+        self.available = True
+
+    def _check_available(self):
+        if not self.available:
+            raise ConnectionError("bucket unreachable")
+
+    def _open(self, name, mode="rb"):
+        self._check_available()
+        self.opened += 1
+        return super()._open(name, mode)
+
+    def exists(self, name):
+        self._check_available()
+        return super().exists(name)
+
+
+class CachedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.bucket_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.bucket_dir)
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+        self.backend = CountingStorage(location=self.bucket_dir)
+        self.storage = CachedStorage(self.backend, self.cache_dir, max_size=10)
+
+    def test_reads_through_and_serves_from_disk(self):
+        self.backend.save("breed/a.jpg", ContentFile(b"abc"))
+
+        with self.storage.open("breed/a.jpg") as f:
+            self.assertEqual(f.read(), b"abc")
+        with self.storage.open("breed/a.jpg") as f:
+            self.assertEqual(f.read(), b"abc")
+            # Real file handles, so they can be mmap'ed or sent with sendfile
+            self.assertIsInstance(f.file.fileno(), int)
+
+        self.assertEqual(self.backend.opened, 1)
+
+    def test_save_populates_cache(self):
+        name = self.storage.save("breed/b.jpg", ContentFile(b"xyz"))
+
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b"xyz")
+        self.assertEqual(self.backend.opened, 0)
+
+    def test_evicts_least_recently_used(self):
+        for name in ("a", "b", "c"):
+            self.storage.save(name, ContentFile(b"1234"))
+
+        self.assertLessEqual(self.storage.cache.size, 10)
+        self.assertIsNone(self.storage.cache.get("a"))
+        self.assertIsNotNone(self.storage.cache.get("c"))
+
+    def test_falls_back_to_cache_when_backend_is_down(self):
+        name = self.storage.save("breed/c.jpg", ContentFile(b"cached"))
+        self.backend.save("breed/d.jpg", ContentFile(b"remote"))
+        self.backend.available = False
+
+        with self.storage.open(name) as f:
+            self.assertEqual(f.read(), b"cached")
+        self.assertTrue(self.storage.exists(name))
+
+        with self.assertRaises(StorageUnavailable):
+            self.storage.open("breed/d.jpg")
+
+        # The backend is skipped until retry_after passes
+        self.backend.available = True
+        with self.assertRaises(StorageUnavailable):
+            self.storage.open("breed/d.jpg")
+        self.assertEqual(self.backend.opened, 0)
+
+    def test_missing_object(self):
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open("breed/missing.jpg")
+
+    def test_workers_sharing_directory_stay_within_max_size(self):
+        other = DiskLRUCache(self.cache_dir, max_size=10)
+        self.storage.cache.put("a", [b"1234"])
+        other.put("b", [b"1234"])
+
+        with self.storage.open("a") as f:
+            self.storage.cache.put("c", [b"1234"])
+            # Still readable after the entry is evicted
+            self.assertEqual(f.read(), b"1234")
+
+        self.assertIsNone(other.get("a"))
+        self.assertIsNotNone(other.get("c"))
+        self.assertEqual(self.storage.cache.size, 8)
+
+
+class ContentAddressedNameTests(SimpleTestCase):
+    def test_same_content_same_name(self):
+        first = address_name("pet_image/original.JPG", ContentFile(b"image"))
+        second = address_name("pet_image/original.jpg", ContentFile(b"image"))
+
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith("pet_image/"))
+        self.assertTrue(first.endswith("_original.jpg"))
+        self.assertTrue(is_content_addressed(first))
+        self.assertLessEqual(len(first), 100)
+
+    def test_legacy_name_is_not_addressed(self):
+        self.assertFalse(
+            is_content_addressed("pet_image/ab12_2024-01-01 10:00:00.123.jpg")
+        )
+
+
+class MigrateMediaPathsTests(TestCase):
+    def setUp(self):
+        media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir)
+        self.storage = FileSystemStorage(location=media_dir)
+        patcher = mock.patch.object(storage, "_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Legacy objects are saved directly, bypassing content addressing
+        self.legacy_name = self.storage.save("breed/beagle.jpg", ContentFile(b"dog"))
+        self.breed = Breed.objects.create(
+            name="Beagle", species=Species.DOG, image=self.legacy_name
+        )
+
+    def migrate_media_paths(self, *args):
+        out = StringIO()
+        call_command("migrate_media_paths", *args, stdout=out)
+        return out.getvalue()
+
+    def test_rewrites_objects_and_references(self):
+        output = self.migrate_media_paths("--delete-old")
+
+        self.assertIn("Rewrote 1 objects (0 failed)", output)
+        self.breed.refresh_from_db()
+        self.assertTrue(is_content_addressed(self.breed.image.name))
+        self.assertTrue(self.breed.image.name.startswith("breed/"))
+        self.assertEqual(self.breed.image.read(), b"dog")
+        self.assertFalse(self.storage.exists(self.legacy_name))
+
+    def test_rerun_is_a_no_op(self):
+        self.migrate_media_paths()
+        self.breed.refresh_from_db()
+        name = self.breed.image.name
+
+        output = self.migrate_media_paths()
+
+        self.assertIn("Rewrote 0 objects (0 failed)", output)
+        self.breed.refresh_from_db()
+        self.assertEqual(self.breed.image.name, name)
+        # Without --delete-old the legacy object is kept
+        self.assertTrue(self.storage.exists(self.legacy_name))
+
+    def test_dry_run(self):
+        output = self.migrate_media_paths("--dry-run")
+
+        self.assertIn("Would rewrite 1 objects", output)
+        self.breed.refresh_from_db()
+        self.assertEqual(self.breed.image.name, self.legacy_name)
+
+    def test_rebuilds_listing_cards(self):
+        owner = User.objects.create_user(email="owner@example.com", password="pw")
+        pet = Pet.objects.create(
+            name="Rex",
+            species=Species.DOG,
+            sex=Sex.MALE,
+            birth_date=date(2020, 1, 1),
+            owner=owner,
+            breed=self.breed,
+        )
+        image_name = self.storage.save("pet_image/rex.jpg", ContentFile(b"rex"))
+        with self.captureOnCommitCallbacks(execute=True):
+            PetImage.objects.create(pet=pet, image=image_name)
+            listing = PetListing.objects.create(pet=pet, title="Rex")
+
+        self.migrate_media_paths("--delete-old")
+
+        self.breed.refresh_from_db()
+        card = ListingSearchDoc.objects.get(listing=listing).card
+        self.assertEqual(card["pet"]["breed_info"]["image_url"], self.breed.image.name)
+        self.assertEqual(
+            card["pet"]["images"][0]["image"], PetImage.objects.get().image.name
+        )
+        self.assertTrue(is_content_addressed(card["pet"]["images"][0]["image"]))
+
+    def test_rewrites_archived_cards(self):
+        owner = User.objects.create_user(email="owner@example.com", password="pw")
+        pet = Pet.objects.create(
+            name="Rex",
+            species=Species.DOG,
+            sex=Sex.MALE,
+            birth_date=date(2020, 1, 1),
+            owner=owner,
+            breed=self.breed,
+        )
+        image_name = self.storage.save("pet_image/rex.jpg", ContentFile(b"rex"))
+        PetImage.objects.create(pet=pet, image=image_name)
+        listing = PetListing.objects.create(
+            pet=pet, title="Rex", status=ListingStatus.ADOPTED
+        )
+        PetListing.objects.filter(pk=listing.pk).update(
+            updated_at=timezone.now() - timedelta(days=31)
+        )
+        call_command("archive_listings", "--days", "30", stdout=StringIO())
+
+        output = self.migrate_media_paths("--delete-old")
+
+        # The pet image and its archived copy share the legacy object
+        self.assertIn("Rewrote 3 objects (0 failed)", output)
+        self.breed.refresh_from_db()
+        archived_image = ArchivedPetListing.objects.get().images.get().image.name
+        self.assertTrue(is_content_addressed(archived_image))
+        self.assertEqual(archived_image, PetImage.objects.get().image.name)
+
+        response = self.client.get(f"/api/v1/pet-listings/{listing.id}")
+        self.assertEqual(response.status_code, 200)
+        card = response.json()
+        self.assertEqual(
+            card["pet"]["images"][0]["image"], self.storage.url(archived_image)
+        )
+        self.assertEqual(
+            card["pet"]["breed_info"]["image_url"],
+            self.storage.url(self.breed.image.name),
+        )
+        self.assertEqual(self.storage.open(archived_image).read(), b"rex")
+
+    def test_missing_object_keeps_reference(self):
+        self.storage.delete(self.legacy_name)
+
+        output = self.migrate_media_paths()
+
+        self.assertIn("Rewrote 0 objects (1 failed)", output)
+        self.breed.refresh_from_db()
+        self.assertEqual(self.breed.image.name, self.legacy_name)
+
+
+class GCMediaTests(TestCase):
+    def setUp(self):
+        media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir)
+        self.storage = FileSystemStorage(location=media_dir)
+        patcher = mock.patch.object(storage, "_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save(self, name, content, hours_old=48):
+        name = storage.save(name, ContentFile(content))
+        modified = time.time() - hours_old * 3600
+        os.utime(self.storage.path(name), (modified, modified))
+        return name
+
+    def gc_media(self, *args):
+        out = StringIO()
+        call_command("gc_media", *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_old_orphans(self):
+        referenced = self.save("breed/a.jpg", b"a")
+        Breed.objects.create(name="Beagle", species=Species.DOG, image=referenced)
+        orphan = self.save("breed/b.jpg", b"b")
+        recent = self.save("breed/c.jpg", b"c", hours_old=1)
+
+        output = self.gc_media()
+
+        self.assertIn("Deleted 1 orphaned objects out of 3", output)
+        self.assertTrue(self.storage.exists(referenced))
+        self.assertFalse(self.storage.exists(orphan))
+        # Still within the grace period, its row may not be committed yet
+        self.assertTrue(self.storage.exists(recent))
+
+        self.gc_media("--grace-hours", "0")
+        self.assertFalse(self.storage.exists(recent))
+
+    def test_dry_run(self):
+        orphan = self.save("breed/b.jpg", b"b")
+
+        output = self.gc_media("--dry-run")
+
+        self.assertIn(f"Orphaned: {orphan}", output)
+        self.assertIn("Found 1 orphaned objects out of 1", output)
+        self.assertTrue(self.storage.exists(orphan))
+
+    def test_upload_of_same_content_keeps_listed_orphan(self):
+        orphan = self.save("breed/b.jpg", b"b")
+        (listed,) = storage.iter_object_pages()
+
+        # Uploaded again while the collector is running
+        self.assertEqual(storage.save("breed/other.jpg", ContentFile(b"b")), orphan)
+        storage.delete_many(listed)
+
+        self.assertTrue(self.storage.exists(orphan))
+
+    def test_renditions_follow_their_original_across_pages(self):
+        kept = self.save("pet_image/a.jpg", b"a")
+        Breed.objects.create(name="Beagle", species=Species.DOG, image=kept)
+        orphan = self.save("pet_image/b.jpg", b"b")
+        legacy = self.storage.save("pet_image/legacy.jpg", ContentFile(b"c"))
+        Breed.objects.create(name="Siamese", species=Species.CAT, image=legacy)
+
+        renditions = {}
+        for source in (kept, orphan, legacy):
+            renditions[source] = [
+                self.save(rendition_name(source, parse_spec(w, None, None, None)), b"r")
+                for w in ("35", "70", "100")
+            ]
+
+        # More renditions per original than objects per page
+        self.gc_media("--page-size", "2")
+
+        for name in [kept, legacy, *renditions[kept], *renditions[legacy]]:
+            self.assertTrue(self.storage.exists(name), name)
+        for name in [orphan, *renditions[orphan]]:
+            self.assertFalse(self.storage.exists(name), name)
+
+
+def make_image(width, height, fmt="PNG"):
+    output = BytesIO()
+    Image.new("RGB", (width, height), "red").save(output, fmt)
+    return output.getvalue()
+
+
+class RenditionTests(SimpleTestCase):
+    def test_cover_crops_to_size(self):
+        spec = parse_spec("100", "100", "cover", "png")
+
+        with Image.open(BytesIO(render(BytesIO(make_image(400, 300)), spec))) as image:
+            self.assertEqual(image.format, "PNG")
+            self.assertEqual(image.size, (100, 100))
+
+    def test_contain_keeps_aspect_ratio(self):
+        spec = parse_spec("200", None, "contain", "jpeg")
+
+        with Image.open(BytesIO(render(BytesIO(make_image(400, 300)), spec))) as image:
+            self.assertEqual(image.format, "JPEG")
+            self.assertEqual(image.size, (200, 150))
+
+    def test_sizes_are_allow_listed(self):
+        with self.assertRaises(ValueError):
+            parse_spec("123", None, None, None)
+        with self.assertRaises(ValueError):
+            parse_spec("100", None, "stretch", None)
+
+    def test_single_flight_runs_one_call_per_key_at_a_time(self):
+        flight = SingleFlight()
+        running, peak = 0, 0
+
+        def build():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            time.sleep(0.01)
+            running -= 1
+            return "done"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: flight.do("key", build), range(8)))
+
+        self.assertEqual(results, ["done"] * 8)
+        self.assertEqual(peak, 1)
+        self.assertEqual(flight._locks, {})
+
+
+class MediaResizeTests(SimpleTestCase):
+    def setUp(self):
+        media_dir = tempfile.mkdtemp()
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir)
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.storage = FileSystemStorage(location=media_dir)
+
+        for patcher in (
+            mock.patch.object(storage, "_storage", self.storage),
+            mock.patch(
+                "ruchky_backend.helpers.storage.views.get_rendition_cache",
+                return_value=DiskLRUCache(cache_dir, max_size=10**7),
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.name = storage.save("pet_image/a.png", ContentFile(make_image(400, 300)))
+        self.url = f"/media-resize/{self.name}?w=100&h=100&fmt=png"
+
+    def test_renders_once_and_serves_from_cache(self):
+        with mock.patch(
+            "ruchky_backend.helpers.storage.views.render", wraps=render
+        ) as render_mock:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], "image/png")
+        self.assertIn("immutable", first["Cache-Control"])
+        self.assertEqual(
+            b"".join(first.streaming_content), b"".join(second.streaming_content)
+        )
+        self.assertEqual(first["ETag"], second["ETag"])
+        render_mock.assert_called_once()
+        spec = parse_spec("100", "100", None, "png")
+        self.assertTrue(self.storage.exists(rendition_name(self.name, spec)))
+
+    def test_not_modified_only_while_source_exists(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.storage.delete(self.name)
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_spec(self):
+        response = self.client.get(f"/media-resize/{self.name}?w=123")
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_source(self):
+        response = self.client.get("/media-resize/pet_image/missing.png?w=100")
+        self.assertEqual(response.status_code, 404)
+
+
+class UUID7Tests(SimpleTestCase):
+    def test_time_ordered(self):
+        ids = [uuid7() for _ in range(1000)]
+
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual({uuid.version for uuid in ids}, {7})
+        self.assertAlmostEqual(ids[0].int >> 80, time.time() * 1000, delta=1000)
+
+    def test_increasing_within_millisecond(self):
+        with mock.patch("time.time_ns", return_value=time.time_ns() + 10**9):
+            first, second = uuid7(), uuid7()
+
+        self.assertLess(first, second)
+        self.assertEqual(first.int >> 80, second.int >> 80)
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    # The replica mirrors the test database, so its connection only sees
+    # committed rows
+    databases = {"default", "replica"}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close_pool()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.breed = Breed.objects.create(name="Beagle", species=Species.DOG)
+        replica_lag_probe.reset()
+        self.addCleanup(replica_lag_probe.reset)
+
+    def get_breed(self):
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            response = self.client.get(f"/api/v1/breeds/{self.breed.id}")
+        self.assertEqual(response.status_code, 200)
+        return len(replica_queries)
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertGreater(self.get_breed(), 0)
+
+    def test_pinned_client_reads_from_primary(self):
+        self.client.cookies["db_pin"] = "1"
+        self.assertEqual(self.get_breed(), 0)
+
+    @override_settings(REPLICA_MAX_LAG=-1)
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.assertEqual(self.get_breed(), 0)
+
+    def test_writes_pin_client_to_primary(self):
+        middleware = ReplicaPinMiddleware(lambda request: HttpResponse())
+
+        response = middleware(RequestFactory().post("/api/v1/pets/"))
+        self.assertIn("db_pin", response.cookies)
+
+        response = middleware(RequestFactory().get("/api/v1/pets/"))
+        self.assertNotIn("db_pin", response.cookies)
+
+
+class QueryCountTests(TestCase):
+    """Read endpoints make the same number of queries for any number of pets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = OrganizationProfile.objects.create(name="Shelter")
+        cls.owner = User.objects.create_user(
+            email="owner@example.com", password="password", organization=organization
+        )
+        cls.breed = Breed.objects.create(name="Beagle", species=Species.DOG)
+
+    def create_pets(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                pet = Pet.objects.create(
+                    name=f"Pet {i}",
+                    species=Species.DOG,
+                    sex=Sex.MALE,
+                    birth_date=date(2020, 1, 1),
+                    breed=self.breed,
+                    owner=self.owner,
+                )
+                image = PetImage.objects.create(pet=pet, image="pet_image/original.jpg")
+                pet.profile_picture = image
+                pet.save()
+                pet.tags.add("friendly", f"tag-{i}")
+                PetSocialLink.objects.create(
+                    pet=pet,
+                    platform=SocialPlatform.INSTAGRAM,
+                    url="https://example.com",
+                )
+                PetListing.objects.create(pet=pet, title=pet.name)
+        return pet
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def assertConstantQueries(self, get_url):
+        pet = self.create_pets(1)
+        expected = self.count_queries(get_url(pet))
+
+        pet = self.create_pets(10)
+        self.assertEqual(self.count_queries(get_url(pet)), expected)
+
+    def test_list_pets(self):
+        self.assertConstantQueries(lambda pet: "/api/v1/pets/")
+
+    def test_get_pet(self):
+        self.assertConstantQueries(lambda pet: f"/api/v1/pets/{pet.id}")
+
+    def test_list_pet_listings(self):
+        self.assertConstantQueries(lambda pet: "/api/v1/pet-listings/")
+
+    def test_get_pet_listing(self):
+        self.assertConstantQueries(lambda pet: f"/api/v1/pet-listings/{pet.listing.id}")
+
+    def test_list_breeds(self):
+        self.assertConstantQueries(lambda pet: "/api/v1/breeds/")
+
+    def test_get_breed(self):
+        self.assertConstantQueries(lambda pet: f"/api/v1/breeds/{self.breed.id}")
+
+    def test_budget_exceeded(self):
+        self.create_pets(2)
+        view = query_budget(1)(lambda request: [p.breed for p in Pet.objects.all()])
+
+        with self.assertRaises(QueryBudgetExceeded):
+            view(RequestFactory().get("/"))
+
+
+class ListingSearchDocTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = OrganizationProfile.objects.create(name="Shelter")
+        cls.owner = User.objects.create_user(
+            email="owner@example.com",
+            password="password",
+            organization=cls.organization,
+        )
+        cls.breed = Breed.objects.create(name="Beagle", species=Species.DOG)
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.pet = Pet.objects.create(
+                name="Rex",
+                species=Species.DOG,
+                sex=Sex.MALE,
+                birth_date=date(2020, 1, 1),
+                breed=cls.breed,
+                owner=cls.owner,
+            )
+            cls.image = PetImage.objects.create(pet=cls.pet, image="pet_image/a.jpg")
+            cls.pet.profile_picture = cls.image
+            cls.pet.save()
+            cls.pet.tags.add("friendly")
+            cls.listing = PetListing.objects.create(pet=cls.pet, title="Rex", price=100)
+
+    def list_listings(self, **params):
+        response = self.client.get("/api/v1/pet-listings/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["items"]
+
+    def test_card_matches_detail(self):
+        response = self.client.get(f"/api/v1/pet-listings/{self.listing.id}")
+
+        self.assertEqual(self.list_listings(), [response.json()])
+        # Signed URLs expire, cards keep the storage names
+        card = ListingSearchDoc.objects.get().card
+        self.assertEqual(card["pet"]["images"][0]["image"], "pet_image/a.jpg")
+        self.assertEqual(
+            response.json()["pet"]["images"][0]["image"],
+            storage.url("pet_image/a.jpg"),
+        )
+
+    def test_filters(self):
+        self.assertEqual(len(self.list_listings(breed="beag", is_charity=False)), 1)
+        self.assertEqual(self.list_listings(is_charity=True), [])
+        self.assertEqual(self.list_listings(max_price=50), [])
+        self.assertEqual(self.list_listings(status=ListingStatus.SOLD), [])
+
+    def test_ties_ordered_by_id(self):
+        pet = Pet.objects.create(
+            name="Ace",
+            species=Species.DOG,
+            sex=Sex.MALE,
+            birth_date=date(2021, 1, 1),
+            owner=self.owner,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            listing = PetListing.objects.create(pet=pet, title="Ace")
+        ListingSearchDoc.objects.update(created_at=self.listing.created_at)
+
+        cards = self.list_listings()
+
+        self.assertGreater(listing.id, self.listing.id)
+        self.assertEqual(
+            [card["id"] for card in cards], [str(listing.id), str(self.listing.id)]
+        )
+
+    def test_follows_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.organization.is_charity = True
+            self.organization.save()
+            self.breed.name = "Basset"
+            self.breed.save()
+            self.pet.tags.add("calm")
+            PetImage.objects.create(pet=self.pet, image="pet_image/b.jpg", order=1)
+            self.image.delete()
+
+        (card,) = self.list_listings(is_charity=True, breed="basset")
+        self.assertEqual(card["pet"]["breed_name"], "Basset")
+        self.assertEqual(sorted(card["pet"]["tags"]), ["calm", "friendly"])
+        self.assertEqual(len(card["pet"]["images"]), 1)
+        self.assertIsNone(card["pet"]["profile_picture_id"])
+
+    def test_follows_breed_and_organization_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.breed.delete()
+            self.organization.delete()
+
+        search_doc = ListingSearchDoc.objects.get()
+        self.assertEqual(search_doc.breed_name, "")
+        self.assertIsNone(search_doc.organization_id)
+        self.assertIsNone(search_doc.card["pet"]["breed_info"])
+
+    def test_rolled_back_change_is_not_indexed(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(ValueError), transaction.atomic():
+                self.pet.name = "Max"
+                self.pet.save()
+                raise ValueError
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(ListingSearchDoc.objects.get().pet_name, "Rex")
+
+    def test_deleted_with_pet(self):
+        self.pet.delete()
+
+        self.assertFalse(ListingSearchDoc.objects.exists())
+        # Search documents must not be recreated by cascaded deletes
+        connection.check_constraints()
+
+    def test_rebuild_command(self):
+        ListingSearchDoc.objects.all().delete()
+
+        call_command("rebuild_listing_search", stdout=StringIO())
+
+        self.assertEqual(len(self.list_listings()), 1)
+
+
+class ListingArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            email="owner@example.com", password="password"
+        )
+        cls.pet = Pet.objects.create(
+            name="Rex",
+            species=Species.DOG,
+            sex=Sex.MALE,
+            birth_date=date(2020, 1, 1),
+            owner=cls.owner,
+        )
+        PetImage.objects.create(pet=cls.pet, image="pet_image/a.jpg")
+        cls.listing = PetListing.objects.create(
+            pet=cls.pet, title="Rex", status=ListingStatus.ADOPTED
+        )
+
+    def archive(self):
+        call_command("archive_listings", "--days", "30", stdout=StringIO())
+
+    def age(self, listing, days):
+        PetListing.objects.filter(pk=listing.pk).update(
+            updated_at=timezone.now() - timedelta(days=days)
+        )
+
+    def test_archives_closed_listings(self):
+        self.age(self.listing, 31)
+        detail = self.client.get(f"/api/v1/pet-listings/{self.listing.id}").json()
+
+        self.archive()
+
+        self.assertFalse(PetListing.objects.exists())
+        self.assertFalse(ListingSearchDoc.objects.exists())
+        archived = ArchivedPetListing.objects.get(id=self.listing.id)
+        self.assertEqual(archived.status, ListingStatus.ADOPTED)
+        self.assertEqual(
+            [image.image.name for image in archived.images.all()], ["pet_image/a.jpg"]
+        )
+        # URLs are resolved when the card is served
+        self.assertEqual(archived.card["pet"]["images"][0]["image"], "pet_image/a.jpg")
+
+        response = self.client.get(f"/api/v1/pet-listings/{self.listing.id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), detail)
+
+        # The pet can be listed again
+        PetListing.objects.create(pet=self.pet, title="Rex again")
+
+    def test_keeps_active_and_recently_closed_listings(self):
+        self.age(self.listing, 29)
+        active_pet = Pet.objects.create(
+            name="Ace",
+            species=Species.DOG,
+            sex=Sex.MALE,
+            birth_date=date(2021, 1, 1),
+            owner=self.owner,
+        )
+        active = PetListing.objects.create(pet=active_pet, title="Ace")
+        self.age(active, 31)
+
+        self.archive()
+
+        self.assertEqual(PetListing.objects.count(), 2)
+        self.assertFalse(ArchivedPetListing.objects.exists())
+
+    def test_unknown_listing(self):
+        response = self.client.get(f"/api/v1/pet-listings/{uuid7()}")
+        self.assertEqual(response.status_code, 404)
+
+
+class ListingExpiryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = OrganizationProfile.objects.create(
+            name="Shelter", listing_ttl_days=10
+        )
+        cls.shelter = User.objects.create_user(
+            email="shelter@example.com",
+            password="password",
+            organization=cls.organization,
+        )
+        cls.owner = User.objects.create_user(
+            email="owner@example.com", password="password"
+        )
+
+    def create_listing(self, owner, days_old):
+        pet = Pet.objects.create(
+            name="Rex",
+            species=Species.DOG,
+            sex=Sex.MALE,
+            birth_date=date(2020, 1, 1),
+            owner=owner,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            listing = PetListing.objects.create(pet=pet, title="Rex")
+        PetListing.objects.filter(pk=listing.pk).update(
+            created_at=timezone.now() - timedelta(days=days_old)
+        )
+        return listing
+
+    def expire(self, *args):
+        call_command("expire_listings", *args, stdout=StringIO())
+
+    def test_expires_after_organization_ttl(self):
+        shelter_listing = self.create_listing(self.shelter, 11)
+        recent = self.create_listing(self.owner, 11)
+        old = self.create_listing(self.owner, 61)
+
+        self.expire()
+
+        statuses = dict(PetListing.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[shelter_listing.pk], ListingStatus.EXPIRED)
+        self.assertEqual(statuses[recent.pk], ListingStatus.ACTIVE)
+        self.assertEqual(statuses[old.pk], ListingStatus.EXPIRED)
+
+        response = self.client.get("/api/v1/pet-listings/", {"status": "expired"})
+        cards = response.json()["items"]
+        self.assertEqual(
+            sorted(card["id"] for card in cards),
+            sorted([str(shelter_listing.pk), str(old.pk)]),
+        )
+        self.assertEqual({card["status"] for card in cards}, {"expired"})
+
+    def test_zero_ttl_expires_right_away(self):
+        OrganizationProfile.objects.update(listing_ttl_days=0)
+        listing = self.create_listing(self.shelter, 0)
+
+        self.expire()
+
+        listing.refresh_from_db()
+        self.assertEqual(listing.status, ListingStatus.EXPIRED)
+
+    def test_one_event_per_batch(self):
+        for _ in range(3):
+            self.create_listing(self.shelter, 30)
+        events = []
+
+        def receiver(sender, listing_ids, **kwargs):
+            events.append(len(listing_ids))
+
+        listings_expired.connect(receiver)
+        self.addCleanup(listings_expired.disconnect, receiver)
+        with mock.patch("ruchky_backend.pets.signals.update_search_docs") as update:
+            self.expire("--batch-size", "2")
+
+        self.assertEqual(events, [2, 1])
+        update.assert_not_called()
+
+
+class GenerateFakeCatalogTests(TestCase):
+    def test_builds_search_docs(self):
+        call_command(
+            "generate_fake_catalog",
+            "--organizations=1",
+            "--users=1",
+            "--pets=10",
+            "--images-per-pet=1",
+            "--breeds=2",
+            "--batch-size=4",
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Pet.objects.count(), 10)
+        self.assertQuerySetEqual(
+            ListingSearchDoc.objects.values_list("listing_id", flat=True),
+            PetListing.objects.values_list("pk", flat=True),
+            ordered=False,
+        )
+
+
+class SeedBreedsSnapshotTests(TestCase):
+    def setUp(self):
+        media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir)
+        patcher = mock.patch.object(
+            storage, "_storage", FileSystemStorage(location=media_dir)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.path = os.path.join(media_dir, "breeds.tar.gz")
+
+    def seed_breeds(self, *args):
+        call_command("seed_breeds", *args, stdout=StringIO())
+
+    def test_round_trip(self):
+        beagle = Breed(name="Beagle", species=Species.DOG, origin="England")
+        beagle.image.save("beagle.jpg", ContentFile(b"beagle"), save=False)
+        beagle.save()
+        Breed.objects.create(name="Siamese", species=Species.CAT)
+
+        self.seed_breeds("--export-snapshot", self.path)
+        Breed.objects.all().delete()
+        self.seed_breeds("--from-snapshot", self.path)
+
+        beagle = Breed.objects.get(name="Beagle")
+        self.assertEqual(beagle.origin, "England")
+        self.assertEqual(beagle.image.read(), b"beagle")
+        self.assertFalse(Breed.objects.get(name="Siamese").image)
+
+    def test_load_updates_existing_breeds(self):
+        breed = Breed.objects.create(name="Beagle", species=Species.DOG, origin="UK")
+        self.seed_breeds("--export-snapshot", self.path)
+        Breed.objects.filter(pk=breed.pk).update(origin="Unknown")
+
+        self.seed_breeds("--from-snapshot", self.path)
+
+        self.assertEqual(Breed.objects.get().pk, breed.pk)
+        self.assertEqual(Breed.objects.get().origin, "UK")
+
+    def test_load_rebuilds_listing_cards(self):
+        breed = Breed.objects.create(name="Beagle", species=Species.DOG, origin="UK")
+        self.seed_breeds("--export-snapshot", self.path)
+        Breed.objects.filter(pk=breed.pk).update(origin="Unknown")
+        owner = User.objects.create_user(email="owner@example.com", password="pw")
+        pet = Pet.objects.create(
+            name="Rex",
+            species=Species.DOG,
+            sex=Sex.MALE,
+            birth_date=date(2020, 1, 1),
+            owner=owner,
+            breed=breed,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            listing = PetListing.objects.create(pet=pet, title="Rex")
+
+        self.seed_breeds("--from-snapshot", self.path)
+
+        card = ListingSearchDoc.objects.get(listing=listing).card
+        self.assertEqual(card["pet"]["breed_info"]["origin"], "UK")
+
+
+class SeedBreedsSyncTests(TestCase):
+    def setUp(self):
+        checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, checkpoint_dir)
+        self.checkpoint_path = os.path.join(checkpoint_dir, "checkpoint.json")
+
+        self.command = SeedBreedsCommand(stdout=StringIO())
+        self.command.skip_images = False
+        self.command.checkpoint = Checkpoint(self.checkpoint_path)
+
+        self.breeds_data = [
+            {
+                "name": f"Breed {i}",
+                "species": Species.DOG,
+                "api_id": str(i),
+                "origin": "England",
+                "image_url": f"https://example.com/{i}.jpg",
+            }
+            for i in range(3)
+        ]
+
+    def sync(self):
+        return self.command.sync_breeds(Species.DOG, self.breeds_data)
+
+    def test_only_changed_breeds_are_updated(self):
+        self.assertEqual(len(self.sync()), 3)
+        Breed.objects.filter(api_id="0").update(
+            image="breed/a.jpg", source_image_url="https://example.com/0.jpg"
+        )
+
+        self.breeds_data[1]["origin"] = "Scotland"
+        self.breeds_data[2]["image_url"] = "https://example.com/new.jpg"
+        with CaptureQueriesContext(connection) as queries:
+            needs_image = self.sync()
+
+        # Select, then a single UPDATE and the card rebuild inside a savepoint
+        self.assertEqual(len(queries), 5)
+        self.assertEqual(Breed.objects.get(api_id="1").origin, "Scotland")
+        self.assertEqual(
+            [breed_info["api_id"] for breed_info in needs_image], ["1", "2"]
+        )
+        self.assertIn("dog:0", self.command.checkpoint)
+
+    def test_searched_image_is_kept(self):
+        # No URL in the breed list, the image was found by search
+        del self.breeds_data[0]["image_url"]
+        self.sync()
+        Breed.objects.filter(api_id="0").update(
+            image="breed/a.jpg", source_image_url="https://example.com/found.jpg"
+        )
+
+        needs_image = self.sync()
+
+        self.assertNotIn("0", [breed_info["api_id"] for breed_info in needs_image])
+        self.assertIn("dog:0", self.command.checkpoint)
+
+    def test_resume_skips_synced_breeds(self):
+        self.command.skip_images = True
+        self.sync()
+        Breed.objects.all().delete()
+
+        self.command.checkpoint = Checkpoint(self.checkpoint_path, resume=True)
+        self.breeds_data.append(
+            {"name": "Breed 3", "species": Species.DOG, "api_id": "3"}
+        )
+        self.sync()
+
+        self.assertQuerySetEqual(Breed.objects.values_list("api_id", flat=True), ["3"])
+
+
+class SeedBreedsImagePipelineTests(TestCase):
+    def setUp(self):
+        media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_dir)
+        self.storage = FileSystemStorage(location=media_dir)
+        patcher = mock.patch.object(storage, "_storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.command = SeedBreedsCommand(stdout=StringIO())
+        self.command.concurrency = 2
+        self.command.storage_workers = 2
+        self.command.verbose = True
+        self.command.successful_images = self.command.failed_images = 0
+        self.command.logger = mock.Mock()
+        self.command.checkpoint = Checkpoint(os.path.join(media_dir, "checkpoint"))
+
+        self.breeds = [
+            {
+                "breed": Breed.objects.create(
+                    name=f"Breed {i}", species=Species.DOG, api_id=str(i)
+                ),
+                "api_id": str(i),
+                "image_url": f"https://example.com/{i}.jpg",
+            }
+            for i in range(10)
+        ]
+
+    def test_images_are_stored_with_bounded_memory(self):
+        in_memory, peak = 0, 0
+        save = self.storage.save
+
+        async def download(session, semaphore, api_id, image_url):
+            nonlocal in_memory, peak
+            in_memory += 1
+            peak = max(peak, in_memory)
+            return image_url, api_id.encode()
+
+        def slow_save(*args, **kwargs):
+            nonlocal in_memory
+            time.sleep(0.01)
+            in_memory -= 1
+            return save(*args, **kwargs)
+
+        with (
+            mock.patch.object(self.command, "_get_dog_breed_image", download),
+            mock.patch.object(self.storage, "save", slow_save),
+        ):
+            async_to_sync(self.command.run_image_pipeline)(self.breeds)
+
+        self.assertEqual(self.command.successful_images, 10)
+        self.assertLessEqual(peak, 2 + 3 * 2)
+        breed = Breed.objects.get(api_id="3")
+        self.assertEqual(breed.image.read(), b"3")
+        self.assertEqual(breed.source_image_url, "https://example.com/3.jpg")
+        self.assertIn("dog:3", self.command.checkpoint)
+        self.assertIn("storage: 10 done", self.command.stdout.getvalue())
+
+    def test_failed_images_are_recorded(self):
+        async def download(session, semaphore, api_id, image_url):
+            return None if api_id == "3" else (image_url, api_id.encode())
+
+        with mock.patch.object(self.command, "_get_dog_breed_image", download):
+            async_to_sync(self.command.run_image_pipeline)(self.breeds)
+
+        self.assertEqual(self.command.failed_images, 1)
+        self.assertNotIn("dog:3", self.command.checkpoint)
+        self.assertEqual(self.command.checkpoint.failed, {"dog:3"})
+        # The run can finish and clear the checkpoint
+        self.assertTrue(
+            all(self.command.checkpoint.is_processed(f"dog:{i}") for i in range(10))
+        )
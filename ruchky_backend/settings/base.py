@@ -11,12 +11,14 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import tempfile
 
 from pathlib import Path
 
 from django.conf.locale.en import formats as en_formats
 from django.conf.locale.uk import formats as uk_formats
 from dotenv import load_dotenv
+from psycopg_pool import ConnectionPool
 
 # Load environment variables from .env file
 load_dotenv()
@@ -53,29 +55,32 @@ INSTALLED_APPS = [
     "ruchky_backend.auth",
     "ruchky_backend.users",
     "ruchky_backend.pets",
+    "ruchky_backend.monitoring",
+    "ruchky_backend.emails",
     # Third Party Apps
     "allauth",
     "allauth.account",
     "allauth.socialaccount",
     "allauth.socialaccount.providers.google",
     "corsheaders",
-    "debug_toolbar",
     "taggit",
 ]
 
 MIDDLEWARE = [
+    "ruchky_backend.monitoring.middleware.MetricsMiddleware",
+    "ruchky_backend.monitoring.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "ruchky_backend.helpers.static.AsyncWhiteNoiseMiddleware",
     "django.middleware.gzip.GZipMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "ruchky_backend.users.middleware.CachedAuthenticationMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "ruchky_backend.helpers.db.middleware.ReplicaPinMiddleware",
 ]
 
 ROOT_URLCONF = "ruchky_backend.urls"
@@ -111,10 +116,51 @@ DATABASES = {
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
-        "PORT": "5432",
+        "PORT": os.getenv("DB_PORT", "5432"),
     }
 }
 
+# Connection pooling (psycopg_pool). Every worker process keeps its own pool,
+# so DB_POOL_MAX_SIZE * workers must stay below Postgres max_connections.
+DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "true").lower() == "true"
+
+if DB_POOL_ENABLED:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            # Seconds a request waits for a free connection before failing
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            # Closes idle connections above min_size after this many seconds
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+            # Pings connections before handing them out
+            "check": ConnectionPool.check_connection,
+        },
+    }
+else:
+    # Persistent connections are incompatible with the pool
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", 60))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replica for safe requests to the pets, listings and breeds APIs. It
+# points at the primary unless DB_REPLICA_HOST is set.
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "NAME": os.getenv("DB_REPLICA_NAME", DATABASES["default"]["NAME"]),
+    "HOST": os.getenv("DB_REPLICA_HOST", DATABASES["default"]["HOST"]),
+    "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+    "TEST": {"MIRROR": "default"},
+}
+
+DATABASE_ROUTERS = ["ruchky_backend.helpers.db.routers.ReplicaRouter"]
+
+# Reads go to the primary while the replica lags more than this (seconds)
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", 2))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", 5))
+# Clients read from the primary for this long after a write
+REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", 5))
+REPLICA_PIN_COOKIE_NAME = "db_pin"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -174,6 +220,21 @@ STATICFILES_FINDERS = (
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
 
+# Optional local read-through cache for media stored in Google Cloud Storage
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", "")
+MEDIA_CACHE_MAX_SIZE = int(os.getenv("MEDIA_CACHE_MAX_SIZE", 1024 * 1024 * 1024))
+
+# On-demand image renditions (/media-resize/<path>?w=&h=&fit=&fmt=)
+MEDIA_RESIZE_WIDTHS = [35, 70, 100, 200, 320, 640, 1200]
+MEDIA_RESIZE_HEIGHTS = [35, 70, 100, 200, 320, 630, 640]
+MEDIA_RESIZE_QUALITY = 82
+MEDIA_RESIZE_CACHE_DIR = os.getenv(
+    "MEDIA_RESIZE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ruchky-renditions")
+)
+MEDIA_RESIZE_CACHE_MAX_SIZE = int(
+    os.getenv("MEDIA_RESIZE_CACHE_MAX_SIZE", 256 * 1024 * 1024)
+)
+
 STORAGES = {
     "default": {
         "BACKEND": "ruchky_backend.helpers.storage.StorageProvider",
@@ -183,6 +244,97 @@ STORAGES = {
     },
 }
 
+# Per-process user cache. Other workers can't evict its entries, so they are
+# short-lived: a password change or deactivation handled by another worker
+# takes effect within the timeout. This also applies to access tokens, a
+# deactivated user keeps API access for up to USER_CACHE_TIMEOUT seconds
+USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", 60))
+
+# Optional session cache, it must be shared by all workers (e.g.
+# django.core.cache.backends.redis.RedisCache at redis://redis:6379/1).
+# A per-process one would keep serving sessions that another worker logged
+# out or flushed, so without it sessions are read from the database
+SESSION_CACHE_BACKEND = os.getenv("SESSION_CACHE_BACKEND", "")
+SESSION_CACHE_LOCATION = os.getenv("SESSION_CACHE_LOCATION", "")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "users": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "users",
+        "TIMEOUT": USER_CACHE_TIMEOUT,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+    # Should be shared by all workers in production (e.g. Redis or
+    # Memcached), otherwise every worker allows the full rate
+    "ratelimit": {
+        "BACKEND": os.getenv(
+            "RATE_LIMIT_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("RATE_LIMIT_CACHE_LOCATION", "ratelimit"),
+    },
+}
+
+if SESSION_CACHE_BACKEND:
+    # Sessions are read from the cache and written through to the database
+    CACHES["sessions"] = {
+        "BACKEND": SESSION_CACHE_BACKEND,
+        "LOCATION": SESSION_CACHE_LOCATION,
+    }
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+    SESSION_CACHE_ALIAS = "sessions"
+USER_CACHE_ALIAS = "users"
+
+# Signed access tokens (seconds), verified without queries, and refresh
+# tokens stored in the database
+ACCESS_TOKEN_LIFETIME = int(os.getenv("ACCESS_TOKEN_LIFETIME", 5 * 60))
+REFRESH_TOKEN_LIFETIME = int(os.getenv("REFRESH_TOKEN_LIFETIME", 30 * 24 * 60 * 60))
+# Seconds between reloads of the revoked token families in each worker. A
+# logout or token reuse handled by one worker takes effect immediately there,
+# other workers keep accepting the family's access tokens up to this long
+TOKEN_REVOCATION_CHECK_INTERVAL = int(os.getenv("TOKEN_REVOCATION_CHECK_INTERVAL", 10))
+
+# Login and registration attempts allowed per client IP and per email within
+# AUTH_RATE_LIMIT_PERIOD seconds. Tokens refill evenly over the period.
+AUTH_RATE_LIMIT_PER_IP = int(os.getenv("AUTH_RATE_LIMIT_PER_IP", 20))
+AUTH_RATE_LIMIT_PER_EMAIL = int(os.getenv("AUTH_RATE_LIMIT_PER_EMAIL", 5))
+AUTH_RATE_LIMIT_PERIOD = int(os.getenv("AUTH_RATE_LIMIT_PERIOD", 60))
+RATE_LIMIT_CACHE_ALIAS = "ratelimit"
+
+# Threads per worker process hashing passwords (login, registration) and how
+# many hashing calls may be queued or running before new ones get a 503
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", 2))
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv("PASSWORD_HASHING_MAX_PENDING", 16))
+
+# Number of reverse proxies in front of the app, the client IP is taken from
+# X-Forwarded-For accordingly (0 uses REMOTE_ADDR)
+NINJA_NUM_PROXIES = int(os.getenv("NINJA_NUM_PROXIES", 0))
+
+# Bearer token required to scrape /metrics (when empty, /metrics is only
+# served with DEBUG)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Queries slower than this are stored with their EXPLAIN plan (admin)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", 500))
+# Requests whose slow queries may wait to be stored by the background thread
+# of a worker process, the slow queries of more are dropped
+SLOW_QUERY_MAX_PENDING = int(os.getenv("SLOW_QUERY_MAX_PENDING", 100))
+
+# Active listings expire this many days after they were created, unless the
+# owner's organization sets its own TTL (see expire_listings)
+LISTING_TTL_DAYS = int(os.getenv("LISTING_TTL_DAYS", 60))
+
+# Closed listings not updated for this many days are moved to the archive
+# tables by archive_listings
+LISTING_ARCHIVE_AFTER_DAYS = int(os.getenv("LISTING_ARCHIVE_AFTER_DAYS", 90))
+
+# Raise instead of logging when an endpoint exceeds its query budget
+QUERY_BUDGET_STRICT = True
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
@@ -211,6 +363,8 @@ ACCOUNT_FORMS = {
     "signup": "ruchky_backend.users.forms.SignupForm",
 }
 
+# Account emails are queued in the outbox and sent by send_outbox
+ACCOUNT_ADAPTER = "ruchky_backend.emails.adapter.AccountAdapter"
 ACCOUNT_EMAIL_VERIFICATION = "mandatory"
 ACCOUNT_CONFIRM_EMAIL_ON_GET = True
 ACCOUNT_EMAIL_CONFIRMATION_ANONYMOUS_REDIRECT_URL = os.getenv(
@@ -230,6 +384,7 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = os.getenv(  # noqa
     "CORS_ALLOWED_ORIGINS", "http://127.0.0.1:3000,http://localhost:3000"
 ).split(",")
+CORS_EXPOSE_HEADERS = ["Server-Timing"]
 CSRF_TRUSTED_ORIGINS = os.getenv(  # noqa
     "CSRF_TRUSTED_ORIGINS", "http://127.0.0.1:3000,http://localhost:3000"
 ).split(",")
@@ -289,6 +444,11 @@ UNFOLD = {
                         "icon": "pets",
                         "link": "/admin/pets/pet/",
                     },
+                    {
+                        "title": "Slow queries",
+                        "icon": "speed",
+                        "link": "/admin/monitoring/slowquery/",
+                    },
                 ],
             },
         ],
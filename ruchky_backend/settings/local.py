@@ -1,10 +1,21 @@
+import os
+import tempfile
+
 from .base import *  # noqa
 
-EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Console by default, "django.core.mail.backends.filebased.EmailBackend"
+# writes the emails sent by send_outbox to EMAIL_FILE_PATH instead
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend"
+)
+EMAIL_FILE_PATH = os.getenv(
+    "EMAIL_FILE_PATH", os.path.join(tempfile.gettempdir(), "ruchky-emails")
+)
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 INTERNAL_IPS = ["0.0.0.0", "127.0.0.1", "localhost"]
 
-INSTALLED_APPS += ["django_extensions"]  # noqa
+INSTALLED_APPS += ["django_extensions", "debug_toolbar"]  # noqa
+MIDDLEWARE += ["debug_toolbar.middleware.DebugToolbarMiddleware"]  # noqa
 
 SESSION_COOKIE_SECURE = False
@@ -2,11 +2,15 @@ import os
 
 from google.oauth2 import service_account
 
+from ruchky_backend.helpers.logger import logger
+
 from .base import *  # noqa
 
 
 DEBUG = False
 
+QUERY_BUDGET_STRICT = False
+
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "*").split(",")  # noqa
 
 CSRF_COOKIE_DOMAIN = os.getenv("CSRF_COOKIE_DOMAIN")  # noqa
@@ -17,8 +21,15 @@ CSRF_COOKIE_SECURE = True
 
 SECURE_SSL_REDIRECT = True
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
-
-INSTALLED_APPS += ("django_cleanup.apps.CleanupConfig",)  # noqa
+NINJA_NUM_PROXIES = int(os.getenv("NINJA_NUM_PROXIES", 1))
+
+# Auth rate limits count per worker process unless the cache is shared
+if CACHES["ratelimit"]["BACKEND"].endswith(".LocMemCache"):  # noqa
+    logger.warning(
+        "RATE_LIMIT_CACHE_BACKEND is a per-process LocMemCache, every worker "
+        "allows the full login and registration rate. Set it to a cache shared "
+        "by all workers (e.g. Redis or Memcached)"
+    )
 
 GS_CREDENTIALS = service_account.Credentials.from_service_account_file(
     "/SECRETS/service-account.json"
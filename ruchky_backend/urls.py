@@ -20,16 +20,22 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
-from debug_toolbar.toolbar import debug_toolbar_urls
-
 from ruchky_backend.api import api
+from ruchky_backend.helpers.storage.views import media_resize
+from ruchky_backend.monitoring.views import metrics
 
 urlpatterns = (
     [
         path("admin/", admin.site.urls),
         path("api/v1/", api.urls),
         path("accounts/", include("allauth.urls")),
+        path("media-resize/<path:path>", media_resize, name="media-resize"),
+        path("metrics", metrics, name="metrics"),
     ]
-    + debug_toolbar_urls()
     + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 )
+
+if "debug_toolbar" in settings.INSTALLED_APPS:
+    from debug_toolbar.toolbar import debug_toolbar_urls
+
+    urlpatterns += debug_toolbar_urls()
@@ -1,9 +1,10 @@
 from ninja import Router
 from ninja.security import django_auth
 
+from ruchky_backend.auth.security import access_token_auth
 from ruchky_backend.users.schemas import UserSchema
 
-router = Router(auth=django_auth, tags=["users"])
+router = Router(auth=[access_token_auth, django_auth], tags=["users"])
 
 
 @router.get("/me", response=UserSchema)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ruchky_backend.users"
+
+    def ready(self):
+        from ruchky_backend.users import signals  # noqa
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY, get_user
+from django.core.cache import caches
+from django.http import HttpRequest
+from django.utils.crypto import constant_time_compare
+
+from ruchky_backend.monitoring.metrics import record_cache_lookup
+from ruchky_backend.users.models import User
+
+
+def get_user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def get_cached_user(request: HttpRequest):
+    """
+    Returns the user of the session like django.contrib.auth.get_user,
+    served from a per-process cache while the session auth hash matches.
+
+    The cache stores pickled copies, so changes made to request.user are
+    never seen by other requests. Saving a user evicts it in this process,
+    other workers see the change after USER_CACHE_TIMEOUT.
+    """
+    try:
+        user_id = request.session[SESSION_KEY]
+        session_hash = request.session[HASH_SESSION_KEY]
+    except KeyError:
+        return get_user(request)
+
+    cache = get_user_cache()
+    key = user_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None and constant_time_compare(cached[0], session_hash):
+        record_cache_lookup("users", hit=True)
+        return cached[1]
+
+    record_cache_lookup("users", hit=False)
+    user = get_user(request)
+    if user.is_authenticated:
+        # The session may have been rehashed with the current secret key
+        cache.set(key, (request.session[HASH_SESSION_KEY], user))
+    return user
+
+
+def get_cached_user_by_id(user_id, session_hash: str) -> Optional[User]:
+    """
+    Returns the active user with the given id and session auth hash (e.g.
+    from an access token), or None if the password changed since.
+
+    is_active is checked on cache misses only, a user deactivated through
+    another worker is returned for up to USER_CACHE_TIMEOUT seconds.
+    """
+    cache = get_user_cache()
+    key = user_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None and constant_time_compare(cached[0], session_hash):
+        record_cache_lookup("users", hit=True)
+        return cached[1]
+
+    record_cache_lookup("users", hit=False)
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return None
+
+    user_hash = user.get_session_auth_hash()
+    cache.set(key, (user_hash, user))
+    return user if constant_time_compare(user_hash, session_hash) else None
+
+
+def invalidate_user(user_id) -> None:
+    get_user_cache().delete(user_cache_key(user_id))
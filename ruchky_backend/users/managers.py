@@ -1,4 +1,7 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
+
+from ruchky_backend.auth.hashing import password_hashing
 
 
 class UserManager(BaseUserManager):
@@ -21,6 +24,21 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_superuser", False)
         return self._create_user(email, password, **extra_fields)
 
+    async def acreate_user(self, email, password=None, **extra_fields):
+        """
+        Same as create_user, with the password hashed in the password hashing
+        pool instead of the calling thread.
+        """
+        if not email:
+            raise ValueError("The given email must be set")
+        extra_fields.setdefault("is_staff", False)
+        extra_fields.setdefault("is_superuser", False)
+        email = self.normalize_email(email)
+        user = self.model(email=email, **extra_fields)
+        user.password = await password_hashing.run(make_password, password)
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, password, **extra_fields):
         extra_fields.setdefault("is_staff", True)
         extra_fields.setdefault("is_superuser", True)
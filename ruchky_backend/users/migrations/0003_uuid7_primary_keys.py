@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:32
+
+import ruchky_backend.helpers.db.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_organizationprofile_user_organization"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="organizationprofile",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="id",
+            field=models.UUIDField(
+                default=ruchky_backend.helpers.db.models.uuid7,
+                editable=False,
+                primary_key=True,
+                serialize=False,
+            ),
+        ),
+    ]
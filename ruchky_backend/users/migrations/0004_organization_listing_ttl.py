@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 05:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_uuid7_primary_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organizationprofile",
+            name="listing_ttl_days",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Active listings expire after this many days. Leave blank for the default.",
+                null=True,
+                verbose_name="Listing TTL (days)",
+            ),
+        ),
+    ]
@@ -17,6 +17,15 @@ class OrganizationProfile(UUIDMixin, DateTimeMixin):
     name = models.CharField(_("Organization Name"), max_length=255)
     address = models.CharField(_("Address"), max_length=255, blank=True, null=True)
     is_charity = models.BooleanField(_("Is Charity"), default=False)
+    listing_ttl_days = models.PositiveIntegerField(
+        _("Listing TTL (days)"),
+        blank=True,
+        null=True,
+        help_text=_(
+            "Active listings expire after this many days. "
+            "Leave blank for the default."
+        ),
+    )
 
     logo = models.ImageField(
         verbose_name=_("Organization Logo"),
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ruchky_backend.users.cache import invalidate_user
+from ruchky_backend.users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance: User, **kwargs):
+    invalidate_user(instance.pk)
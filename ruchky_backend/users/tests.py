@@ -1,3 +1,46 @@
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
 from django.test import TestCase
 
-# Create your tests here.
+from ruchky_backend.users.models import User
+
+
+class CachedAuthenticationTests(TestCase):
+    url = "/api/v1/users/me"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@example.com", password="password", first_name="Olena"
+        )
+
+    def setUp(self):
+        caches["users"].clear()
+        self.client.force_login(self.user)
+
+    def test_hot_path_only_reads_session(self):
+        self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["email"], "user@example.com")
+
+    def test_saving_user_evicts_it(self):
+        self.client.get(self.url)
+
+        self.user.first_name = "Oksana"
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).json()["first_name"], "Oksana")
+
+    def test_logout_is_not_served_from_cache(self):
+        self.client.get(self.url)
+        self.client.post("/api/v1/auth/logout")
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_session_deleted_by_another_worker(self):
+        self.client.get(self.url)
+        Session.objects.all().delete()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)